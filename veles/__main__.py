@@ -51,6 +51,10 @@ under the License.
 
 import sys
 __unittest = "unittest" in sys.modules
+if "--profile-startup" in sys.argv:
+    # Must go before any other import
+    from veles.import_profiler import ImportProfiler
+    ImportProfiler.start()
 # Standard library imports go here
 import atexit
 import binascii
@@ -83,7 +87,6 @@ if PY3:
     from urllib.parse import splittype
 else:
     from urllib import splittype
-import wget
 
 # Veles imports go here
 from veles.config import root
@@ -93,6 +96,7 @@ from veles.compat import from_none, FileNotFoundError, IsADirectoryError, \
 from veles.external import daemon
 from veles.import_file import get_file_package_and_module, \
     import_file_as_package, import_file_as_module
+from veles.import_profiler import ImportProfiler
 from veles.logger import Logger
 from veles.launcher import Launcher
 from veles.memory import Watcher
@@ -572,6 +576,7 @@ class Main(Logger, CommandLineBase):
         elif stype in ("http", "https"):
             try:
                 self.info("Downloading %s...", fname_snapshot)
+                import wget
                 fname_snapshot = self.snapshot_file_name = wget.download(
                     fname_snapshot, root.common.dirs.snapshots)
                 print()
@@ -643,6 +648,7 @@ class Main(Logger, CommandLineBase):
             sys.exit(Main.EXIT_FAILURE)
 
         self.debug("Initialization is complete")
+        self._print_startup_profile()
         try:
             if self._dump_attrs != "no":
                 self._dump_unit_attributes(self._dump_attrs == "all")
@@ -660,6 +666,11 @@ class Main(Logger, CommandLineBase):
         finally:
             self.launcher.device_thread_pool_detach()
 
+    def _print_startup_profile(self):
+        profiler = ImportProfiler.stop()
+        if profiler is not None:
+            self.info("Startup import times:\n%s", profiler.format())
+
     def _dump_unit_attributes(self, arrays=True):
         import veles.external.prettytable as prettytable
         from veles.workflow import Workflow
@@ -848,6 +859,8 @@ class Main(Logger, CommandLineBase):
             self._print_config(root)
 
         self._run_core(wm)
+        # --dry-run=load finishes before the launcher is initialized
+        self._print_startup_profile()
 
         if not self.interactive:
             self.info("End of job")
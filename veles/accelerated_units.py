@@ -47,18 +47,17 @@ except (ImportError, AttributeError):
 import numpy
 import os
 import re
-from six import BytesIO, add_metaclass, PY3
-import tarfile
+from six import add_metaclass
 from tempfile import NamedTemporaryFile
 import time
 from zope.interface import implementer, Interface
 
 from veles.compat import from_none
 from veles.config import root
+from veles.kernel_cache import KernelCache
 from veles.memory import Array, roundup
 import veles.opencl_types as opencl_types
 from veles.backends import Device, OpenCLDevice, CUDADevice, NumpyDevice
-from veles.pickle2 import pickle, best_protocol
 from veles.timeit2 import timeit
 from veles.units import Unit, IUnit, UnitCommandLineArgumentsRegistry
 from veles.workflow import Workflow
@@ -308,19 +307,24 @@ class AcceleratedUnit(Unit):
         return self._backend_build_program_(
             defines, cache_file_name, dtype, kwargs)
 
-    def _load_binary(self, defines, cache_file_name, dtype, engine, suffix,
-                     cache_is_valid, template_kwargs):
-        cache_file_name = "%s.%s.%d" % (cache_file_name, suffix, (2, 3)[PY3])
-        if not os.path.isabs(cache_file_name):
-            cache_file_name = os.path.join(root.common.dirs.cache,
-                                           cache_file_name)
-        cache_file_name = "%s.cache" % cache_file_name
-        if self.cache and os.path.exists(cache_file_name):
-            return self._load_from_cache(
-                cache_file_name, defines, dtype, engine, suffix,
-                cache_is_valid, template_kwargs)
-        else:
-            return None, defines
+    def _load_binary(self, source, suffix, device):
+        """Looks up the compiled program in the kernel cache.
+
+        Returns:
+            tuple (cache key, binaries); both are None if the cache is
+            disabled, the binaries are None if the program was not found.
+        """
+        if not self.cache:
+            return None, None
+        key = KernelCache.key(
+            source, self._scan_include_dependencies(suffix), (suffix, device))
+        bins = KernelCache().get(key)
+        if bins is not None and not isinstance(bins, bytes) and (
+                not isinstance(bins, list) or len(bins) == 0 or
+                not all(isinstance(b, bytes) for b in bins)):
+            self.warning("Cached binaries have an invalid format")
+            bins = None
+        return key, bins
 
     def ocl_build_program(self, defines, cache_file_name, dtype,
                           template_kwargs):
@@ -329,22 +333,17 @@ class AcceleratedUnit(Unit):
         `program_` will be initialized to the resulting program object.
         """
 
-        def cache_is_valid(cache):
-            dev = self.device.queue_.device
-            return any((dev.name, dev.platform.name, dev.driver_version) == did
-                       for did in cache["devices"])
-
-        binaries, my_defines = self._load_binary(
-            defines, cache_file_name, dtype, OCL, OCLS, cache_is_valid,
-            template_kwargs)
+        include_dirs = self._get_include_dirs(OCL)
+        source, my_defines = self._generate_source(
+            defines, include_dirs, dtype, OCLS, template_kwargs)
+        dev = self.device.queue_.device
+        key, binaries = self._load_binary(
+            source, OCLS, (dev.name, dev.platform.name, dev.driver_version))
         if binaries is not None:
             self.program_ = self.device.queue_.context.create_program(
                 binaries, binary=True)
             self._log_about_cache(cache_file_name, OCL)
             return my_defines
-        include_dirs = self._get_include_dirs(OCL)
-        source, my_defines = self._generate_source(
-            defines, include_dirs, dtype, OCLS, template_kwargs)
         show_logs = self.logger.isEnabledFor(logging.DEBUG)
         if show_logs:
             self.debug("%s: source code\n%s\n%s", cache_file_name, "-" * 80,
@@ -367,12 +366,7 @@ class AcceleratedUnit(Unit):
                 if not s:
                     continue
                 self.debug("Non-empty OpenCL build log encountered: %s", s)
-        self._save_to_cache(
-            cache_file_name, OCLS, self.program_.source,
-            self.program_.binaries, {
-                "devices": [(d.name, d.platform.name, d.driver_version)
-                            for d in self.program_.devices]
-            })
+        self._save_to_cache(key, self.program_.binaries)
         return my_defines
 
     def cuda_build_program(self, defines, cache_file_name, dtype,
@@ -382,19 +376,15 @@ class AcceleratedUnit(Unit):
         `program_` will be initialized to the resulting program object.
         """
 
-        def cache_is_valid(cache):
-            return self.device.context.device.name == cache["device"]
-
-        binaries, my_defines = self._load_binary(
-            defines, cache_file_name, dtype, CUDA, CUDAS, cache_is_valid,
-            template_kwargs)
+        include_dirs = self._get_include_dirs(CUDA)
+        source, my_defines = self._generate_source(
+            defines, include_dirs, dtype, CUDAS, template_kwargs)
+        key, binaries = self._load_binary(
+            source, CUDAS, self.device.context.device.name)
         if binaries is not None:
             self.program_ = self.device.context.create_module(ptx=binaries)
             self._log_about_cache(cache_file_name, CUDA)
             return my_defines
-        include_dirs = self._get_include_dirs(CUDA)
-        source, my_defines = self._generate_source(
-            defines, include_dirs, dtype, CUDAS, template_kwargs)
         show_logs = self.logger.isEnabledFor(logging.DEBUG)
         if show_logs:
             self.debug("%s: source code\n%s\n%s", cache_file_name, "-" * 80,
@@ -413,9 +403,7 @@ class AcceleratedUnit(Unit):
         if show_logs and len(self.program_.stderr):
             self.debug("Non-empty CUDA build log encountered: %s",
                        self.program_.stderr)
-        self._save_to_cache(cache_file_name, CUDAS, source.encode("utf-8"),
-                            self.program_.ptx,
-                            {"device": self.device.context.device.name})
+        self._save_to_cache(key, self.program_.ptx)
         return my_defines
 
     def _log_about_cache(self, cache_name, engine):
@@ -602,75 +590,9 @@ class AcceleratedUnit(Unit):
                 res.append(full)
         return res
 
-    def _load_from_cache(self, cache_file_name, defines, dtype, engine, suffix,
-                         cache_is_valid, template_kwargs):
-        include_dirs = self._get_include_dirs(engine)
-        try:
-            with tarfile.open(cache_file_name, "r:gz") as tar:
-                cached_source = tar.extractfile("source." + suffix).read()
-                src, my_defines = self._generate_source(
-                    defines, include_dirs, dtype, suffix, template_kwargs)
-                real_source = src.encode("utf-8")
-                if cached_source != real_source:
-                    return None, None
-                for dep in set(self._scan_include_dependencies(suffix)):
-                    cached_source = tar.extractfile(
-                        os.path.basename(dep)).read()
-                    with open(dep, "rb") as fr:
-                        real_source = fr.read()
-                    if cached_source != real_source:
-                        return None, None
-                cache = pickle.loads(tar.extractfile(
-                    "binaries.%d.pickle" % best_protocol).read())
-                if not cache_is_valid(cache):
-                    return None, None
-                bins = cache["binaries"]
-                if not isinstance(bins, bytes) and (
-                        not isinstance(bins, list) or len(bins) == 0 or
-                        not all(isinstance(b, bytes) for b in bins)):
-                    self.warning("Cached binaries have an invalid format")
-                    return None, None
-                return bins, my_defines
-        except Exception as e:
-            self.debug("Failed to load %s: %s", cache_file_name, e)
-            return None, None
-
-    def _save_to_cache(self, cache_file_name, suffix, program_source,
-                       program_binaries, device_id_dict):
-        naked_suffix = suffix
-        suffix = "." + suffix
-        cache_file_name = cache_file_name + suffix + (".3" if PY3 else ".2")
-        if not os.path.isabs(cache_file_name):
-            cache_file_name = os.path.join(root.common.dirs.cache,
-                                           cache_file_name)
-        try:
-            with tarfile.open("%s.cache" % cache_file_name, "w:gz") as tar:
-                source_io = BytesIO()
-                source_io.write(program_source)
-                ti = tarfile.TarInfo("source" + suffix)
-                ti.size = source_io.tell()
-                ti.mode = int("666", 8)
-                source_io.seek(0)
-                tar.addfile(ti, fileobj=source_io)
-                for dep in set(self._scan_include_dependencies(naked_suffix)):
-                    ti = tarfile.TarInfo(os.path.basename(dep))
-                    ti.size = os.path.getsize(dep)
-                    ti.mode = int("666", 8)
-                    with open(dep, "rb") as fr:
-                        tar.addfile(ti, fileobj=fr)
-                binaries_io = BytesIO()
-                pickler = pickle.Pickler(binaries_io, protocol=best_protocol)
-                binaries = {"binaries": program_binaries}
-                binaries.update(device_id_dict)
-                pickler.dump(binaries)
-                ti = tarfile.TarInfo("binaries.%d.pickle" % best_protocol)
-                ti.size = binaries_io.tell()
-                ti.mode = int("666", 8)
-                binaries_io.seek(0)
-                tar.addfile(ti, fileobj=binaries_io)
-        except:
-            self.exception("Failed to save the cache file %s:",
-                           cache_file_name)
+    def _save_to_cache(self, key, program_binaries):
+        if key is not None:
+            KernelCache().put(key, program_binaries)
 
     def _with_backend_init(self, fn):
         def wrapped_backend_init(device, **kwargs):
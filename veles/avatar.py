@@ -20,13 +20,31 @@ from veles.mutable import Bool
 
 @implementer(IOpenCLUnit, ICUDAUnit, INumpyUnit, IDistributable)
 class Avatar(AcceleratedUnit, TriviallyDistributable):
+    """Copies the attributes of the real units, so that they can go on
+    while the copies are being processed. Only the attributes which changed
+    since the previous copy are copied.
+
+    Attributes:
+        double_buffered: the names of the Array attributes which are swapped
+                         with the copies instead of copying on numpy backend.
+                         The real units must overwrite them completely before
+                         each run.
+    """
+
     def __init__(self, workflow, **kwargs):
         kwargs["view_group"] = "LOADER"
         super(Avatar, self).__init__(workflow, **kwargs)
         self._reals = {}
         self._vectors = {}
+        self.double_buffered = set(kwargs.get("double_buffered", tuple()))
         self._remembers_gates = False
 
+    def init_unpickled(self):
+        super(Avatar, self).init_unpickled()
+        # Array versions (real, copy) after the last copy
+        self._versions_ = {}
+        self._double_buffers_ = set()
+
     @property
     def reals(self):
         return self._reals
@@ -48,11 +66,12 @@ class Avatar(AcceleratedUnit, TriviallyDistributable):
                         setattr(self, attr, deepcopy(value))
                         continue
                     if isinstance(value, list):
-                        del cloned[:]
-                        cloned.extend(value)
+                        if self._changed(cloned, value):
+                            cloned[:] = value
                     elif isinstance(value, (dict, set)):
-                        cloned.clear()
-                        cloned.update(value)
+                        if self._changed(cloned, value):
+                            cloned.clear()
+                            cloned.update(value)
                     elif isinstance(value, Bool):
                         cloned <<= value
                     elif isinstance(value, numpy.ndarray):
@@ -69,6 +88,18 @@ class Avatar(AcceleratedUnit, TriviallyDistributable):
                     assert isinstance(vec, Array)
                 if not vec and value:
                     vec.reset(value.mem.copy())
+                    self._versions_[value] = value.version, vec.version
+                if attr in self.double_buffered:
+                    self._double_buffers_.add(value)
+
+    @staticmethod
+    def _changed(cloned, value):
+        # Comparison does not allocate anything, unlike copying
+        try:
+            return bool(cloned != value)
+        except ValueError:
+            # Contains numpy arrays
+            return True
 
     def __getstate__(self):
         state = super(Avatar, self).__getstate__()
@@ -124,6 +155,14 @@ class Avatar(AcceleratedUnit, TriviallyDistributable):
 
     def numpy_run(self):
         for real, vec in self.vectors.items():
+            if self._versions_.get(real) == (real.version, vec.version):
+                # Neither the real array nor the copy has changed
+                continue
             real.map_read()
-            vec.map_invalidate()
-            numpy.copyto(vec.mem, real.mem)
+            if (real in self._double_buffers_ and real.shape == vec.shape and
+                    real.dtype == vec.dtype):
+                real.mem, vec.mem = vec.mem, real.mem
+            else:
+                vec.map_invalidate()
+                numpy.copyto(vec.mem, real.mem)
+            self._versions_[real] = real.version, vec.version
@@ -935,6 +935,19 @@ class NumpyDevice(Device):
             max_work_group_size=None, max_work_item_sizes=None,
             local_memsize=virtual_memory().total)
 
+    def init_unpickled(self):
+        super(NumpyDevice, self).init_unpickled()
+        self._blas_ = None
+
+    @property
+    def blas(self):
+        """Returns BLAS instance which calls the CPU BLAS directly.
+        """
+        if self._blas_ is None:
+            from veles.numpy_blas import NumpyBLAS
+            self._blas_ = NumpyBLAS()
+        return self._blas_
+
     @staticmethod
     def available():
         return True
@@ -158,6 +158,10 @@ class CommandLineBase(object):
         parser.add_argument("--debug-pickle", default=False,
                             help="Turn on pickle diagnostics.",
                             action='store_true')
+        parser.add_argument("--profile-startup", default=False,
+                            help="Print how long it took to import each "
+                                 "module once the workflow is initialized.",
+                            action='store_true')
         parser.add_argument("-r", "--random-seed", type=str,
                             default="/dev/urandom:16",
                             help="Set the random generator seed, e.g. "
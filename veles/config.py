@@ -207,13 +207,27 @@ root.common.update({
         "run_after_stop": False,
     },
     "mongodb_logging_address": "127.0.0.1:27017",
+    "mongodb_logging": {
+        # Log records and events are inserted in batches of this size or
+        # every flush_interval seconds, whichever comes first
+        "batch_size": 256,
+        "flush_interval": 1.0,
+        # Maximal number of queued documents, the rest are dropped
+        "queue_size": 65536,
+    },
     "graphics": {
         "multicast_address": "239.192.1.1",
         "blacklisted_ifaces": set(),
         "matplotlib": {
             "backend": "Qt4Agg",
             "webagg_port": 8081,
-        }
+        },
+        # Plotters send only the changes since the previous update, and the
+        # whole state every this number of updates (0 means always)
+        "full_update_interval": 16,
+        # The maximal size of plots in pixels along each side; plotters
+        # reduce the data to it before sending (0 sends the raw data)
+        "pixel_budget": 1024,
     },
     "web": {
         "host": "0.0.0.0",
@@ -227,7 +241,20 @@ root.common.update({
     },
     "api": {
         "port": 8180,
-        "path": "/api"
+        "path": "/api",
+        # Number of the last requests to calculate the latency and the
+        # throughput over
+        "metrics_window": 1024,
+        # Number of threads which preprocess the requests to
+        # RestfulImageLoader in parallel (0 preprocesses them in the reactor)
+        "preprocessing_threads": 4,
+        # Cache of the results of the identical inputs (0 entries disables
+        # it); the entries expire after ttl seconds
+        "cache": {
+            "max_entries": 0,
+            "max_bytes": 64 << 20,
+            "ttl": 60
+        }
     },
     "forge": {
         "service_name": "service",
@@ -268,6 +295,16 @@ root.common.update({
         "device_dirs": ["/usr/share/veles/devices",
                         os.path.join(__home__, "devices"),
                         os.environ.get("VELES_DEVICE_DIRS", "./")],
+        # Compiled OpenCL/CUDA programs in dirs.cache/kernels; the least
+        # recently used are removed above max_bytes (0 means unbounded)
+        "kernel_cache": {
+            "max_bytes": 256 << 20
+        },
+        "numpy": {
+            # Number of the CPU BLAS threads (0 leaves the BLAS default),
+            # requires threadpoolctl
+            "blas_threads": 0
+        },
         "ocl": {
             # Use clBLAS if it is available
             "clBLAS": False
@@ -281,11 +318,54 @@ root.common.update({
         "disable": {
             "plotting": True
         },
+        # Number of chromosomes evaluated simultaneously in standalone mode
+        # (0 means the number of CPUs)
+        "workers": 1,
+        # Pin each local worker to its own CPU set within a NUMA node
+        "pin_workers": True,
+        # Evaluate in persistent processes which have VELES and the model
+        # already imported (see veles.evaluator_server)
+        "warm_workers": False,
+        # Reuse the fitness of already evaluated chromosomes, including those
+        # evaluated in previous runs (stored in dirs.cache)
+        "fitness_cache": True,
+        # Successive halving of the evaluation budget in standalone mode
+        "halving": {
+            # The initial fraction of the full budget (1 disables halving)
+            "min_budget": 1.0,
+            # Only the best 1/eta chromosomes are promoted to the next,
+            # eta times larger, budget
+            "eta": 3,
+            # The config path to the epochs limit, e.g.
+            # "root.mnistr.decision.max_epochs", which is reduced instead of
+            # --train-ratio
+            "epochs": None,
+        },
+    },
+    "results": {
+        # Save big numpy arrays from the results to .npy files in this
+        # directory and reference them from the JSON (None embeds them)
+        "arrays_dir": None,
+        # Only arrays with at least this number of elements are saved
+        "arrays_min_size": 1024,
     },
     "ensemble": {
         "disable": {
             "plotting": True
         },
+        # Pass the models' outputs through .npy files next to --result-file
+        "binary_outputs": True,
+        # Number of models trained or tested simultaneously in standalone
+        # mode (0 means as many as cores_per_model and memory_per_model allow)
+        "workers": 1,
+        # CPU cores and memory in MiB (0 means any) each model requires
+        "cores_per_model": 1,
+        "memory_per_model": 0,
+        "pin_workers": True,
+        "warm_workers": False,
+        # Number of times a result slot is retried in standalone mode before
+        # the ensemble fails
+        "max_retries": 3,
     },
     "evaluation_transform": lambda v, t: v
 })
@@ -36,24 +36,33 @@ under the License.
 
 
 from collections import defaultdict
+from functools import partial
 import json
+import multiprocessing
 import os
-import subprocess
+from psutil import virtual_memory
 import sys
 from tempfile import NamedTemporaryFile
 from six import string_types, add_metaclass
 from zope.interface import implementer
 
+from veles.config import root
 from veles.distributable import IDistributable
+from veles.evaluator_server import EvaluatorPool
 from veles.launcher import filter_argv
 from veles.mutable import Bool
 from veles.paths import __root__
 from veles.plumbing import Repeater
+from veles.process_pool import ProcessPool
 from veles.result_provider import IResultProvider
 from veles.units import Unit, UnitCommandLineArgumentsRegistry
 from veles.workflow import Workflow
 
 
+class EnsembleError(Exception):
+    pass
+
+
 @implementer(IDistributable, IResultProvider)
 @add_metaclass(UnitCommandLineArgumentsRegistry)
 class EnsembleModelManagerBase(Unit):
@@ -64,11 +73,26 @@ class EnsembleModelManagerBase(Unit):
         self._model_index = 0
         self._results = []
         self._complete = Bool(lambda: None not in self.results)
+        self.workers = kwargs.get("workers", root.common.ensemble.workers)
+        self.cores_per_model = kwargs.get(
+            "cores_per_model", root.common.ensemble.cores_per_model)
+        self.memory_per_model = kwargs.get(
+            "memory_per_model", root.common.ensemble.memory_per_model)
+        self.pin_workers = kwargs.get(
+            "pin_workers", root.common.ensemble.pin_workers)
+        self.warm_workers = kwargs.get(
+            "warm_workers", root.common.ensemble.warm_workers)
+        self.binary_outputs = kwargs.get(
+            "binary_outputs", root.common.ensemble.binary_outputs)
+        self.max_retries = kwargs.get(
+            "max_retries", root.common.ensemble.max_retries)
 
     def init_unpickled(self):
         super(EnsembleModelManagerBase, self).init_unpickled()
         self._pending_ = defaultdict(set)
         self._filtered_argv_ = []
+        self._evaluators_ = None
+        self._failures_ = defaultdict(int)
 
     @property
     def complete(self):
@@ -91,6 +115,51 @@ class EnsembleModelManagerBase(Unit):
     def model(self):
         return self._model_
 
+    @property
+    def outputs_dir(self):
+        """The directory where the models save their outputs as .npy files
+        (None means the outputs are embedded into the results). Slaves always
+        embed the outputs, since the files would stay on their machines.
+        """
+        result_file = self.workflow.result_file
+        if not self.binary_outputs or not self.is_standalone or \
+                not isinstance(result_file, string_types):
+            return None
+        return os.path.abspath(os.path.splitext(result_file)[0] + "_outputs")
+
+    @property
+    def concurrency(self):
+        """The number of models which can be processed simultaneously within
+        the configured workers, cores and memory budget.
+        """
+        if not self.is_standalone:
+            return 1
+        if self.cores_per_model < 1:
+            raise ValueError(
+                "cores_per_model must be > 0 (got %d)" % self.cores_per_model)
+        limit = max(1, multiprocessing.cpu_count() // self.cores_per_model)
+        if self.memory_per_model > 0:
+            limit = min(limit, max(1, virtual_memory().available // (
+                self.memory_per_model << 20)))
+        if self.workers > 0:
+            limit = min(limit, self.workers)
+        return int(limit)
+
+    @property
+    def evaluators(self):
+        """The pool of local processes which train and test the models.
+        """
+        if self._evaluators_ is None:
+            size = self.concurrency
+            pin = self.pin_workers and size > 1
+            if self.warm_workers:
+                self._evaluators_ = EvaluatorPool(
+                    size, pin, (self.launcher.workflow_file,),
+                    self._get_exec_args([])[1])
+            else:
+                self._evaluators_ = ProcessPool(size, pin)
+        return self._evaluators_
+
     def initialize(self, **kwargs):
         self._filtered_argv_[:] = filter_argv(
             self.argv, "-l", "--listen-address", "-m", "--master-address",
@@ -126,21 +195,115 @@ class EnsembleModelManagerBase(Unit):
             self._pending_[slave].clear()
             self.has_data_for_slave = self.size_left > 0
 
+    def run(self):
+        """Processes all the models which have no results yet, up to
+        "concurrency" models simultaneously. The model indices are assigned
+        in the order of the result slots, regardless of the completion order.
+        The slots which failed are retried during the next run, up to
+        max_retries times.
+        """
+        if self.is_slave:
+            indices = [0]
+        else:
+            indices = [i for i, r in enumerate(self.results) if r is None]
+        pool = self.evaluators
+        if pool.size > 1:
+            self.info("Processing %d models using %d local workers...",
+                      len(indices), pool.size)
+        files = []
+        try:
+            for index in indices:
+                fin = NamedTemporaryFile(
+                    prefix="veles-ensemble-", suffix=".json", mode="r")
+                files.append(fin)
+                self._submit(index, self._assign_model_index(index), fin)
+            pool.join()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            for fin in files:
+                fin.close()
+        if not self.is_slave:
+            self._check_failures(indices)
+
+    def stop(self):
+        if self._evaluators_ is not None:
+            self._evaluators_.shutdown()
+
     def get_metric_names(self):
         return {"models"}
 
     def get_metric_values(self):
         return {"models": self.results}
 
-    def _exec(self, argv, fin, action):
+    def _get_exec_args(self, argv):
         __main__ = os.path.join(__root__, "veles", "__main__.py")
         argv = [sys.executable, __main__] + argv
         self.debug("exec: %s", " ".join(argv))
         env = {"PYTHONPATH": os.getenv("PYTHONPATH", __root__)}
         env.update(os.environ)
-        if subprocess.call(argv, env=env):
-            self.warning("Failed to %s model #%d", action, self._model_index)
+        return argv, env
+
+    def _submit(self, index, model_index, fin):
+        """Schedules the processing of the model which result goes to
+        results[index].
+
+        Parameters:
+            index: the index of the result slot.
+            model_index: the index of the model.
+            fin: the temporary file to receive the results.
+        """
+        raise NotImplementedError()
+
+    def _check_failures(self, indices):
+        failed = []
+        for index in indices:
+            if self.results[index] is not None:
+                continue
+            self._failures_[index] += 1
+            if self._failures_[index] > self.max_retries:
+                failed.append(index)
+        if len(failed) > 0:
+            raise EnsembleError(
+                "Failed to process models %s %d times in a row" % (
+                    ", ".join(str(i + 1) for i in failed),
+                    self.max_retries + 1))
+
+    def _assign_model_index(self, index):
+        model_index = self._model_index
+        self._model_index += 1
+        return model_index
+
+    def _submit_step(self, argv, fin, action, model_index, callback):
+        """Schedules the execution of VELES with the specified arguments.
+        callback is invoked with the parsed results if it succeeds.
+        """
+        if self.outputs_dir is not None:
+            argv = argv + [
+                "root.common.results.arrays_dir=%r" % self.outputs_dir]
+        argv, env = self._get_exec_args(argv)
+        self.evaluators.submit(argv, partial(
+            self._on_step_finished, fin, action, model_index, callback), env)
+
+    def _on_step_finished(self, fin, action, model_index, callback, code):
+        if code != 0:
+            self.warning("Failed to %s model #%d", action, model_index)
             return
+        result = self._parse_result(fin)
+        if result is None:
+            return
+        outputs_dir = self.outputs_dir
+        if outputs_dir is not None:
+            # Make the references to .npy files relative to the results file
+            base_dir = os.path.dirname(outputs_dir)
+            for value in result.values():
+                if isinstance(value, dict) and "npy" in value:
+                    value["npy"] = os.path.relpath(value["npy"], base_dir)
+        callback(result)
+
+    def _parse_result(self, fin):
+        fin.seek(0, os.SEEK_SET)
         try:
             return json.load(fin)
         except ValueError as e:
@@ -35,8 +35,7 @@ under the License.
 """
 
 
-import os
-from tempfile import NamedTemporaryFile
+from functools import partial
 from zope.interface import implementer
 
 from veles.config import root
@@ -93,45 +92,40 @@ class EnsembleModelManager(EnsembleModelManagerBase):
                 "Ensemble training is incompatibe with --test mode. Use "
                 "--ensemble-test instead.")
 
-    def run(self):
-        index = sum(1 for r in self.results if r is not None)
-        with NamedTemporaryFile(
-                prefix="veles-ensemble-", suffix=".json", mode="r") as fin:
-            argv = ["--result-file", fin.name, "--stealth", "--train-ratio",
-                    str(self._train_ratio), "--log-id",
-                    self.launcher.log_id] + self._filtered_argv_ + \
-                   ["root.common.ensemble.model_index=%d" % self._model_index,
-                    "root.common.ensemble.size=%d" % self.size,
-                    "root.common.disable.publishing=True"]
-            if self.plotters_are_disabled:
-                argv.append("root.common.disable.plotting=True")
-            try:
-                self.info("Training model %d / %d (#%d)...\n%s",
-                          index + 1, self.size, self._model_index, "-" * 80)
-                train_result = self._exec(argv, fin, "train")
-                if train_result is None:
-                    return
-                try:
-                    id_ = train_result["id"]
-                    log_id = train_result["log_id"]
-                    snapshot = train_result["Snapshot"]
-                except KeyError:
-                    self.error("Model #%d did not return a valid result",
-                               self._model_index)
-                    return
-                self.info("Evaluating model %d / %d (#%d)...\n%s",
-                          index + 1, self.size, self._model_index, "-" * 80)
-                argv = ["--test", "--snapshot", self._to_snapshot_arg(
-                    id_, log_id, snapshot)] + argv
-                fin.seek(0, os.SEEK_SET)
-                test_result = self._exec(argv, fin, "test")
-                if test_result is None:
-                    return
-                self.results[index] = train_result
-                self.results[index].update(test_result)
-                self._fitnesses.append(train_result["EvaluationFitness"])
-            finally:
-                self._model_index += 1
+    def _submit(self, index, model_index, fin):
+        argv = ["--result-file", fin.name, "--stealth", "--train-ratio",
+                str(self._train_ratio), "--log-id",
+                self.launcher.log_id] + self._filtered_argv_ + \
+               ["root.common.ensemble.model_index=%d" % model_index,
+                "root.common.ensemble.size=%d" % self.size,
+                "root.common.disable.publishing=True"]
+        if self.plotters_are_disabled:
+            argv.append("root.common.disable.plotting=True")
+        self.info("Training model %d / %d (#%d)...\n%s",
+                  index + 1, self.size, model_index, "-" * 80)
+        self._submit_step(argv, fin, "train", model_index, partial(
+            self._on_trained, index, model_index, argv, fin))
+
+    def _on_trained(self, index, model_index, argv, fin, train_result):
+        try:
+            id_ = train_result["id"]
+            log_id = train_result["log_id"]
+            snapshot = train_result["Snapshot"]
+        except KeyError:
+            self.error("Model #%d did not return a valid result",
+                       model_index)
+            return
+        self.info("Evaluating model %d / %d (#%d)...\n%s",
+                  index + 1, self.size, model_index, "-" * 80)
+        argv = ["--test", "--snapshot", self._to_snapshot_arg(
+            id_, log_id, snapshot)] + argv
+        self._submit_step(argv, fin, "test", model_index, partial(
+            self._on_tested, index, train_result))
+
+    def _on_tested(self, index, train_result, test_result):
+        self.results[index] = train_result
+        self.results[index].update(test_result)
+        self._fitnesses.append(train_result["EvaluationFitness"])
 
 
 class EnsembleModelWorkflow(EnsembleWorkflowBase):
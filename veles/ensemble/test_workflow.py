@@ -35,9 +35,8 @@ under the License.
 """
 
 
+from functools import partial
 import json
-import os
-from tempfile import NamedTemporaryFile
 from six import string_types
 from zope.interface import implementer
 from veles.ensemble.base_workflow import EnsembleWorkflowBase, \
@@ -75,28 +74,28 @@ class EnsembleTestManager(EnsembleModelManagerBase):
         if self.testing:
             self.warning("--test is ignored")
 
-    def run(self):
-        index = sum(1 for r in self.results if r is not None)
-        model = self._input_data["models"][self._model_index]
+    def _assign_model_index(self, index):
+        if self.is_slave:
+            return super(EnsembleTestManager, self)._assign_model_index(index)
+        # Each model is tested exactly once, so its index is the slot's one
+        return index
+
+    def _submit(self, index, model_index, fin):
+        model = self._input_data["models"][model_index]
         id_ = model["id"]
         log_id = model["log_id"]
         snapshot = model["Snapshot"]
-        with NamedTemporaryFile(
-                prefix="veles-ensemble-", suffix=".json", mode="r") as fin:
-            argv = ["--test", "--result-file", fin.name, "--stealth",
-                    "--log-id", self.launcher.log_id, "--snapshot",
-                    self._to_snapshot_arg(id_, log_id, snapshot)] + \
-                self._filtered_argv_ + ["root.common.disable.publishing=True"]
-            try:
-                self.info("Evaluating model %d / %d (#%d)...\n%s",
-                          index + 1, self.size, self._model_index, "-" * 80)
-                fin.seek(0, os.SEEK_SET)
-                result = self._exec(argv, fin, "test")
-                if result is None:
-                    return
-                self.results[index] = result
-            finally:
-                self._model_index += 1
+        argv = ["--test", "--result-file", fin.name, "--stealth",
+                "--log-id", self.launcher.log_id, "--snapshot",
+                self._to_snapshot_arg(id_, log_id, snapshot)] + \
+            self._filtered_argv_ + ["root.common.disable.publishing=True"]
+        self.info("Evaluating model %d / %d (#%d)...\n%s",
+                  index + 1, self.size, model_index, "-" * 80)
+        self._submit_step(argv, fin, "test", model_index,
+                          partial(self._on_tested, index))
+
+    def _on_tested(self, index, result):
+        self.results[index] = result
 
 
 class EnsembleTestWorkflow(EnsembleWorkflowBase):
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 20, 2015
+
+Warm-started evaluator processes. Each server imports VELES, its
+dependencies and the model once and then forks a fresh child for every
+command line it receives, so that the interpreter startup is paid only once.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import argparse
+import atexit
+from multiprocessing.connection import Connection
+import os
+import runpy
+import signal
+import socket
+import subprocess
+import sys
+from traceback import print_exc
+
+import six
+
+from veles.import_file import try_to_import_file
+from veles.logger import Logger
+from veles.process_pool import ProcessPool
+
+
+class EvaluatorServer(Logger):
+    """Executes Python command lines received through the connection in
+    forked children of the warmed up process.
+    """
+
+    def __init__(self, connection, preload=tuple()):
+        super(EvaluatorServer, self).__init__()
+        self.connection = connection
+        self.preload = preload
+
+    def warm_up(self):
+        try:
+            import veles.__main__  # pylint: disable=W0612
+        except Exception as e:
+            self.warning("Failed to import veles.__main__: %s", e)
+        for file_name in self.preload:
+            module = try_to_import_file(file_name)
+            if isinstance(module, tuple):
+                self.warning("Failed to preload %s: %s", file_name, module)
+
+    def serve(self):
+        self.warm_up()
+        while True:
+            try:
+                job = self.connection.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            self.connection.send(self.execute(*job))
+
+    def execute(self, argv, env=None):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            self.connection.close()
+            if env is not None:
+                os.environ.clear()
+                os.environ.update(env)
+            os._exit(self._run(argv))
+        _, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            return -os.WTERMSIG(status)
+        return os.WEXITSTATUS(status)
+
+    @staticmethod
+    def _run(argv):
+        """Runs argv[1:] as if it was executed by the interpreter argv[0].
+        Both "script.py args..." and "-c code args..." are supported.
+        """
+        code = 0
+        try:
+            if argv[1] == "-c":
+                sys.argv = ["-c"] + list(argv[3:])
+                six.exec_(compile(argv[2], "<string>", "exec"),
+                          {"__name__": "__main__"})
+            else:
+                sys.argv = list(argv[1:])
+                runpy.run_path(argv[1], run_name="__main__")
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                code = 1
+        except:
+            print_exc()
+            code = 1
+        try:
+            atexit._run_exitfuncs()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        return code
+
+
+class EvaluationJob(object):
+    """Mimics subprocess.Popen for a command line executed by the evaluator
+    server.
+    """
+
+    def __init__(self, server, connection):
+        self.server = server
+        self.connection = connection
+        self.returncode = None
+
+    @property
+    def pid(self):
+        return self.server.pid
+
+    def poll(self):
+        if self.returncode is None and self.connection.poll():
+            try:
+                self.returncode = self.connection.recv()
+            except (EOFError, IOError, OSError):
+                self.returncode = -signal.SIGKILL
+        return self.returncode
+
+    def kill(self):
+        try:
+            os.killpg(self.server.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def wait(self):
+        self.server.wait()
+        return self.returncode
+
+
+class EvaluatorPool(ProcessPool):
+    """ProcessPool which runs the command lines in persistent evaluator
+    servers instead of spawning a new interpreter each time. The servers are
+    started lazily and restarted if they die.
+
+    Attributes:
+        preload: the list of Python files to import in each server before
+                 accepting command lines (usually, the model).
+        env: the environment of the servers. Jobs submitted with their own
+             environment run with it instead.
+    """
+
+    def __init__(self, size=0, pin=True, preload=tuple(), env=None):
+        if six.PY2:
+            # The socket handoff relies on Popen(pass_fds) and
+            # socket.detach() which do not exist in Python 2
+            raise NotImplementedError(
+                "Warm workers require Python 3, please disable warm_workers")
+        super(EvaluatorPool, self).__init__(size, pin)
+        self.preload = preload
+        self.env = env
+        self._servers = [None] * self.size
+
+    def shutdown(self):
+        super(EvaluatorPool, self).shutdown()
+        for slot, server in enumerate(self._servers):
+            if server is None:
+                continue
+            process, connection = server
+            try:
+                connection.send(None)
+            except (IOError, OSError):
+                pass
+            connection.close()
+            process.wait()
+            self._servers[slot] = None
+
+    def _start(self, slot, argv, env):
+        process, connection = self._get_server(slot)
+        if env is not None:
+            env = dict(env)
+            cpus = self.affinity[slot]
+            if cpus is not None:
+                env.setdefault("OMP_NUM_THREADS", str(len(cpus)))
+        connection.send((list(argv), env))
+        self.debug("Sent to evaluator %d in slot %d: %s", process.pid, slot,
+                   " ".join(argv))
+        return EvaluationJob(process, connection)
+
+    def _get_server(self, slot):
+        server = self._servers[slot]
+        if server is not None:
+            if server[0].poll() is None:
+                return server
+            self.warning("Evaluator %d in slot %d exited with code %d",
+                         server[0].pid, slot, server[0].returncode)
+            server[1].close()
+        ours, theirs = socket.socketpair()
+        cpus = self.affinity[slot]
+        env = dict(os.environ if self.env is None else self.env)
+        if cpus is not None:
+            env.setdefault("OMP_NUM_THREADS", str(len(cpus)))
+        pin = self._pin(cpus)
+
+        def preexec():
+            os.setsid()
+            if pin is not None:
+                pin()
+
+        process = subprocess.Popen(
+            [sys.executable, __file__, str(theirs.fileno())] +
+            list(self.preload), env=env, preexec_fn=preexec,
+            pass_fds=(theirs.fileno(),))
+        theirs.close()
+        self.info("Started evaluator %d in slot %d (CPUs %s)", process.pid,
+                  slot, cpus)
+        server = self._servers[slot] = process, Connection(ours.detach())
+        return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fd", type=int,
+                        help="File descriptor of the connected socket.")
+    parser.add_argument("preload", nargs="*",
+                        help="Python files to import before serving.")
+    args = parser.parse_args()
+    EvaluatorServer(Connection(args.fd), args.preload).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 21, 2015
+
+Persistent cache of evaluated chromosomes.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import json
+import os
+
+from veles.logger import Logger
+
+
+def quantize_genome(numeric, defaults, accuracy):
+    """Converts the numeric genes to the tuple of integers which is equal for
+    the chromosomes producing the same configuration.
+
+    Parameters:
+        numeric: the list of genes.
+        defaults: the list of the corresponding default values, they define
+                  the type the genes are converted to (see Tuneable.set()).
+        accuracy: the floating point approximation accuracy.
+    """
+    key = []
+    for value, default in zip(numeric, defaults):
+        value = type(default)(value)
+        if isinstance(value, float):
+            value = int(round(value / accuracy))
+        key.append(value)
+    return tuple(key)
+
+
+class FitnessCache(Logger):
+    """Maps genomes to the evaluation results. The entries are appended to the
+    JSON lines file, so that the cache survives the optimizer restarts.
+
+    Attributes:
+        file_name: the path to the backing file (None means in-memory only).
+        hits: the number of successful lookups since the last reset_stats().
+        misses: the number of failed lookups since the last reset_stats().
+    """
+
+    def __init__(self, file_name=None):
+        super(FitnessCache, self).__init__()
+        self.file_name = file_name
+        self._entries = {}
+        self.reset_stats()
+        if file_name is not None and os.path.exists(file_name):
+            self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, genome):
+        return tuple(genome) in self._entries
+
+    def get(self, genome, count=True):
+        """Looks up the results of the genome evaluation.
+
+        Parameters:
+            genome: the quantized genome.
+            count: whether to update hits and misses.
+
+        Returns:
+            tuple (fitness, snapshot) or None if the genome was not evaluated.
+        """
+        entry = self._entries.get(tuple(genome))
+        if count:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, genome, fitness, snapshot):
+        genome = tuple(genome)
+        self._entries[genome] = fitness, snapshot
+        if self.file_name is None:
+            return
+        try:
+            with open(self.file_name, "a") as fout:
+                fout.write(json.dumps({"genome": genome, "fitness": fitness,
+                                       "snapshot": snapshot}) + "\n")
+        except (IOError, OSError, TypeError, ValueError) as e:
+            self.warning("Failed to write the cache entry to %s: %s",
+                         self.file_name, e)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        with open(self.file_name, "r") as fin:
+            for line in fin:
+                try:
+                    entry = json.loads(line)
+                    self._entries[tuple(entry["genome"])] = \
+                        entry["fitness"], entry["snapshot"]
+                except (ValueError, KeyError, TypeError):
+                    # Most likely, the optimizer was killed during writing
+                    continue
+        self.info("Loaded %d evaluated chromosomes from %s", len(self),
+                  self.file_name)
@@ -190,6 +190,9 @@ class ConfigChromosome(Chromosome):
         self.unit = unit
         self.snapshot = None
         self.config = Config("")
+        # The fraction of the full evaluation budget the fitness was
+        # obtained with
+        self.fidelity = None
 
     def init_unpickled(self):
         super(ConfigChromosome, self).init_unpickled()
@@ -215,6 +218,7 @@ class ConfigChromosome(Chromosome):
         unit = self.unit
         self.unit = None
         clone = super(ConfigChromosome, self).copy()
+        clone.fidelity = None
         clone.unit = unit
         self.unit = unit
         return clone
@@ -58,13 +58,14 @@ from veles.verified import Verified
 def schwefel(values):
     """Schwefel's (Sine Root) Function.
 
-    May be used for visualization of the population fitness.
+    May be used for visualization of the population fitness. If values is
+    a matrix, the function is calculated for each row.
     """
-    if not len(values):
+    if not numpy.shape(values)[-1]:
         return 0
     return 1.0 / (
-        418.9829 * len(values) - numpy.sum(numpy.multiply(
-            values, numpy.sin(numpy.sqrt(numpy.fabs(values))))))
+        418.9829 * numpy.shape(values)[-1] - numpy.sum(numpy.multiply(
+            values, numpy.sin(numpy.sqrt(numpy.fabs(values)))), axis=-1))
 
 
 def gray(code_length):
@@ -455,8 +456,7 @@ class Population(Pickleable):
         self.improved = Bool(True)
         self.on_generation_changed_callback = lambda: None
 
-        for _ in range(self.size):
-            self.add(self.new(size=self.optimization.size))
+        self.populate()
         if self.optimization.code == "gray":
             self.compute_gray_codes()
 
@@ -494,6 +494,12 @@ class Population(Pickleable):
         """
         return len(self.chromosomes)
 
+    def populate(self):
+        """Creates the initial random chromosomes.
+        """
+        for _ in range(self.size):
+            self.add(self.new(size=self.optimization.size))
+
     def new(self, binary=None, numeric=None, size=None):
         population = self
         kwargs = {k: v for k, v in locals().items() if k != "self"}
@@ -828,3 +834,438 @@ class Population(Pickleable):
         self.prev.worst_fit = self.worst_fit
         self.prev.median_fit = self.median_fit
         self.improved <<= True
+
+
+class ArrayChromosome(Chromosome):
+    """Thin view of the row in ArrayPopulation's genome matrix. The genes and
+    the fitness are stored in the population, so the chromosome holds only
+    the row index.
+
+    Abstract methods:
+        evaluate
+
+    Attributes:
+        population: the owning ArrayPopulation.
+        row: the index of the row in population.genomes.
+    """
+    def __init__(self, population, row):
+        super(Chromosome, self).__init__()
+        self.verify_interface(IChromosome)
+        self.population = population
+        self.row = row
+
+    @property
+    def rand(self):
+        return self.population.rand
+
+    @property
+    def optimization(self):
+        return self.population.optimization
+
+    @property
+    def size(self):
+        return self.optimization.size
+
+    @property
+    def min_values(self):
+        return self.optimization.min_values
+
+    @property
+    def max_values(self):
+        return self.optimization.max_values
+
+    @property
+    def binary(self):
+        return ""
+
+    @property
+    def numeric(self):
+        """The row of the genome matrix (integer genes have integral values).
+        """
+        return self.population.genomes[self.row]
+
+    @numeric.setter
+    def numeric(self, value):
+        self.population.genomes[self.row] = value
+
+    @property
+    def fitness(self):
+        value = self.population.fitnesses[self.row]
+        return None if numpy.isnan(value) else float(value)
+
+    @fitness.setter
+    def fitness(self, value):
+        self.population.fitnesses[self.row] = \
+            numpy.nan if value is None else value
+
+    def copy(self):
+        return self.population.new(numeric=self.numeric)
+
+    def numeric_correct(self):
+        self.numeric = self.population.correct(
+            self.numeric[numpy.newaxis])[0]
+
+    def mutate(self, mutnme, n_points, probability):
+        self.population.mutate_rows(
+            mutnme, numpy.array([self.row]), n_points, probability)
+
+
+class ArrayPopulation(Population):
+    """Population which stores the genes in a 2-D numpy matrix (one row per
+    chromosome) and the fitness values in a vector, so that the selection,
+    crossing and mutation operate on the whole population at once. Only the
+    "float" coding is supported.
+
+    chromosome_factory is called as chromosome_factory(population, row) and
+    must return an ArrayChromosome. The selection methods return the arrays
+    of row indices and the crossing methods take them as parents.
+    """
+
+    def __init__(self, chromosome_factory, optimization_size,
+                 min_values, max_values, population_size, accuracy=0.00001,
+                 rand=prng.get(), max_generations=None, crossing_attempts=10):
+        self._genomes = numpy.zeros((0, optimization_size))
+        self._fitnesses = numpy.zeros(0)
+        self._rows = 0
+        super(ArrayPopulation, self).__init__(
+            chromosome_factory, optimization_size, min_values, max_values,
+            population_size, accuracy, rand, max_generations,
+            crossing_attempts)
+
+    def init_unpickled(self):
+        super(ArrayPopulation, self).init_unpickled()
+        self.mutators_ = {
+            "gaussian": self._mutate_gaussian,
+            "uniform": self._mutate_uniform,
+            "altering": self._mutate_altering}
+
+    @property
+    def genomes(self):
+        """The genome matrix, including the rows of the chromosomes which
+        were not added yet.
+        """
+        return self._genomes[:self._rows]
+
+    @property
+    def fitnesses(self):
+        """The fitness vector, NaN means not evaluated.
+        """
+        return self._fitnesses[:self._rows]
+
+    @property
+    def pending_size(self):
+        return int(numpy.count_nonzero(numpy.isnan(
+            self._fitnesses[self._registered_rows()])))
+
+    @property
+    def integer_genes(self):
+        """Boolean mask of the genes which take only integer values.
+        """
+        return numpy.array([
+            not isinstance(lo, float) and not isinstance(hi, float)
+            for lo, hi in zip(self.optimization.min_values,
+                              self.optimization.max_values)])
+
+    def populate(self):
+        self._append(self.random_genomes(self.size))
+
+    def new(self, binary=None, numeric=None, size=None):
+        if numeric is None:
+            numeric = self.random_genomes(1)
+        row = self._allocate(self.correct(numpy.asarray(
+            numeric, dtype=numpy.float64).reshape(1, self.optimization.size)))
+        return self.chromosome_factory(self, row)  # pylint: disable=E1102
+
+    def add(self, chromo):
+        assert isinstance(chromo, ArrayChromosome)
+        assert chromo.population is self
+        self.chromosomes.append(chromo)
+
+    def random_genomes(self, count):
+        """Generates "count" random genomes, the float genes are multiples of
+        the accuracy.
+        """
+        mins = numpy.array(self.optimization.min_values, dtype=numpy.float64)
+        maxs = numpy.array(self.optimization.max_values, dtype=numpy.float64)
+        step = numpy.where(self.integer_genes, 1.0,
+                           self.optimization.accuracy)
+        low = numpy.trunc(mins / step)
+        high = numpy.trunc(maxs / step)
+        ticks = numpy.floor(self.rand.rand(count, self.optimization.size) *
+                            (high - low + 1))
+        return (low + ticks) * step
+
+    def correct(self, genomes):
+        """Wraps the genes which are out of range into it and truncates the
+        integer genes, like Chromosome.numeric_correct() does.
+        """
+        mins = numpy.array(self.optimization.min_values, dtype=numpy.float64)
+        maxs = numpy.array(self.optimization.max_values, dtype=numpy.float64)
+        diff = maxs - mins
+        safe_diff = numpy.where(diff > 0, diff, 1)
+        genomes = numpy.where(
+            genomes < mins,
+            genomes + numpy.ceil((mins - genomes) / safe_diff) * diff,
+            genomes)
+        genomes = numpy.where(
+            genomes > maxs,
+            genomes - numpy.ceil((genomes - maxs) / safe_diff) * diff,
+            genomes)
+        genomes = numpy.where(self.integer_genes, numpy.trunc(genomes),
+                              genomes)
+        return numpy.clip(genomes, mins, maxs)
+
+    def validate(self, genomes):
+        """Returns the boolean mask of valid genomes. Override to reject
+        some of the crossing results.
+        """
+        return numpy.ones(len(genomes), dtype=bool)
+
+    def evaluate_all(self, function):
+        """Evaluates all pending chromosomes at once and breeds the next
+        generation.
+
+        Parameters:
+            function: calculates the fitness vector from the genome matrix,
+                      e.g., schwefel().
+        """
+        rows = self._registered_rows()
+        rows = rows[numpy.isnan(self._fitnesses[rows])]
+        self._fitnesses[rows] = function(self._genomes[rows])
+        self.update()
+
+    def sort(self):
+        """Sorts the population by fitness, truncates it up to maximum
+        population size and compacts the matrices so that the row of each
+        chromosome is equal to its index.
+        """
+        rows = self._registered_rows()
+        order = numpy.argsort(-self._fitnesses[rows], kind="mergesort")
+        order = order[:self.size]
+        rows = rows[order]
+        self._genomes[:len(rows)] = self._genomes[rows]
+        self._fitnesses[:len(rows)] = self._fitnesses[rows]
+        self._rows = len(rows)
+        self.chromosomes = [self.chromosomes[i] for i in order]
+        for row, chromo in enumerate(self.chromosomes):
+            chromo.row = row
+
+    def update(self):
+        if self.pending_size > 0:
+            return
+
+        self.info("Making the new generation #%d...", self.generation + 1)
+        self.sort()
+        fitnesses = self.fitnesses
+        self.fitness = float(numpy.sum(fitnesses))
+        self.average_fit = self.fitness / self.size
+        self.best_fit = float(fitnesses[0])
+        self.worst_fit = float(fitnesses[-1])
+        self.median_fit = float(fitnesses[self.size // 2])
+
+        this_population_size = len(self)
+
+        self.info("Breeding...")
+        parents = self.select()
+        for cross in self.crossing.pipeline:
+            cross(parents)
+
+        self.info("Mutating...")
+        for mutnme, mutparams in sorted(self.mutations.items()):
+            if not mutparams["use"]:
+                continue
+            count = min(int(this_population_size * mutparams["chromosomes"]),
+                        this_population_size)
+            if count == 0:
+                continue
+            sources = self.rand.permutation(this_population_size)[:count]
+            first = self._append(self._genomes[sources])
+            self.mutate_rows(
+                mutnme, numpy.arange(first, first + count),
+                int(this_population_size * mutparams["points"]),
+                mutparams["probability"])
+
+        self.debug("Total population size: %d", len(self))
+        self.on_generation_changed()
+        self.on_generation_changed_callback()
+
+    def select_roulette(self):
+        """Selection for crossing with roulette.
+        """
+        bound = numpy.cumsum(self.fitnesses[:len(self)])
+        bound /= bound[-1]
+        rand = self.rand.rand(int(len(self) * self.roulette_select_size))
+        return numpy.minimum(numpy.searchsorted(bound, rand), len(self) - 1)
+
+    def select_random(self):
+        """Random select for crossing.
+        """
+        return self.rand.randint(
+            len(self), size=int(len(self) * self.random_select_size))
+
+    def select_tournament(self):
+        """Tournament select for crossing.
+        """
+        pool = self.rand.randint(
+            len(self), size=int(len(self) * self.tournament_size))
+        pool = pool[numpy.argsort(self.fitnesses[pool], kind="mergesort")]
+        return pool[:int(len(self) * self.tournament_select_size)]
+
+    def mutate_rows(self, mutnme, rows, n_points, probability):
+        """Mutates the specified rows of the genome matrix in place.
+        """
+        if mutnme not in self.mutators_:
+            raise ValueError("Unsupported mutation: %s" % mutnme)
+        if len(rows) == 0:
+            return
+        genomes = self._genomes[rows]
+        self.mutators_[mutnme](genomes, n_points, probability)
+        self._genomes[rows] = self.correct(genomes)
+        self._fitnesses[rows] = numpy.nan
+
+    def cross_pointed(self, parents):
+        """Multipoint crossingover.
+        """
+        self._cross_with_attempts(parents, self.crossing.pointed_crossings,
+                                  self._cross_pointed_attempt)
+
+    def _cross_with_attempts(self, parents, crossings, f_attempt):
+        count = int(len(self) * crossings)
+        if count == 0 or len(parents) == 0:
+            return
+        sons = f_attempt(parents, count)
+        for i in range(self.crossing_attempts):
+            invalid = numpy.logical_not(self.validate(sons))
+            if not invalid.any():
+                break
+            self.warning("%d invalid crossing results detected, will retry "
+                         "(attempt number %d)", numpy.count_nonzero(invalid),
+                         i + 1)
+            sons[invalid] = f_attempt(parents, count)[invalid]
+        else:
+            self.warning("Unsuccessfull crossing, but will still use the "
+                         "result of the last attempt")
+        self._append(sons)
+
+    def _choose_parents(self, parents, count):
+        return (self._genomes[parents[self.rand.randint(len(parents),
+                                                        size=count)]],
+                self._genomes[parents[self.rand.randint(len(parents),
+                                                        size=count)]])
+
+    def _cross_pointed_attempt(self, parents, count):
+        parent1, parent2 = self._choose_parents(parents, count)
+        size = self.optimization.size
+        n_points = min(int(len(self) * self.crossing.pointed_points),
+                       size - 1)
+        cuts = numpy.zeros((count, size), dtype=numpy.int32)
+        if n_points > 0:
+            points = numpy.argsort(self.rand.rand(count, size - 1),
+                                   axis=1)[:, :n_points] + 1
+            cuts[numpy.arange(count)[:, numpy.newaxis], points] = 1
+        odd = numpy.cumsum(cuts, axis=1) % 2 == 1
+        return self.correct(numpy.vstack((
+            numpy.where(odd, parent1, parent2),
+            numpy.where(odd, parent2, parent1))))
+
+    def _cross_uniform_attempt(self, parents, count):
+        parent1, parent2 = self._choose_parents(parents, count)
+        mask = self.rand.rand(*parent1.shape) < 0.5
+        return self.correct(numpy.where(mask, parent1, parent2))
+
+    def _cross_arithmetic_attempt(self, parents, count):
+        parent1, parent2 = self._choose_parents(parents, count)
+        a = self.rand.rand(*parent1.shape)
+        integer = self.integer_genes
+        son1 = a * parent1 + (1 - a) * parent2
+        son1 = numpy.where(integer, numpy.trunc(son1), son1)
+        son2 = numpy.where(integer, parent1 + parent2 - son1,
+                           (1 - a) * parent1 + a * parent2)
+        return self.correct(numpy.vstack((son1, son2)))
+
+    def _cross_geometric_attempt(self, parents, count):
+        parent1, parent2 = self._choose_parents(parents, count)
+        mins = numpy.array(self.optimization.min_values, dtype=numpy.float64)
+        maxs = numpy.array(self.optimization.max_values, dtype=numpy.float64)
+        # correct1 is used to invert [-x1; -x2] to [x2; x1]
+        correct1 = numpy.where(maxs < 0, -1.0, 1.0)
+        # correct2 is used to alter [-x1; x2] to [0; x2+x1]
+        correct2 = numpy.where((mins > 0) | (correct1 < 0), 0, -mins)
+        a = self.rand.rand(*parent1.shape)
+        son = correct1 * (
+            numpy.power(correct1 * parent1 + correct2, a) *
+            numpy.power(correct1 * parent2 + correct2, 1 - a) - correct2)
+        return self.correct(son)
+
+    def _mutation_mask(self, genomes, n_points, probability):
+        """Chooses up to n_points distinct genes in each row, each of them is
+        mutated with the specified probability.
+        """
+        chosen = numpy.argsort(self.rand.rand(*genomes.shape), axis=1)
+        chosen = chosen < min(n_points, genomes.shape[1])
+        return chosen & (self.rand.rand(*genomes.shape) < probability)
+
+    def _mutate_gaussian(self, genomes, n_points, probability):
+        mask = self._mutation_mask(genomes, n_points, probability)
+        mins = numpy.array(self.optimization.min_values, dtype=numpy.float64)
+        maxs = numpy.array(self.optimization.max_values, dtype=numpy.float64)
+        diff = maxs - mins
+        gauss = self.rand.normal(mins + diff / 2, numpy.sqrt(diff / 6),
+                                 genomes.shape)
+        sign = numpy.where(self.rand.rand(*genomes.shape) < 0.5, -1, 1)
+        genomes[mask] += (sign * gauss)[mask]
+
+    def _mutate_uniform(self, genomes, n_points, probability):
+        mask = self._mutation_mask(genomes, n_points, probability)
+        uniform = self.rand.uniform(self.optimization.min_values,
+                                    self.optimization.max_values,
+                                    genomes.shape)
+        genomes[mask] = uniform[mask]
+
+    def _mutate_altering(self, genomes, n_points, probability):
+        rows = numpy.arange(len(genomes))
+        for _ in range(n_points or 1):
+            pos1 = self.rand.randint(genomes.shape[1], size=len(genomes))
+            pos2 = self.rand.randint(genomes.shape[1], size=len(genomes))
+            swap = self.rand.rand(len(genomes)) < probability
+            r, p1, p2 = rows[swap], pos1[swap], pos2[swap]
+            genomes[r, p1], genomes[r, p2] = \
+                genomes[r, p2].copy(), genomes[r, p1].copy()
+
+    def _registered_rows(self):
+        return numpy.fromiter((c.row for c in self.chromosomes),
+                              dtype=numpy.intp, count=len(self.chromosomes))
+
+    def _allocate(self, genomes):
+        """Appends the genomes to the matrix (growing it if needed) and marks
+        them as not evaluated.
+
+        Returns:
+            The index of the first appended row.
+        """
+        first = self._rows
+        end = first + len(genomes)
+        if end > len(self._genomes):
+            capacity = max(end, 2 * len(self._genomes))
+            grown = numpy.zeros((capacity, self.optimization.size))
+            grown[:first] = self._genomes[:first]
+            self._genomes = grown
+            fitnesses = numpy.empty(capacity)
+            fitnesses[:first] = self._fitnesses[:first]
+            self._fitnesses = fitnesses
+        self._genomes[first:end] = genomes
+        self._fitnesses[first:end] = numpy.nan
+        self._rows = end
+        return first
+
+    def _append(self, genomes):
+        """Creates and adds the chromosomes with the specified genomes.
+
+        Returns:
+            The index of the first added row.
+        """
+        first = self._allocate(genomes)
+        for row in range(first, self._rows):
+            self.add(self.chromosome_factory(  # pylint: disable=E1102
+                self, row))
+        return first
@@ -36,11 +36,13 @@ under the License.
 from collections import defaultdict
 
 import copy
+from functools import partial
+import hashlib
 import json
+import math
 import os
 from six import add_metaclass
 import sys
-import subprocess
 from tempfile import NamedTemporaryFile
 from zope.interface import implementer
 from veles import prng, __root__
@@ -49,14 +51,18 @@ from veles.compat import from_none
 from veles.accelerated_units import AcceleratedWorkflow
 from veles.config import root, fix_contents
 from veles.distributable import IDistributable
+from veles.evaluator_server import EvaluatorPool
+from veles.genetics.cache import FitnessCache, quantize_genome
 from veles.genetics.config import process_config, Range, print_config, \
     ConfigChromosome, ConfigPopulation
 from veles.json_encoders import ConfigJSONEncoder
 from veles.launcher import filter_argv
+from veles.loader.base import Loader
 from veles.mutable import Bool
 from veles.pickle2 import best_protocol, pickle
 from veles.plotting_units import AccumulatingPlotter
 from veles.plumbing import Repeater
+from veles.process_pool import ProcessPool
 from veles.result_provider import IResultProvider
 from veles.units import IUnit, UnitCommandLineArgumentsRegistry, Unit
 
@@ -77,6 +83,18 @@ class GeneticsOptimizer(Unit):
             del self.config.common
         self.plotters_are_disabled = kwargs.get(
             "plotters_are_disabled", root.common.genetics.disable.plotting)
+        self.workers = kwargs.get("workers", root.common.genetics.workers)
+        self.pin_workers = kwargs.get(
+            "pin_workers", root.common.genetics.pin_workers)
+        self.warm_workers = kwargs.get(
+            "warm_workers", root.common.genetics.warm_workers)
+        self.use_fitness_cache = kwargs.get(
+            "fitness_cache", root.common.genetics.fitness_cache)
+        halving = root.common.genetics.halving
+        self.min_budget = kwargs.get("min_budget", halving.min_budget)
+        self.halving_eta = kwargs.get("halving_eta", halving.eta)
+        self.epochs_path = kwargs.get("epochs_path", halving.epochs)
+        self.train_ratio = 1.0
         self._tuneables = []
         process_config(self.config, Range, self._add_tuneable)
         if len(self.tuneables) == 0:
@@ -105,6 +123,9 @@ class GeneticsOptimizer(Unit):
         super(GeneticsOptimizer, self).init_unpickled()
         self._filtered_argv_ = []
         self._pending_ = defaultdict(set)
+        self._evaluators_ = None
+        self._fitness_cache_ = None
+        self._looked_up_ = set()
 
     @property
     def population(self):
@@ -123,6 +144,131 @@ class GeneticsOptimizer(Unit):
     def config(self):
         return self._config
 
+    @property
+    def workers(self):
+        return self._workers
+
+    @workers.setter
+    def workers(self, value):
+        if not isinstance(value, int):
+            raise TypeError(
+                "workers must be an integer (got %s)" % type(value))
+        if value < 0:
+            raise ValueError("workers must be >= 0 (got %d)" % value)
+        self._workers = value
+
+    @property
+    def min_budget(self):
+        return self._min_budget
+
+    @min_budget.setter
+    def min_budget(self, value):
+        if not isinstance(value, (int, float)):
+            raise TypeError(
+                "min_budget must be a number (got %s)" % type(value))
+        if value <= 0 or value > 1:
+            raise ValueError("min_budget must be in (0, 1] (got %s)" % value)
+        self._min_budget = value
+
+    @property
+    def halving_eta(self):
+        return self._halving_eta
+
+    @halving_eta.setter
+    def halving_eta(self, value):
+        if not isinstance(value, (int, float)):
+            raise TypeError(
+                "halving_eta must be a number (got %s)" % type(value))
+        if value <= 1:
+            raise ValueError("halving_eta must be > 1 (got %s)" % value)
+        self._halving_eta = value
+
+    @property
+    def epochs_path(self):
+        return self._epochs_path
+
+    @epochs_path.setter
+    def epochs_path(self, value):
+        if value is not None and not value.startswith("root."):
+            raise ValueError(
+                "epochs_path must be like \"root.model.decision.max_epochs\""
+                " (got %s)" % value)
+        self._epochs_path = value
+
+    @property
+    def budgets(self):
+        """The sequence of evaluation budgets (fractions of the full one)
+        used by the successive halving. Only [1.0] if it is disabled.
+        """
+        budgets = []
+        budget = self.min_budget
+        while budget < 1:
+            budgets.append(budget)
+            budget *= self.halving_eta
+        budgets.append(1.0)
+        return budgets
+
+    @property
+    def evaluators(self):
+        """The pool of local processes which evaluate chromosomes.
+        """
+        if self._evaluators_ is None:
+            # A single worker may use all the CPUs
+            pin = self.pin_workers and self.workers != 1
+            if self.warm_workers:
+                self._evaluators_ = EvaluatorPool(
+                    self.workers, pin, (self.launcher.workflow_file,),
+                    self._get_exec_args([])[1])
+            else:
+                self._evaluators_ = ProcessPool(self.workers, pin)
+        return self._evaluators_
+
+    @property
+    def checksum(self):
+        """Identifies the evaluation conditions: the model, the command line,
+        the configuration and the set of tuned parameters.
+        """
+        sha1 = hashlib.sha1()
+        with open(self._model_.__file__, "rb") as fin:
+            sha1.update(fin.read())
+        sha1.update(" ".join(self._filtered_argv_).encode("utf-8"))
+        sha1.update(repr(self.train_ratio).encode("utf-8"))
+        sha1.update(" ".join(
+            t.full_name for t in self.tuneables).encode("utf-8"))
+        sha1.update(self._dump_masked_config())
+        return sha1.hexdigest()
+
+    def _dump_masked_config(self):
+        """Serializes the configuration with the tuned values replaced by
+        their names, so that it does not depend on the current chromosome.
+        """
+        values = []
+        for tune in self.tuneables:
+            container, key = tune.addr
+            values.append(container[key])
+            container[key] = tune.full_name
+        try:
+            return pickle.dumps(self.config, protocol=best_protocol)
+        except Exception as e:
+            self.warning("Failed to pickle the configuration, using its "
+                         "representation: %s", e)
+            return repr(fix_contents(self.config)).encode("utf-8")
+        finally:
+            for tune, value in zip(self.tuneables, values):
+                container, key = tune.addr
+                container[key] = value
+
+    @property
+    def fitness_cache(self):
+        """The cache of already evaluated genomes (None if disabled).
+        """
+        if self._fitness_cache_ is None and self.use_fitness_cache and \
+                not self.is_slave:
+            self._fitness_cache_ = FitnessCache(os.path.join(
+                root.common.dirs.cache,
+                "genetics_fitness_%s.json" % self.checksum))
+        return self._fitness_cache_
+
     @property
     def size(self):
         return self.population.size
@@ -144,10 +290,20 @@ class GeneticsOptimizer(Unit):
             self.argv, "-l", "--listen-address", "-m", "--master-address",
             "-n", "--nodes", "-b", "--background", "-s", "--stealth",
             "--optimize", "--slave-launch-transform", "--result-file",
-            "--pdb-on-finish")
+            "--pdb-on-finish", "--train-ratio")
+        # The train ratio is passed explicitly since it may be reduced
+        self.train_ratio = Loader.init_parser().parse_known_args(
+            self.argv)[0].train_ratio
+        if self.min_budget < 1 and not self.is_standalone:
+            self.warning("Successive halving is supported only in standalone "
+                         "mode, chromosomes will be evaluated with the full "
+                         "budget")
 
     def run(self):
         self.generation_changed <<= False
+        if self.is_standalone and (self.workers != 1 or self.min_budget < 1):
+            self.evaluate_generation()
+            return
         self.info("Evaluating chromosome #%d...", self._chromosome_index)
         self.population.evaluate(self._chromosome_index)
         self._chromosome_index += 1
@@ -155,6 +311,8 @@ class GeneticsOptimizer(Unit):
             self.complete <<= True
 
     def stop(self):
+        if self._evaluators_ is not None:
+            self._evaluators_.shutdown()
         if self.is_slave:
             return
         self.info("Best fitness: %s", self.best.fitness)
@@ -186,12 +344,20 @@ class GeneticsOptimizer(Unit):
     def generate_data_for_slave(self, slave):
         self._update_has_more_data_for_slave()
         self.generation_changed <<= False
-        for index in range(len(self.population)):
-            if self.population[index].fitness is not None:
-                continue
-            if not any(index in s for s in self._pending_):
-                self._pending_[slave].add(index)
-                return self.population, index
+        while True:
+            for index in range(len(self.population)):
+                if self.population[index].fitness is not None:
+                    continue
+                if self._apply_cached(index, self.population[index]):
+                    continue
+                if not any(index in s for s in self._pending_):
+                    self._pending_[slave].add(index)
+                    return self.population, index
+            if self.population.pending_size > 0 or \
+                    not self.population.improved:
+                return
+            # The whole generation was found in the fitness cache
+            self.population.update()
 
     def apply_data_from_master(self, data):
         self._population, self._chromosome_index = data
@@ -211,7 +377,10 @@ class GeneticsOptimizer(Unit):
         chromosome.fitness = fitness
         chromosome.config = config
         chromosome.snapshot = snapshot
+        chromosome.fidelity = 1.0
         self.info("Chromosome #%d was evaluated to %s", index, fitness)
+        if self.fitness_cache is not None and fitness is not None:
+            self.fitness_cache.put(self._genome(chromosome), fitness, snapshot)
         self.population.update()
         self._pending_[slave].remove(index)
 
@@ -221,29 +390,150 @@ class GeneticsOptimizer(Unit):
             self._update_has_more_data_for_slave()
 
     def evaluate(self, chromo):
-        for tune, val in zip(self.tuneables, chromo.numeric):
-            tune <<= val
-        chromo.config = copy.deepcopy(self.config)
-        with NamedTemporaryFile(mode="wb", prefix="veles-optimization-config-",
-                                suffix=".%d.pickle" % best_protocol) as fcfg:
-            pickle.dump(self.config, fcfg)
-            fcfg.flush()
-            with NamedTemporaryFile(
-                    mode="r", prefix="veles-optimization-result-",
-                    suffix=".%d.pickle" % best_protocol) as fres:
-                argv = ["--result-file", fres.name, "--stealth", "--log-id",
-                        self.launcher.log_id] + self._filtered_argv_ + \
-                    ["root.common.disable.snapshotting=True",
-                     "root.common.disable.publishing=True"]
-                if self.plotters_are_disabled:
-                    argv = ["-p", ""] + argv
-                i = -1
-                while "=" in argv[i]:
-                    i -= 1
-                argv[i] = fcfg.name
-                result = self._exec(argv, fres)
-                if result is None:
-                    raise EvaluationError()
+        if self._apply_cached(self._chromosome_index, chromo):
+            return
+        fcfg, fres, argv = self._prepare_evaluation(chromo)
+        with fcfg, fres:
+            result = self._exec(argv, fres)
+        if result is None:
+            raise EvaluationError()
+        self._apply_result(self._chromosome_index, chromo, result)
+
+    def evaluate_generation(self):
+        """Evaluates all pending chromosomes of the current generation
+        simultaneously in local subprocesses, then breeds the next one.
+
+        If successive halving is enabled (min_budget < 1), the chromosomes
+        are first evaluated with min_budget fraction of the full budget and
+        only the best 1/halving_eta of them are promoted to the next budget,
+        which is halving_eta times larger, until the full one.
+        """
+        indices = [i for i, c in enumerate(self.population)
+                   if c.fitness is None and not self._apply_cached(i, c)]
+        # Identical chromosomes are evaluated only once
+        unique = {}
+        duplicates = []
+        for index in indices:
+            genome = self._genome(self.population[index])
+            if genome in unique:
+                duplicates.append((index, unique[genome]))
+            else:
+                unique[genome] = index
+        candidates = sorted(unique.values())
+        for rung, budget in enumerate(self.budgets):
+            if rung > 0:
+                candidates.sort(key=lambda i: self.population[i].fitness,
+                                reverse=True)
+                candidates = sorted(candidates[:int(math.ceil(
+                    len(candidates) / float(self.halving_eta)))])
+            self._evaluate_indices(candidates, budget)
+        if len(self.budgets) > 1:
+            self._rank_partially_evaluated(sorted(unique.values()))
+        for index, origin in duplicates:
+            chromo, evaluated = self.population[index], self.population[origin]
+            chromo.fitness = evaluated.fitness
+            chromo.config = evaluated.config
+            chromo.snapshot = evaluated.snapshot
+            chromo.fidelity = evaluated.fidelity
+        self.population.update()
+
+    def _evaluate_indices(self, indices, budget):
+        pool = self.evaluators
+        self.info("Evaluating %d chromosomes with %.3g budget using %d local "
+                  "workers...", len(indices), budget, pool.size)
+        files = []
+        failed = []
+        try:
+            for index in indices:
+                fcfg, fres, argv = self._prepare_evaluation(
+                    self.population[index], budget)
+                files.extend((fcfg, fres))
+                argv, env = self._get_exec_args(argv)
+                pool.submit(argv, partial(
+                    self._on_evaluated, index, fres, budget, failed), env)
+            pool.join()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            for fobj in files:
+                fobj.close()
+        if len(failed) > 0:
+            raise EvaluationError(
+                "Failed to evaluate chromosomes %s" % sorted(failed))
+
+    def _rank_partially_evaluated(self, indices):
+        """Ensures that the chromosomes which were not promoted to the full
+        budget are not ranked higher than the fully evaluated ones.
+        """
+        full = [self.population[i].fitness for i in indices
+                if self.population[i].fidelity == 1]
+        if len(full) == 0:
+            return
+        worst = min(full)
+        for index in indices:
+            chromo = self.population[index]
+            if chromo.fidelity < 1 and chromo.fitness > worst:
+                chromo.fitness = worst
+        self.info("Successive halving: %d of %d chromosomes were evaluated "
+                  "with the full budget", len(full), len(indices))
+
+    def _on_evaluated(self, index, fres, budget, failed, code):
+        if code != 0:
+            self.error("Failed to evaluate chromosome #%d", index)
+            failed.append(index)
+            return
+        result = self._parse_result(fres, index)
+        if result is None:
+            failed.append(index)
+            return
+        try:
+            self._apply_result(index, self.population[index], result, budget)
+        except EvaluationError as e:
+            self.error("Chromosome #%d: %s", index, e)
+            failed.append(index)
+
+    def _prepare_evaluation(self, chromo, budget=1.0):
+        self._apply_genome(chromo)
+        fcfg = NamedTemporaryFile(
+            mode="wb", prefix="veles-optimization-config-",
+            suffix=".%d.pickle" % best_protocol)
+        pickle.dump(self.config, fcfg)
+        fcfg.flush()
+        fres = NamedTemporaryFile(
+            mode="r", prefix="veles-optimization-result-",
+            suffix=".%d.pickle" % best_protocol)
+        argv = ["--result-file", fres.name, "--stealth", "--log-id",
+                self.launcher.log_id] + self._filtered_argv_ + \
+            ["root.common.disable.snapshotting=True",
+             "root.common.disable.publishing=True"]
+        if self.plotters_are_disabled:
+            argv = ["-p", ""] + argv
+        train_ratio = self.train_ratio
+        if budget < 1:
+            if self.epochs_path is None:
+                train_ratio *= budget
+            else:
+                argv.append("%s=%d" % (self.epochs_path, max(1, int(round(
+                    self._get_epochs(chromo.config) * budget)))))
+        if train_ratio != 1:
+            argv = ["--train-ratio", repr(train_ratio)] + argv
+        i = -1
+        while "=" in argv[i]:
+            i -= 1
+        argv[i] = fcfg.name
+        return fcfg, fres, argv
+
+    def _get_epochs(self, config):
+        value = config
+        for name in self.epochs_path.split(".")[1:]:
+            value = getattr(value, name)
+        if not isinstance(value, int):
+            raise ValueError("%s must be an integer (got %s)" % (
+                self.epochs_path, type(value)))
+        return value
+
+    def _apply_result(self, index, chromo, result, budget=1.0):
         try:
             chromo.fitness = result["EvaluationFitness"]
         except KeyError:
@@ -251,8 +541,41 @@ class GeneticsOptimizer(Unit):
                 "Failed to find \"EvaluationFitness\" in the evaluation "
                 "results"))
         chromo.snapshot = result.get("Snapshot")
-        self.info("Chromosome #%d was evaluated to %f", self._chromosome_index,
+        chromo.fidelity = budget
+        if budget < 1:
+            self.info("Chromosome #%d was evaluated to %f with %.3g budget",
+                      index, chromo.fitness, budget)
+            return
+        self.info("Chromosome #%d was evaluated to %f", index, chromo.fitness)
+        if self.fitness_cache is not None:
+            self.fitness_cache.put(
+                self._genome(chromo), chromo.fitness, chromo.snapshot)
+
+    def _genome(self, chromo):
+        return quantize_genome(
+            chromo.numeric, [t.default for t in self.tuneables],
+            self.population.optimization.accuracy)
+
+    def _apply_cached(self, index, chromo):
+        if self.fitness_cache is None:
+            return False
+        # Count every chromosome once per generation in the statistics
+        cached = self.fitness_cache.get(
+            self._genome(chromo), count=index not in self._looked_up_)
+        self._looked_up_.add(index)
+        if cached is None:
+            return False
+        self._apply_genome(chromo)
+        chromo.fitness, chromo.snapshot = cached
+        chromo.fidelity = 1.0
+        self.info("Chromosome #%d was found in the cache: %f", index,
                   chromo.fitness)
+        return True
+
+    def _apply_genome(self, chromo):
+        for tune, val in zip(self.tuneables, chromo.numeric):
+            tune <<= val
+        chromo.config = copy.deepcopy(self.config)
 
     def _update_has_more_data_for_slave(self):
         self.has_data_for_slave = \
@@ -265,16 +588,23 @@ class GeneticsOptimizer(Unit):
         self.tuneables.append(value)
         return value
 
-    def _exec(self, argv, fin):
+    def _get_exec_args(self, argv):
         __main__ = os.path.join(__root__, "veles", "__main__.py")
         argv = [sys.executable, __main__] + argv
         self.debug("exec: %s", " ".join(argv))
         env = {"PYTHONPATH": os.getenv("PYTHONPATH", __root__)}
         env.update(os.environ)
-        if subprocess.call(argv, env=env):
+        return argv, env
+
+    def _exec(self, argv, fin):
+        argv, env = self._get_exec_args(argv)
+        if self.evaluators.call(argv, env):
             self.error("Failed to evaluate chromosome #%d",
                        self._chromosome_index)
             return
+        return self._parse_result(fin, self._chromosome_index)
+
+    def _parse_result(self, fin, index):
         try:
             return json.load(fin)
         except ValueError as e:
@@ -283,10 +613,20 @@ class GeneticsOptimizer(Unit):
                     prefix="veles-optimization-", suffix=".json", mode="w",
                     delete=False) as fout:
                 fout.write(fin.read())
-                self.error("Failed to parse %s: %s", fout.name, e)
+                self.error("Failed to parse %s (chromosome #%d): %s",
+                           fout.name, index, e)
 
     def _set_generation_changed(self):
         self.generation_changed <<= True
+        cache = self.fitness_cache
+        if cache is not None:
+            lookups = cache.hits + cache.misses
+            self.info("Fitness cache: %d hits of %d lookups (%.1f%%), %d "
+                      "entries", cache.hits, lookups,
+                      100.0 * cache.hits / lookups if lookups > 0 else 0,
+                      len(cache))
+            cache.reset_stats()
+        self._looked_up_.clear()
         # That's right, I do mean it
         #    old          new
         # |--------|----------------|
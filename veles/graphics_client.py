@@ -60,7 +60,7 @@ import zmq
 
 from veles.config import root
 from veles.txzmq import ZmqConnection, ZmqEndpoint
-from veles.iplotter import IPlotter
+from veles.iplotter import IPlotter, PlotterUpdate
 from veles.logger import Logger
 from veles.pickle2 import pickle, setup_pickle_debug
 
@@ -104,6 +104,7 @@ class GraphicsClient(Logger):
         self.webagg_fifo = webagg_fifo
         self._gc_counter = 0
         self._balance = defaultdict(int)
+        self._replicas = {}
         self._dump_dir = kwargs.get("dump_dir")
         self._pdf_lock = threading.Lock()
         self._pdf_trigger = False
@@ -196,10 +197,18 @@ class GraphicsClient(Logger):
             raise
         self._run()
 
-    def update(self, plotter, raw_data):
+    def update(self, message, raw_data):
         """Processes one plotting event.
         """
-        if plotter is not None:
+        if message is not None:
+            if isinstance(message, PlotterUpdate):
+                plotter = self._apply_update(message)
+                if plotter is None:
+                    return
+                if self._dump_dir:
+                    raw_data = pickle.dumps(plotter)
+            else:
+                plotter = message
             if self._dump_dir:
                 file_name = os.path.join(self._dump_dir, "%s_%s.pickle" % (
                     plotter.name.replace(" ", "_"),
@@ -251,6 +260,30 @@ class GraphicsClient(Logger):
             self.debug("Received the command to terminate")
             self.shutdown()
 
+    def _apply_update(self, update):
+        """Applies the update to the cached replica of the plotter.
+
+        Returns:
+            The up-to-date replica or None if it cannot be restored until
+            the next full update.
+        """
+        if update.full:
+            plotter = update.create()
+            self._replicas[update.id] = plotter, update.sequence
+            return plotter
+        plotter, sequence = self._replicas.get(update.id, (None, None))
+        if plotter is None:
+            self.debug("Skipped %s: waiting for the full state", update)
+            return None
+        if update.sequence != sequence + 1:
+            self.warning("Lost %d update(s) of %s, waiting for the full "
+                         "state", update.sequence - sequence - 1, plotter)
+            del self._replicas[update.id]
+            return None
+        update.apply(plotter)
+        self._replicas[update.id] = plotter, update.sequence
+        return plotter
+
     def show_figure(self, figure):
         if self.pp.get_backend() != "WebAgg":
             figure.show()
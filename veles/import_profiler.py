@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 30, 2015
+
+Measures how much time the imports take (see --profile-startup).
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import sys
+import threading
+import time
+
+from six.moves import builtins
+
+# This module must stay light: it is imported before everything else
+
+
+class ImportProfiler(object):
+    """Wraps __import__ and records the cumulative and the self time of each
+    module imported for the first time in the main thread. The submodules
+    loaded implicitly by the import system (e.g., the parents of a dotted
+    name) are accounted to the module which caused them.
+
+    Attributes:
+        timings: the mapping from the module name to the list
+                 [cumulative time, self time], in seconds.
+        total: the time spent in the top level imports, in seconds.
+    """
+    instance = None
+
+    def __init__(self):
+        self.timings = {}
+        self.total = 0.0
+        self._stack = []
+        self._original = None
+        self._thread = threading.current_thread()
+        self._start_time = time.time()
+
+    @staticmethod
+    def start():
+        if ImportProfiler.instance is None:
+            ImportProfiler.instance = ImportProfiler()
+            ImportProfiler.instance.install()
+        return ImportProfiler.instance
+
+    @staticmethod
+    def stop():
+        """Stops the active profiler.
+
+        Returns:
+            The stopped profiler or None if it was not started.
+        """
+        profiler = ImportProfiler.instance
+        if profiler is not None:
+            profiler.uninstall()
+            ImportProfiler.instance = None
+        return profiler
+
+    @property
+    def elapsed(self):
+        return time.time() - self._start_time
+
+    def install(self):
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def format(self, limit=40):
+        """Returns the table of the slowest imports sorted by the cumulative
+        time.
+        """
+        from veles.external.prettytable import PrettyTable
+
+        table = PrettyTable("module", "cumulative, ms", "self, ms")
+        table.align["module"] = "l"
+        table.align["cumulative, ms"] = "r"
+        table.align["self, ms"] = "r"
+        rows = sorted(self.timings.items(), key=lambda t: t[1][0],
+                      reverse=True)
+        for name, (cumulative, own) in rows[:limit]:
+            table.add_row(name, "%.1f" % (cumulative * 1000),
+                          "%.1f" % (own * 1000))
+        return "%s\nImported %d modules in %.3f s (%.3f s since the start " \
+            "of profiling)" % (table, len(self.timings), self.total,
+                               self.elapsed)
+
+    @staticmethod
+    def _resolve(name, globals_, level):
+        if level <= 0 or not globals_:
+            return name
+        package = globals_.get("__package__")
+        if not package:
+            package = globals_.get("__name__", "")
+            if "__path__" not in globals_:
+                package = package.rpartition(".")[0]
+        base = package.rsplit(".", level - 1)[0]
+        return base + "." + name if name else base
+
+    def _import(self, name, globals_=None, locals_=None, fromlist=(),
+                level=0):
+        original = self._original or builtins.__import__
+        if threading.current_thread() is not self._thread:
+            return original(name, globals_, locals_, fromlist, level)
+        full_name = self._resolve(name, globals_, level)
+        if full_name not in sys.modules:
+            targets = [full_name]
+        else:
+            # "from package import submodule" may load the submodule
+            targets = ["%s.%s" % (full_name, f) for f in fromlist or ()
+                       if f != "*" and "%s.%s" % (full_name, f)
+                       not in sys.modules]
+        if not targets:
+            return original(name, globals_, locals_, fromlist, level)
+        self._stack.append(0.0)
+        start = time.time()
+        try:
+            return original(name, globals_, locals_, fromlist, level)
+        finally:
+            elapsed = time.time() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            else:
+                self.total += elapsed
+            # The names from fromlist may be plain attributes
+            loaded = [t for t in targets if t in sys.modules]
+            if loaded:
+                entry = self.timings.setdefault(", ".join(loaded), [0.0, 0.0])
+                entry[0] += elapsed
+                entry[1] += elapsed - children
@@ -59,16 +59,25 @@ class InputJoiner(AcceleratedUnit):
         minibatch_size: size of the minibatch (will be set to the minimum
                         of the first shapes from the inputs
                         if not provided prior to the initialize)
+        rehome_inputs: on numpy backend, replace the inputs' buffers with
+                       the views of the output during initialize(), so
+                       that the upstream units write directly into it and
+                       nothing is copied. The inputs of the other type or
+                       shape, the non-contiguous ones and the inputs which
+                       are reset afterwards are copied as usual.
     """
     def __init__(self, workflow, **kwargs):
         super(InputJoiner, self).__init__(workflow, **kwargs)
         self.output = Array()
         self._num_inputs = 0
         self.inputs = kwargs.get("inputs")
+        self.rehome_inputs = kwargs.get("rehome_inputs", False)
 
     def init_unpickled(self):
         super(InputJoiner, self).init_unpickled()
         self.sources_["join"] = {}
+        # input index => the view of the output which became its buffer
+        self._rehomed_ = {}
 
     @property
     def num_inputs(self):
@@ -185,6 +194,31 @@ class InputJoiner(AcceleratedUnit):
     def ocl_init(self):
         self._gpu_init()
 
+    def numpy_init(self):
+        self._rehomed_.clear()
+        if not self.rehome_inputs:
+            return
+        output = self.output.mem
+        minibatch_size = output.shape[0]
+        for i, (inp, offset, length) in enumerate(zip(
+                self.inputs, self.offsets, self.lengths)):
+            mem = inp.mem
+            view = None
+            if (mem.shape[0] == minibatch_size and
+                    mem.dtype == output.dtype and
+                    mem.flags.c_contiguous and inp.devmem is None and
+                    offset + length <= output.shape[1]):
+                view = output[:, offset:offset + length].reshape(mem.shape)
+            if view is None or not numpy.may_share_memory(view, output):
+                self.debug("input_%d can not be re-homed and will be copied",
+                           i)
+                continue
+            view[:] = mem
+            inp.mem = view
+            self._rehomed_[i] = view
+        self.debug("Re-homed %d inputs out of %d", len(self._rehomed_),
+                   self.num_inputs)
+
     def cuda_init(self):
         self._gpu_init()
 
@@ -192,12 +226,13 @@ class InputJoiner(AcceleratedUnit):
         self.output.map_invalidate()  # we will update output on CPU
         minibatch_size = self.output.shape[0]
         low = 0
-        for inp in self.inputs:
-            inp.map_read()
+        for i, inp in enumerate(self.inputs):
             high = low + inp.size // inp.shape[0]
             if low >= high:
                 break
-            self.output.mem[:, low:high] = inp[:minibatch_size]
+            if self._rehomed_.get(i) is not inp.mem:
+                inp.map_read()
+                self.output.mem[:, low:high] = inp[:minibatch_size]
             low = high
 
     def ocl_run(self):
@@ -54,3 +54,59 @@ class IPlotter(Interface):
         """Updates the plot using the changed object's state.
         Should be implemented by the class providing this interface.
         """
+
+
+class PlotterUpdate(object):
+    """The message which a plotter sends to GraphicsClient. It carries either
+    the whole plotter state or only the attributes which changed since the
+    previous update. The latter are applied to the replica of the plotter
+    which was recreated from the last full state.
+
+    Attributes:
+        plotter_class: the class of the plotter.
+        id: the plotter's unique identifier.
+        sequence: the number of this update, starting from 1.
+        state: the full pickled state of the plotter or None.
+        changes: dict name -> (kind, value), where kind is either SET
+                 (the attribute is replaced) or APPEND (the value is appended
+                 to the list attribute).
+    """
+
+    SET = 0
+    APPEND = 1
+
+    def __init__(self, plotter_class, plotter_id, sequence, state=None,
+                 changes=None):
+        self.plotter_class = plotter_class
+        self.id = plotter_id
+        self.sequence = sequence
+        self.state = state
+        self.changes = changes
+
+    def __repr__(self):
+        return "<%s #%d of %s %s (%s)>" % (
+            type(self).__name__, self.sequence, self.plotter_class.__name__,
+            self.id, "full" if self.full else ", ".join(sorted(self.changes)))
+
+    @property
+    def full(self):
+        return self.state is not None
+
+    def create(self):
+        """Recreates the plotter from the full state, the same way unpickling
+        does.
+        """
+        assert self.full
+        plotter = self.plotter_class.__new__(self.plotter_class)
+        plotter.__setstate__(dict(self.state))
+        return plotter
+
+    def apply(self, plotter):
+        """Applies the changes to the plotter's replica.
+        """
+        assert not self.full
+        for name, (kind, value) in self.changes.items():
+            if kind == PlotterUpdate.APPEND:
+                plotter.__dict__[name].extend(value)
+            else:
+                plotter.__dict__[name] = value
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 29, 2015
+
+Content-addressed cache of the compiled OpenCL/CUDA programs.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import hashlib
+import os
+from six import PY3
+from tempfile import mkstemp
+
+from veles.config import root
+from veles.logger import Logger
+from veles.pickle2 import pickle, best_protocol
+
+
+class KernelCache(Logger):
+    """Stores the compiled programs under the hash of everything which affects
+    the compilation. The hash is the index: it gives the entry's file path
+    directly, so a lookup is a single open() and the existing entries are
+    never compared or rewritten. Writers dump the entry into a temporary file
+    and atomically rename it, thus the processes which build the same program
+    simultaneously do not corrupt each other. Every hit refreshes the entry's
+    modification time and the least recently used entries are removed once
+    the total size exceeds max_bytes.
+
+    Attributes:
+        directory: the path to the directory with the entries.
+        max_bytes: the maximal total size of the entries (0 means unbounded).
+        hits: the number of successful lookups.
+        misses: the number of failed lookups.
+    """
+    SUFFIX = ".%d.kernel" % (2, 3)[PY3]
+
+    def __init__(self, directory=None, max_bytes=None):
+        super(KernelCache, self).__init__()
+        if directory is None:
+            directory = os.path.join(root.common.dirs.cache, "kernels")
+        if max_bytes is None:
+            max_bytes = root.common.engine.kernel_cache.max_bytes
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(source, dependencies, device):
+        """Calculates the key of the entry.
+
+        Parameters:
+            source: the generated program source (it includes the defines).
+            dependencies: the paths to the included files.
+            device: the device identity, anything with a stable repr().
+
+        Returns:
+            The hexadecimal digest string.
+        """
+        digest = hashlib.sha1()
+        if not isinstance(source, bytes):
+            source = source.encode("utf-8")
+        digest.update(source)
+        for dep in sorted(set(dependencies)):
+            digest.update(b"\0" + os.path.basename(dep).encode("utf-8") +
+                          b"\0")
+            with open(dep, "rb") as fin:
+                digest.update(fin.read())
+        digest.update(b"\0" + repr(device).encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.SUFFIX)
+
+    def get(self, key):
+        """Returns the object stored under the key or None.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as fin:
+                value = pickle.load(fin)
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        except Exception as e:
+            self.warning("Failed to load %s: %s", path, e)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            # Evicted by somebody else in the meantime
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores the object under the key and evicts the least recently
+        used entries if needed.
+
+        Returns:
+            Whether the entry was written.
+        """
+        path = self.path(key)
+        dir_name = os.path.dirname(path)
+        try:
+            try:
+                os.makedirs(dir_name)
+            except OSError:
+                if not os.path.isdir(dir_name):
+                    raise
+            fd, temp_path = mkstemp(prefix=".", suffix=".tmp", dir=dir_name)
+            try:
+                with os.fdopen(fd, "wb") as fout:
+                    pickle.dump(value, fout, protocol=best_protocol)
+                os.rename(temp_path, path)
+            except:
+                os.remove(temp_path)
+                raise
+        except (IOError, OSError, pickle.PicklingError) as e:
+            self.warning("Failed to save %s: %s", path, e)
+            return False
+        self.evict()
+        return True
+
+    def entries(self):
+        """Returns the list of (mtime, size, path) of all the entries.
+        """
+        result = []
+        if not os.path.isdir(self.directory):
+            return result
+        for sub in os.listdir(self.directory):
+            sub = os.path.join(self.directory, sub)
+            if not os.path.isdir(sub):
+                continue
+            for name in os.listdir(sub):
+                if not name.endswith(self.SUFFIX):
+                    continue
+                path = os.path.join(sub, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                result.append((stat.st_mtime, stat.st_size, path))
+        return result
+
+    def evict(self):
+        """Removes the least recently used entries until the total size
+        fits into max_bytes.
+
+        Returns:
+            The number of removed entries.
+        """
+        if not self.max_bytes:
+            return 0
+        entries = self.entries()
+        total = sum(e[1] for e in entries)
+        if total <= self.max_bytes:
+            return 0
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Evicted by somebody else in the meantime
+                pass
+            total -= size
+            removed += 1
+        self.debug("Evicted %d entries from %s", removed, self.directory)
+        return removed
@@ -38,12 +38,12 @@ under the License.
 import argparse
 import datetime
 import getpass
+import hashlib
 from itertools import chain
 import json
 import os
 import subprocess
 from tempfile import NamedTemporaryFile
-import paramiko
 import platform
 import signal
 from six import BytesIO, add_metaclass
@@ -53,10 +53,6 @@ import threading
 import time
 from twisted.internet import reactor
 from twisted.internet.error import ReactorNotRunning
-from twisted.web.html import escape
-from twisted.web.client import (Agent, HTTPConnectionPool, FileBodyProducer,
-                                getPage)
-from twisted.web.http_headers import Headers
 import uuid
 
 from veles.backends import Device, NumpyDevice
@@ -64,8 +60,6 @@ from veles.client import Client as SlaveManager
 from veles.cmdline import CommandLineArgumentsRegistry, CommandLineBase
 from veles.compat import from_none
 from veles.config import root
-import veles.graphics_server as graphics_server
-from veles.plotter import Plotter
 import veles.logger as logger
 from veles.server import Server as MasterManager
 from veles.thread_pool import ThreadPool
@@ -154,8 +148,7 @@ class Launcher(logger.Logger):
             if self.mongo_log_addr == "":
                 self.args.log_mongo = root.common.mongodb_logging_address
             if not self.is_slave:
-                logger.Logger.duplicate_all_logging_to_mongo(
-                    self.args.log_mongo, self.log_id, "master")
+                self._duplicate_logging_to_mongo("master")
 
         self._monkey_patch_twisted_failure()
         self._lock = threading.Lock()
@@ -169,12 +162,21 @@ class Launcher(logger.Logger):
         self._notify_update_interval = kwargs.get(
             "status_update_interval",
             root.common.web.notification_interval)
+        self._status_version = 0
+        self._status_sent = None
         if self.args.yarn_nodes is not None and self.is_master:
             self._discover_nodes_from_yarn(self.args.yarn_nodes)
 
     def __getstate__(self):
         return {}
 
+    def _duplicate_logging_to_mongo(self, node_id):
+        cfg = root.common.mongodb_logging
+        logger.Logger.duplicate_all_logging_to_mongo(
+            self.args.log_mongo, self.log_id, node_id,
+            batch_size=cfg.batch_size, flush_interval=cfg.flush_interval,
+            queue_size=cfg.queue_size)
+
     def _monkey_patch_twisted_failure(self):
         from twisted.python.failure import Failure
         original_raise = Failure.raiseException
@@ -443,12 +445,12 @@ class Launcher(logger.Logger):
                 self.id = node_id
                 self.log_id = log_id
                 if self.logs_to_mongo:
-                    logger.Logger.duplicate_all_logging_to_mongo(
-                        self.args.log_mongo, self.log_id, node_id)
+                    self._duplicate_logging_to_mongo(node_id)
 
             self.agent.on_id_received = on_id_received
         else:
             if self.reports_web_status:
+                from twisted.web.client import Agent, HTTPConnectionPool
                 timeout = self._notify_update_interval / 2
                 self._web_status_agent = Agent(
                     reactor, pool=HTTPConnectionPool(reactor),
@@ -457,9 +459,10 @@ class Launcher(logger.Logger):
                 self._launch_status()
             if self.workflow.plotters_are_enabled and \
                     (not self.interactive or Launcher.graphics_client is None):
+                from veles.graphics_server import GraphicsServer
                 try:
                     Launcher.graphics_server, Launcher.graphics_client = \
-                        graphics_server.GraphicsServer.launch(
+                        GraphicsServer.launch(
                             self.workflow.thread_pool,
                             self.matplotlib_backend,
                             self._set_webagg_port,
@@ -541,6 +544,7 @@ class Launcher(logger.Logger):
                 self.event("work", "end", height=0.1)
             self._work_end = work_end
             register(self._work_end)
+        from veles.plotter import Plotter
         for unit in self.workflow:
             if isinstance(unit, Plotter):
                 unit.graphics_server = Launcher.graphics_server
@@ -629,6 +633,7 @@ class Launcher(logger.Logger):
             ppenv = "export PYTHONPATH='%s' && " % python_path
         else:
             ppenv = ""
+        import paramiko
         pc = paramiko.SSHClient()
         try:
             pc.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -847,16 +852,24 @@ class Launcher(logger.Logger):
 
     def _on_notify_status_error(self, error):
         self.warning("Failed to upload the status: %s", error)
+        # The server may have missed the update, so resend everything
+        self._status_sent = None
         reactor.callLater(self._notify_update_interval, self._notify_status)
 
     def _notify_status(self, response=None):
         if not self._running:
             return
+        if response is not None and response.code == 409:
+            self.debug("Web status server requested the full status")
+            self._status_sent = None
         time_passed = time.time() - self._notify_update_last_time
         if time_passed < self._notify_update_interval:
             reactor.callLater(self._notify_update_interval - time_passed,
                               self._notify_status)
             return
+        from twisted.web.client import FileBodyProducer
+        from twisted.web.html import escape
+        from twisted.web.http_headers import Headers
         self._notify_update_last_time = time.time()
         mins, secs = divmod(time.time() - self.start_time, 60)
         hours, mins = divmod(mins, 60)
@@ -868,7 +881,7 @@ class Launcher(logger.Logger):
                'user': getpass.getuser(),
                'graph': self.workflow_graph,
                'log_addr': self.mongo_log_addr,
-               'slaves': self._agent.nodes if self.is_master else [],
+               'slaves': self._agent.nodes if self.is_master else {},
                'plots': "http://%s:%d" % (socket.gethostname(),
                                           self.webagg_port),
                'custom_plots': "<br/>".join(self.plots_endpoints),
@@ -877,13 +890,50 @@ class Launcher(logger.Logger):
         url = "http://%s:%d/update" % (root.common.web.host,
                                        root.common.web.port)
         headers = Headers({b'User-Agent': [b'twisted']})
-        body = FileBodyProducer(BytesIO(json.dumps(ret).encode('charmap')))
+        body = FileBodyProducer(BytesIO(json.dumps(
+            self._make_status_update(ret)).encode('charmap')))
         self.debug("Uploading status update to %s", url)
         d = self._web_status_agent.request(
             b'POST', url.encode('ascii'), headers=headers, bodyProducer=body)
         d.addCallback(self._notify_status)
         d.addErrback(self._on_notify_status_error)
 
+    def _make_status_update(self, status):
+        """Converts the status to the difference with the previously sent one.
+        The workflow graph is sent only if its checksum changes, and the
+        slaves are sent only if they are new or have changed. The first
+        update and the updates after an error carry the full status.
+        """
+        status = dict(status)
+        graph = status.pop("graph")
+        slaves = {sid: json.dumps(node, sort_keys=True)
+                  for sid, node in status.pop("slaves").items()}
+        checksum = hashlib.md5(graph.encode("utf-8")).hexdigest()
+        self._status_version += 1
+        sent = self._status_sent
+        self._status_sent = {"version": self._status_version,
+                             "status": status, "graph_checksum": checksum,
+                             "slaves": slaves}
+        update = {"id": self.id, "version": self._status_version,
+                  "graph_checksum": checksum}
+        if sent is None:
+            update.update(status)
+            update["graph"] = graph
+            update["slaves"] = {sid: json.loads(node)
+                                for sid, node in slaves.items()}
+            return update
+        update["base_version"] = sent["version"]
+        for key, value in status.items():
+            if sent["status"].get(key) != value:
+                update[key] = value
+        if sent["graph_checksum"] != checksum:
+            update["graph"] = graph
+        update["slaves_diff"] = {
+            "updated": {sid: json.loads(node) for sid, node in slaves.items()
+                        if sent["slaves"].get(sid) != node},
+            "removed": [sid for sid in sent["slaves"] if sid not in slaves]}
+        return update
+
     def _discover_nodes_from_yarn(self, address):
         if address.find(':') < 0:
             address += ":8088"
@@ -891,6 +941,7 @@ class Launcher(logger.Logger):
             address = "http://" + address
         address += "/ws/v1/cluster/nodes"
         self.debug("Requesting GET %s", address)
+        from twisted.web.client import getPage
         getPage(address.encode('ascii')).addCallbacks(
             callback=self._parse_yarn_nodes_json,
             errback=lambda error: self.warning(
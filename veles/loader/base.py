@@ -46,11 +46,6 @@ import types
 
 import numpy
 from veles.cmdline import CommandLineArgumentsRegistry
-
-try:
-    from scipy.stats import chisquare
-except ImportError:
-    chisquare = None
 import six
 from zope.interface import implementer, Interface
 
@@ -1007,15 +1002,19 @@ class Loader(Unit):
     def _compare_label_distributions(self, train_dist, other_dist, other_name):
         if sum(other_dist) == 0:
             return
-        if chisquare is not None:
-            _, p = chisquare(other_dist, train_dist)
-            is_the_same = p > 0.95
-            msg = (CLASS_NAME[TRAIN] + u" and %s labels have %s "
-                   u"distributions (Χ-square test's p-value is %.3f)")
-            if is_the_same:
-                self.info(u"OK: " + msg, other_name, u"the same", p)
-            else:
-                self.warning(msg, other_name, u"different", p)
+        try:
+            # scipy.stats takes most of the startup time, so import it lazily
+            from scipy.stats import chisquare
+        except ImportError:
+            return
+        _, p = chisquare(other_dist, train_dist)
+        is_the_same = p > 0.95
+        msg = (CLASS_NAME[TRAIN] + u" and %s labels have %s "
+               u"distributions (Χ-square test's p-value is %.3f)")
+        if is_the_same:
+            self.info(u"OK: " + msg, other_name, u"the same", p)
+        else:
+            self.warning(msg, other_name, u"different", p)
 
     def _with_initialized_callback(self, fn):
         def wrapped_on_initialized(*args, **kwargs):
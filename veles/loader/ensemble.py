@@ -37,6 +37,7 @@ under the License.
 
 import json
 import numpy
+import os
 from zope.interface import implementer, Interface
 
 from .base import TEST, VALID, TRAIN
@@ -67,7 +68,7 @@ class EnsembleLoaderBase(FullBatchLoader):
         outputs = []
         for model in data["models"]:
             mid = model["id"]
-            outputs.append(numpy.array(model["Output"]))
+            outputs.append(self._load_output(model["Output"]))
             if outputs[-1].shape != outputs[0].shape:
                 raise ValueError(
                     "Model with id %s has an invalid output shape %s vs %s "
@@ -82,12 +83,35 @@ class EnsembleLoaderBase(FullBatchLoader):
             self.class_lengths[TRAIN] = self.class_lengths[VALID] = 0
             self.class_lengths[TEST] = len(outputs[0])
 
-    def _fill_original_data(self, outputs, labels):
+    def _load_output(self, output):
+        """Converts the model's output from the results file to numpy
+        array. The output is either embedded into JSON as a list or
+        references .npy file, which is memory mapped then.
+        """
+        if not isinstance(output, dict):
+            return numpy.array(output)
+        path = output["npy"]
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(self.file), path)
+        return numpy.load(path, mmap_mode="r")
+
+    def _fill_original_data(self, outputs, labels, permutations=None):
+        """Stacks the models' outputs into original_data.
+
+        Parameters:
+            outputs: the list of models' outputs.
+            labels: indicates whether to create original_labels.
+            permutations: the list of the output columns' new positions for
+                          each model (None means no reordering).
+        """
         self.create_originals((len(outputs),) + outputs[0].shape[1:],
                               not self.testing and labels)
         for oi, output in enumerate(outputs):
-            for i, v in enumerate(output):
-                self.original_data[i, oi] = v
+            dst = self.original_data.mem[:, oi]
+            if permutations is None or permutations[oi] is None:
+                dst[:] = output
+            else:
+                dst[:, permutations[oi]] = output
 
 
 @implementer(IFullBatchLoader)
@@ -102,6 +126,7 @@ class EnsembleLoader(EnsembleLoaderBase):
         outputs = self._load_outputs(data)
         labels_mapping = None
         reversed_labels_mapping = None
+        permutations = [None] * len(outputs)
         for mi, model in enumerate(data["models"]):
             mid = model["id"]
             labels = model["Labels"]
@@ -116,13 +141,10 @@ class EnsembleLoader(EnsembleLoaderBase):
                         "mapping" % mid)
                 self.warning("Model with id %s has a different labels mapping,"
                              " remapping", mid)
-                # remap labels
-                output = numpy.zeros_like(outputs[mi])
-                for si, (src, dst) in enumerate(zip(outputs[mi], output)):
-                    for i, v in enumerate(src):
-                        dst[labels_mapping[labels[i]]] = v
+                permutations[mi] = numpy.array(
+                    [labels_mapping[label] for label in labels])
         self._fill_class_lengths(outputs)
-        self._fill_original_data(outputs, True)
+        self._fill_original_data(outputs, True, permutations)
         if not self.testing:
             true_labels, format_indices = self.load_winners()
             if format_indices:
@@ -34,28 +34,79 @@ under the License.
 ███████████████████████████████████████████████████████████████████████████████
 """
 
+from collections import deque
 import numpy
 import threading
-from twisted.internet.task import LoopingCall
+from time import time
+from twisted.internet import reactor, threads
 from zope.interface import implementer
 
+from veles.config import root
 from veles.loader.base import Loader, ILoader, TEST, TRAIN, VALID
 from veles.loader.image import ImageLoader
 from veles.mutable import Bool
+from veles.thread_pool import ThreadPool
 
 
 class NotFeededError(Exception):
     pass
 
 
+class StagedBatch(object):
+    """Requests which are collected while the previous minibatch is being
+    processed.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.requests = [None] * len(data)
+        self.size = 0
+        # Number of the reserved slots which are still being filled
+        self.pending = 0
+        self.ready = False
+        # Distinguishes the reuses of the same batch
+        self.serial = 0
+
+    def reset(self):
+        self.requests[:] = [None] * len(self.requests)
+        self.size = 0
+        self.pending = 0
+        self.ready = False
+        self.serial += 1
+
+    @property
+    def full(self):
+        return self.size == len(self.requests)
+
+    @property
+    def complete(self):
+        return self.ready and self.pending == 0
+
+
 @implementer(ILoader)
 class RestfulLoader(Loader):
+    """Collects the requests into minibatches. Each minibatch is served after
+    it becomes full or after its first request has waited long enough to be
+    answered within max_response_time, considering how long the workflow
+    takes to process a minibatch. New requests are staged while the current
+    minibatch is being processed.
+    If preprocessing_threads is greater than 0, the requests are written into
+    their reserved slots by a dedicated thread pool, so that they are
+    preprocessed in parallel and the reactor is not blocked.
+    """
     MAPPING = "restful"
+    # Weight of the last measurement in the workflow run time estimation
+    RUN_TIME_SMOOTHING = 0.2
+    # Whether _feed() is worth running in parallel by default
+    PARALLEL_FEED = False
 
     def __init__(self, workflow, **kwargs):
         super(RestfulLoader, self).__init__(workflow, **kwargs)
         self.complete = Bool(False)
         self.max_response_time = kwargs.get("max_response_time", 0.1)
+        self.preprocessing_threads = kwargs.get(
+            "preprocessing_threads", root.common.api.preprocessing_threads
+            if self.PARALLEL_FEED else 0)
         self._requests = []
 
     def init_unpickled(self):
@@ -63,8 +114,11 @@ class RestfulLoader(Loader):
         self._event_ = threading.Event()
         self._event_.clear()
         self._lock_ = threading.Lock()
-        self._flusher_ = LoopingCall(self.locked_flush)
-        self._minibatch_size_ = 0
+        self._staged_ = deque()
+        self._spare_ = []
+        self._run_time_ = None
+        self._served_time_ = None
+        self._pool_ = None
 
     @property
     def max_response_time(self):
@@ -80,10 +134,44 @@ class RestfulLoader(Loader):
             raise ValueError("max_response_time must be >= 0 (got %s)" % value)
         self._max_response_time = value
 
+    @property
+    def preprocessing_threads(self):
+        return self._preprocessing_threads
+
+    @preprocessing_threads.setter
+    def preprocessing_threads(self, value):
+        if not isinstance(value, int):
+            raise TypeError("preprocessing_threads must be an integer (got "
+                            "%s)" % type(value))
+        if value < 0:
+            raise ValueError(
+                "preprocessing_threads must be >= 0 (got %d)" % value)
+        self._preprocessing_threads = value
+
+    @property
+    def preprocessing_pool(self):
+        if self._pool_ is None and self.preprocessing_threads > 0:
+            self._pool_ = ThreadPool(
+                minthreads=1, maxthreads=self.preprocessing_threads,
+                name="preprocessing")
+            self._pool_.start()
+        return self._pool_
+
     @property
     def requests(self):
         return self._requests
 
+    @property
+    def run_time(self):
+        """The estimated time the workflow takes to process a minibatch.
+        """
+        return self._run_time_ or 0
+
+    @property
+    def staged_size(self):
+        with self._lock_:
+            return sum(b.size for b in self._staged_)
+
     def reset_normalization(self):
         pass
 
@@ -92,47 +180,124 @@ class RestfulLoader(Loader):
         self.class_lengths[TRAIN] = self.class_lengths[VALID] = 0
         del self._requests[:]
         self._requests.extend((None,) * self.max_minibatch_size)
-        self._flusher_.start(self.max_response_time)
 
     def create_minibatch_data(self):
         self.minibatch_data.reset(numpy.zeros(
-            self._minibatch_data_shape, dtype=self.dtype))
+            (self.max_minibatch_size,) + self._minibatch_data_shape[1:],
+            dtype=self.dtype))
 
     def fill_minibatch(self):
-        self._minibatch_size_ = 0
+        if self._served_time_ is not None:
+            self._measure_run_time(time() - self._served_time_)
         try:
             self._event_.wait()
         finally:
             self._event_.clear()
+        with self._lock_:
+            if len(self._staged_) > 0 and self._staged_[0].complete:
+                batch = self._staged_.popleft()
+            else:
+                batch = None
+            self._notify()
+        if batch is None:
+            self.requests[:] = [None] * len(self.requests)
+        else:
+            self.minibatch_data.mem[:batch.size] = batch.data[:batch.size]
+            self.requests[:] = batch.requests
+            with self._lock_:
+                batch.reset()
+                self._spare_.append(batch)
+        self._served_time_ = time()
 
     def stop(self):
-        self._flusher_.stop()
         self._event_.set()
+        if self._pool_ is not None:
+            self._pool_.shutdown()
+            self._pool_ = None
 
     def feed(self, obj, request):
+        """Stages the request. Only the slot reservation is done under the
+        lock. If the slot is filled in parallel, returns the Deferred which
+        fires after it is done.
+        """
         assert isinstance(obj, numpy.ndarray)
         with self._lock_:
-            self._feed(obj, request)
-            self.requests[self._minibatch_size_] = request
-            self._minibatch_size_ += 1
-            if self._minibatch_size_ == self.max_minibatch_size:
-                self.flush()
+            if len(self._staged_) == 0 or self._staged_[-1].full:
+                self._staged_.append(self._new_batch())
+            batch = self._staged_[-1]
+            index = batch.size
+            batch.requests[index] = request
+            batch.size += 1
+            batch.pending += 1
+            if index == 0:
+                reactor.callLater(
+                    max(0, self.max_response_time - self.run_time),
+                    self._expire, batch, batch.serial)
+            if batch.full:
+                self._flush(batch)
+        pool = self.preprocessing_pool
+        if pool is None:
+            self._fill_slot(batch, index, obj, request)
+            return None
+        return threads.deferToThreadPool(
+            reactor, pool, self._fill_slot, batch, index, obj, request)
 
     def locked_flush(self):
         with self._lock_:
             self.flush()
 
     def flush(self):
-        if self._minibatch_size_ > 0:
+        """Serves the collected requests without waiting for more.
+        """
+        for batch in self._staged_:
+            if batch.size > 0:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        batch.ready = True
+        self._notify()
+
+    def _notify(self):
+        if len(self._staged_) > 0 and self._staged_[0].complete:
             self._event_.set()
 
-    def _feed(self, obj, request):
-        self.minibatch_data.mem[self._minibatch_size_] = obj
+    def _fill_slot(self, batch, index, obj, request):
+        try:
+            self._feed(obj, request, batch.data[index])
+        except:
+            # The workflow must not answer the rejected request
+            batch.requests[index] = None
+            raise
+        finally:
+            with self._lock_:
+                batch.pending -= 1
+                self._notify()
+
+    def _expire(self, batch, serial):
+        with self._lock_:
+            if batch.serial == serial and batch.size > 0:
+                self._flush(batch)
+
+    def _new_batch(self):
+        if len(self._spare_) > 0:
+            return self._spare_.pop()
+        return StagedBatch(numpy.zeros_like(self.minibatch_data.mem))
+
+    def _measure_run_time(self, value):
+        if self._run_time_ is None:
+            self._run_time_ = value
+        else:
+            self._run_time_ += self.RUN_TIME_SMOOTHING * (
+                value - self._run_time_)
+
+    def _feed(self, obj, request, dest):
+        dest[...] = obj
 
 
 class RestfulImageLoader(RestfulLoader, ImageLoader):
     MAPPING = "restful_image"
     DISABLE_INTERFACE_VERIFICATION = True
+    PARALLEL_FEED = True
 
     def derive_from(self, loader):
         super(RestfulImageLoader, self).derive_from(loader)
@@ -160,8 +325,7 @@ class RestfulImageLoader(RestfulLoader, ImageLoader):
     def fill_minibatch(self):
         RestfulLoader.fill_minibatch(self)
 
-    def _feed(self, data, request):
+    def _feed(self, data, request, dest):
         color = request.get("color_space", self.color_space)
         bbox = ImageLoader.get_image_bbox(self, None, data.shape[:2])
-        self.minibatch_data.mem[self._minibatch_size_], _, _ = \
-            self.preprocess_image(data, color, True, bbox)
+        dest[...], _, _ = self.preprocess_image(data, color, True, bbox)
@@ -35,14 +35,14 @@ under the License.
 """
 
 
-import bson
 from copy import copy
 import logging.handlers
 import os
-from pymongo import MongoClient
 import re
 from six import StringIO, PY3
+from six.moves import queue
 import sys
+import threading
 import time
 
 if PY3:
@@ -207,8 +207,9 @@ class Logger(object):
         logging.getLogger("Logger").info("Continuing to log in %s", file_name)
 
     @staticmethod
-    def duplicate_all_logging_to_mongo(addr, docid, nodeid):
-        handler = MongoLogHandler(addr=addr, docid=docid, nodeid=nodeid)
+    def duplicate_all_logging_to_mongo(addr, docid, nodeid, **kwargs):
+        handler = MongoLogHandler(addr=addr, docid=docid, nodeid=nodeid,
+                                  **kwargs)
         logging.getLogger("Logger").info("Saving logs to Mongo on %s", addr)
         logging.getLogger().addHandler(handler)
 
@@ -273,31 +274,47 @@ class Logger(object):
         if etype not in ("begin", "end", "single"):
             raise ValueError("Event type must any of the following: 'begin', "
                              "'end', 'single'")
-        for handler in logging.getLogger().handlers:
-            if isinstance(handler, MongoLogHandler):
-                data = {"session": handler.log_id,
-                        "instance": handler.node_id,
-                        "time": time.time(),
-                        "domain": self.__class__.__name__,
-                        "name": name,
-                        "type": etype}
-                dupkeys = set(data.keys()).intersection(set(info.keys()))
-                if len(dupkeys) > 0:
-                    raise ValueError("Event kwargs may not contain %s" %
-                                     dupkeys)
-                data.update(info)
-                handler.events.insert(data, w=0)
+        for handler in MongoLogHandler.instances:
+            handler.add_event(self.__class__.__name__, name, etype, info)
 
 
 class MongoLogHandler(logging.Handler):
-    def __init__(self, addr, docid, nodeid, level=logging.NOTSET):
+    """Saves the log records and the events to MongoDB. They are queued and
+    inserted in batches by the background thread, so that the logging thread
+    never waits for the database. A batch is written as soon as it reaches
+    batch_size documents or flush_interval seconds pass. If the queue is full,
+    the new documents are dropped and counted in "dropped".
+    """
+
+    #: The active handlers, Logger.event() sends the events to them
+    instances = []
+
+    COLLECTIONS = "logs", "events"
+    STOP = object()
+
+    def __init__(self, addr, docid, nodeid, level=logging.NOTSET,
+                 batch_size=256, flush_interval=1.0, queue_size=65536):
         super(MongoLogHandler, self).__init__(level)
-        self._client = MongoClient("mongodb://" + addr)
-        self._db = self._client.veles
-        self._collection = self._db.logs
-        self._events = self._db.events
         self._log_id = docid
         self._node_id = nodeid
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = {name: 0 for name in self.COLLECTIONS}
+        self.failed = 0
+        self._queue = queue.Queue(queue_size)
+        self._connect(addr)
+        self._thread = threading.Thread(
+            target=self._run, name="MongoLogHandler")
+        self._thread.daemon = True
+        self._thread.start()
+        MongoLogHandler.instances.append(self)
+
+    def _connect(self, addr):
+        from pymongo import MongoClient
+        self._client = MongoClient("mongodb://" + addr)
+        self._db = self._client.veles
+        self._collections = {name: self._db[name]
+                             for name in self.COLLECTIONS}
 
     @property
     def log_id(self):
@@ -309,7 +326,7 @@ class MongoLogHandler(logging.Handler):
 
     @property
     def events(self):
-        return self._events
+        return self._collections["events"]
 
     def emit(self, record):
         data = copy(record.__dict__)
@@ -326,7 +343,90 @@ class MongoLogHandler(logging.Handler):
             data["pathname"] = os.path.relpath(data["pathname"], __root__)
         if data["exc_info"] is not None:
             data["exc_info"] = repr(data["exc_info"])
+        self._enqueue("logs", data)
+
+    def add_event(self, domain, name, etype, info):
+        data = {"session": self.log_id,
+                "instance": self.node_id,
+                "time": time.time(),
+                "domain": domain,
+                "name": name,
+                "type": etype}
+        dupkeys = set(data.keys()).intersection(set(info.keys()))
+        if len(dupkeys) > 0:
+            raise ValueError("Event kwargs may not contain %s" % dupkeys)
+        data.update(info)
+        self._enqueue("events", data)
+
+    def flush(self):
+        """Blocks until all the queued documents are written.
+        """
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put((None, done.set))
+        done.wait()
+
+    def close(self):
+        if self in MongoLogHandler.instances:
+            MongoLogHandler.instances.remove(self)
+        if self._thread.is_alive():
+            self._queue.put((None, MongoLogHandler.STOP))
+            self._thread.join()
+        super(MongoLogHandler, self).close()
+        dropped = sum(self.dropped.values())
+        if dropped or self.failed:
+            logging.getLogger("Logger").warning(
+                "MongoDB logging dropped %d log records and %d events, "
+                "failed to write %d documents", self.dropped["logs"],
+                self.dropped["events"], self.failed)
+
+    def _enqueue(self, name, data):
+        try:
+            self._queue.put_nowait((name, data))
+        except queue.Full:
+            self.dropped[name] += 1
+
+    def _run(self):
+        batches = {name: [] for name in self.COLLECTIONS}
+        deadline = time.time() + self.flush_interval
+        while True:
+            try:
+                name, data = self._queue.get(
+                    timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                name = data = None
+            if name is not None:
+                batches[name].append(data)
+                if (len(batches[name]) < self.batch_size and
+                        time.time() < deadline):
+                    continue
+            for bname, batch in batches.items():
+                if batch:
+                    self._write(bname, batch)
+                    del batch[:]
+            deadline = time.time() + self.flush_interval
+            if data is MongoLogHandler.STOP:
+                return
+            if callable(data):
+                # flush() is waiting
+                data()
+
+    def _write(self, name, batch):
+        import bson
+        from pymongo.errors import PyMongoError
         try:
-            self._collection.insert(data, w=0)
+            self._insert(name, batch)
         except bson.errors.InvalidDocument:
-            raise TypeError("bson failed to encode %s" % data)
+            # Find the bad documents and write the rest
+            for data in batch:
+                try:
+                    self._insert(name, [data])
+                except bson.errors.InvalidDocument:
+                    self.failed += 1
+        except PyMongoError:
+            self.failed += len(batch)
+
+    def _insert(self, name, batch):
+        # Unacknowledged bulk insert, as before
+        self._collections[name].insert(batch, w=0, continue_on_error=True)
@@ -120,6 +120,7 @@ class Array(Pickleable):
         devmem: GPU buffer mapped to mem.
         max_supposed: supposed maximum element value.
         map_flags: flags of the current map.
+        version: incremented each time mem is replaced or mapped for writing.
         _map_arr_: address of the mapping if any exists.
 
     Example of how to use:
@@ -195,11 +196,21 @@ class Array(Pickleable):
                 "Attempted to set Array's mem to something which is not a "
                 "numpy array: %s of type %s" % (value, type(value)))
         self._mem = value
+        self._version_ += 1
 
     @property
     def devmem(self):
         return self._devmem_
 
+    @property
+    def version(self):
+        """
+        :return: The counter of the host buffer changes. It is incremented by
+           map_write(), map_invalidate(), [] assignment and setting mem, so
+           the copies of the array can tell whether they are outdated.
+        """
+        return self._version_
+
     @property
     def max_supposed(self):
         """
@@ -265,6 +276,7 @@ class Array(Pickleable):
         self._map_arr_ = None
         self.map_flags = 0
         self.lock_ = threading.Lock()
+        self._version_ = 0
 
     def min(self, *args, **kwargs):
         return self.mem.min(*args, **kwargs)
@@ -327,6 +339,7 @@ class Array(Pickleable):
         """To enable [] operator.
         """
         self._mem[key] = value
+        self._version_ += 1
 
     if six.PY3:
         @staticmethod
@@ -373,10 +386,12 @@ class Array(Pickleable):
 
     @threadsafe
     def map_write(self):
+        self._version_ += 1
         return self._backend_map_write_()
 
     @threadsafe
     def map_invalidate(self):
+        self._version_ += 1
         return self._backend_map_invalidate_()
 
     @threadsafe
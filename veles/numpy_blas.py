@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 28, 2015
+
+BLAS class to use with numpy backend.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import numpy
+from scipy.linalg import blas
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+from veles.config import root
+from veles.logger import Logger
+from veles.numpy_ext import ravel
+
+# The same values as cuda4py.blas.CUBLAS_OP_N and CUBLAS_OP_T
+OP_N = 0
+OP_T = 1
+
+
+class NumpyBLAS(Logger):
+    """Class with BLAS functionality similar to CUBLAS which calls the CPU
+    BLAS directly.
+
+    The matrices are viewed in place as column-major ones with the offsets,
+    the transposition is passed to BLAS and C is accumulated in place, so
+    there are no temporary copies.
+    """
+    def __init__(self, threads=None):
+        super(NumpyBLAS, self).__init__()
+        if threads is None:
+            threads = root.common.engine.numpy.blas_threads
+        self._limits = None
+        if threads > 0:
+            if threadpool_limits is None:
+                self.warning("threadpoolctl is not installed, unable to set "
+                             "the number of BLAS threads to %d", threads)
+            else:
+                self._limits = threadpool_limits(threads, user_api="blas")
+                self.debug("Limited BLAS to %d threads", threads)
+
+    @staticmethod
+    def gemm(dtype):
+        if dtype == numpy.float32:
+            return NumpyBLAS.sgemm
+        if dtype == numpy.float64:
+            return NumpyBLAS.dgemm
+        raise ValueError("Invalid dtype %s" % dtype)
+
+    def sgemm(self, transA, transB,
+              rowsCountA, columnCountB, commonSideLength,
+              alpha, A, B, beta, C, offsetA=0, offsetB=0, offsetC=0):
+        """Does a matrix multiplication like in CUBLAS using sgemm.
+
+        Matricies are assumed to be tightly packed and stored like in CUBLAS.
+
+        Single precision (float) version.
+        """
+        self._gemm(blas.sgemm, numpy.float32, transA, transB,
+                   rowsCountA, columnCountB, commonSideLength,
+                   alpha, A, B, beta, C, offsetA, offsetB, offsetC)
+
+    def dgemm(self, transA, transB,
+              rowsCountA, columnCountB, commonSideLength,
+              alpha, A, B, beta, C, offsetA=0, offsetB=0, offsetC=0):
+        """Does a matrix multiplication like in CUBLAS using dgemm.
+
+        Matricies are assumed to be tightly packed and stored like in CUBLAS.
+
+        Double precision (double) version.
+        """
+        self._gemm(blas.dgemm, numpy.float64, transA, transB,
+                   rowsCountA, columnCountB, commonSideLength,
+                   alpha, A, B, beta, C, offsetA, offsetB, offsetC)
+
+    @staticmethod
+    def column_major(mem, offset, rows, cols):
+        """Returns the Fortran ordered view of the tightly packed column-major
+        matrix which starts at offset.
+        """
+        return ravel(mem)[offset:offset + rows * cols].reshape(
+            cols, rows).transpose()
+
+    def _gemm(self, fn, dtype, transA, transB,
+              rowsCountA, columnCountB, commonSideLength,
+              alpha, A, B, beta, C, offsetA, offsetB, offsetC):
+        for name, mem in (("A", A), ("B", B), ("C", C)):
+            if mem.dtype != dtype:
+                raise TypeError("%s must be of %s type (got %s)" %
+                                (name, numpy.dtype(dtype), mem.dtype))
+        m, n, k = rowsCountA, columnCountB, commonSideLength
+        if transA == OP_N:
+            a = self.column_major(A, offsetA, m, k)
+        else:
+            a = self.column_major(A, offsetA, k, m)
+        if transB == OP_N:
+            b = self.column_major(B, offsetB, k, n)
+        else:
+            b = self.column_major(B, offsetB, n, k)
+        c = self.column_major(C, offsetC, m, n)
+        res = fn(numpy.ravel(alpha)[0], a, b, beta=numpy.ravel(beta)[0], c=c,
+                 trans_a=int(transA != OP_N), trans_b=int(transB != OP_N),
+                 overwrite_c=1)
+        if not numpy.may_share_memory(res, c):
+            # BLAS could not write to C in place
+            c[:] = res
@@ -33,13 +33,17 @@ under the License.
 """
 
 
+import hashlib
 from importlib import import_module
+import numpy
+from six.moves import cPickle as pickle
 from time import time
 from zope.interface import implementer
 
+from veles.config import root
 from veles.distributable import TriviallyDistributable
 from veles.memory import Array
-from veles.iplotter import IPlotter  # pylint: disable=W0611
+from veles.iplotter import IPlotter, PlotterUpdate  # pylint: disable=W0611
 from veles.graphics_server import GraphicsServer
 from veles.units import Unit, IUnit
 
@@ -64,6 +68,8 @@ class Plotter(Unit, TriviallyDistributable):
         kwargs["view_group"] = view_group
         super(Plotter, self).__init__(workflow, **kwargs)
         self.redraw_threshold = 2
+        self.pixel_budget = kwargs.get(
+            "pixel_budget", root.common.graphics.pixel_budget)
         self._last_run_ = 0
         self._remembers_gates = False
         self._server_ = None
@@ -72,6 +78,8 @@ class Plotter(Unit, TriviallyDistributable):
         super(Plotter, self).init_unpickled()
         for pkg in self.MATPLOTLIB_PKG_MAPPING:
             setattr(self, "_%s_" % pkg, None)
+        self._sequence_ = 0
+        self._sent_state_ = None
 
     @property
     def matplotlib(self):
@@ -154,8 +162,75 @@ class Plotter(Unit, TriviallyDistributable):
         assert self.graphics_server is not None
         self._last_run_ = time()
         self.stripped_pickle = True
-        self.graphics_server.enqueue(self)
-        self.stripped_pickle = False
+        try:
+            update = self.make_update()
+        finally:
+            self.stripped_pickle = False
+        self.graphics_server.enqueue(update)
+
+    def make_update(self):
+        """Builds the next message to GraphicsClient. The full state is sent
+        the first time and then every
+        root.common.graphics.full_update_interval updates, so that the
+        clients which connected later or lost a message catch up. Otherwise,
+        only the changed attributes are sent, and the lists which were only
+        appended to are sent as the appended tail.
+        Must be called with stripped_pickle set.
+        """
+        state = self.__getstate__()
+        self._sequence_ += 1
+        interval = root.common.graphics.full_update_interval
+        sent = self._sent_state_
+        full = (sent is None or not interval or set(sent) != set(state) or
+                (self._sequence_ - 1) % interval == 0)
+        changes = {}
+        fingerprints = {}
+        for name, value in state.items():
+            fingerprint = self._fingerprint(value)
+            fingerprints[name] = fingerprint
+            if full:
+                continue
+            change = self._diff(sent[name], fingerprint, value)
+            if change is not None:
+                changes[name] = change
+        self._sent_state_ = fingerprints
+        if full:
+            return PlotterUpdate(type(self), self.id, self._sequence_,
+                                 state=state)
+        return PlotterUpdate(type(self), self.id, self._sequence_,
+                             changes=changes)
+
+    @staticmethod
+    def _fingerprint(value):
+        """Remembers the sent value in the form which is cheap to compare
+        with the next one. Lists are remembered by reference, length and
+        the last item, so that appending stays O(1); the rest by digest.
+        """
+        if isinstance(value, list):
+            return list, (value, len(value), value[-1] if value else None)
+        if isinstance(value, numpy.ndarray) and not value.dtype.hasobject:
+            return numpy.ndarray, (value.shape, value.dtype.str, hashlib.sha1(
+                numpy.ascontiguousarray(value).view(numpy.uint8)).digest())
+        return None, hashlib.sha1(pickle.dumps(
+            value, protocol=pickle.HIGHEST_PROTOCOL)).digest()
+
+    @staticmethod
+    def _diff(fingerprint, new_fingerprint, value):
+        kind, sent = fingerprint
+        new_kind, new = new_fingerprint
+        if kind is not new_kind:
+            return PlotterUpdate.SET, value
+        if kind is list:
+            sent_list, length, last = sent
+            # Items replaced in the middle are caught by the next full update
+            if value is sent_list and len(value) >= length and (
+                    length == 0 or value[length - 1] is last):
+                if len(value) == length:
+                    return None
+                return PlotterUpdate.APPEND, value[length:]
+        elif sent == new:
+            return None
+        return PlotterUpdate.SET, value
 
     def fill(self):
         pass
@@ -177,3 +252,89 @@ class Plotter(Unit, TriviallyDistributable):
     def set_matplotlib(self, pkgs):
         for key, val in pkgs.items():
             setattr(self, key, val)
+
+
+def lttb(x, y, count):
+    """Downsamples the series to "count" points using Largest-Triangle-Three-
+    Buckets algorithm, which preserves the visual shape of the plot.
+
+    Returns:
+        tuple (x, y) of the selected points.
+    """
+    size = len(y)
+    if count >= size or count < 3:
+        return x, y
+    every = (size - 2) / (count - 2)
+    edges = (numpy.arange(count - 1) * every).astype(numpy.int64) + 1
+    edges[-1] = size - 1
+    indices = numpy.zeros(count, dtype=numpy.int64)
+    selected = 0
+    for i in range(count - 2):
+        begin, end = edges[i], edges[i + 1]
+        if i < count - 3:
+            next_begin, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_begin, next_end = size - 1, size
+        avg_x = x[next_begin:next_end].mean()
+        avg_y = y[next_begin:next_end].mean()
+        sx, sy = x[selected], y[selected]
+        areas = numpy.abs((sx - avg_x) * (y[begin:end] - sy) -
+                          (sx - x[begin:end]) * (avg_y - sy))
+        selected = begin + int(areas.argmax())
+        indices[i + 1] = selected
+    indices[-1] = size - 1
+    return x[indices], y[indices]
+
+
+def minmax(x, y, count):
+    """Downsamples the series to at most "count" points, keeping the minimum
+    and the maximum of each of count / 2 buckets, so that no peak is lost.
+
+    Returns:
+        tuple (x, y) of the selected points.
+    """
+    size = len(y)
+    buckets = count // 2
+    if count >= size or buckets < 1:
+        return x, y
+    edges = numpy.linspace(0, size, buckets + 1).astype(numpy.int64)
+    indices = []
+    for begin, end in zip(edges[:-1], edges[1:]):
+        chunk = y[begin:end]
+        indices.extend(sorted({begin + int(chunk.argmin()),
+                               begin + int(chunk.argmax())}))
+    return x[indices], y[indices]
+
+
+def block_mean(image, max_side):
+    """Downscales the image by averaging square blocks of pixels, so that
+    neither side exceeds max_side. The channels (the third dimension) are
+    averaged independently.
+    """
+    if max_side <= 0:
+        return image
+    factor = -(-max(image.shape[:2]) // max_side)
+    if factor <= 1:
+        return image
+    pad = [(0, -image.shape[0] % factor), (0, -image.shape[1] % factor)]
+    if pad[0][1] or pad[1][1]:
+        image = numpy.pad(image, pad + [(0, 0)] * (image.ndim - 2),
+                          mode="edge")
+    shape = (image.shape[0] // factor, factor,
+             image.shape[1] // factor, factor) + image.shape[2:]
+    return image.reshape(shape).mean(axis=(1, 3))
+
+
+def group_sum(values, count, axis=0):
+    """Sums the adjacent elements of the array along the axis, so that its
+    size becomes not greater than count.
+
+    Returns:
+        tuple (the reduced array, the number of elements in each group).
+    """
+    size = values.shape[axis]
+    group = -(-size // count) if count > 0 else 1
+    if group <= 1:
+        return values, 1
+    return numpy.add.reduceat(values, numpy.arange(0, size, group),
+                              axis=axis), group
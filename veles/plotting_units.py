@@ -44,7 +44,8 @@ from veles.memory import Array
 from veles.compat import from_none
 from veles.distributable import IDistributable
 from veles.mutable import Bool
-from veles.plotter import Plotter, IPlotter
+from veles.plotter import Plotter, IPlotter, lttb, minmax, block_mean, \
+    group_sum
 from veles.units import nothing
 
 
@@ -205,14 +206,51 @@ class MatrixPlotter(Plotter):
         self.show_figure = nothing
         self.demand("input", "input_field", "reversed_labels_mapping")
 
-    def redraw(self):
-        self.pp.ioff()
+    #: The minimal size of a cell in pixels
+    CELL_PIXELS = 24
+
+    def __getstate__(self):
+        state = super(MatrixPlotter, self).__getstate__()
+        if self.stripped_pickle:
+            value = self._get_value()
+            if value is not None:
+                value, labels = self._reduce(
+                    numpy.asarray(value), self.reversed_labels_mapping)
+                state["input"] = [value]
+                state["input_field"] = 0
+                state["reversed_labels_mapping"] = labels
+        return state
+
+    def _get_value(self):
         if isinstance(self.input_field, int):
             if self.input_field < 0 or self.input_field >= len(self.input):
-                return
-            value = self.input[self.input_field]
-        else:
-            value = self.input.__dict__[self.input_field]
+                return None
+            return self.input[self.input_field]
+        return self.input.__dict__[self.input_field]
+
+    def _reduce(self, value, labels):
+        """Sums the adjacent rows and columns if there are too many classes
+        to fit into the pixel budget. The labels become ranges.
+        """
+        if not self.pixel_budget:
+            return value, labels
+        count = max(self.pixel_budget // self.CELL_PIXELS, 1)
+        value, group = group_sum(value, count, axis=0)
+        if group == 1:
+            return value, labels
+        value, _ = group_sum(value, count, axis=1)
+        size = len(labels)
+        reduced = {}
+        for i, begin in enumerate(range(0, size, group)):
+            end = min(begin + group, size) - 1
+            reduced[i] = "%s-%s" % (labels[begin], labels[end])
+        return value, reduced
+
+    def redraw(self):
+        self.pp.ioff()
+        value = self._get_value()
+        if value is None:
+            return
 
         figure = self.pp.figure(self.name)
         figure.clf()
@@ -403,16 +441,18 @@ class ImagePlotter(Plotter):
                     value = self.inputs[i].__dict__[input_field]
                     if isinstance(self.inputs[i], Array):
                         value = value[0]
-                pics_to_draw.append(self._prepare_image(value)
-                                    if isinstance(value, numpy.ndarray)
-                                    else str(value))
+                pics_to_draw.append(
+                    self._prepare_image(value, max(
+                        self.pixel_budget // len(self.input_fields), 1)
+                        if self.pixel_budget else 0)
+                    if isinstance(value, numpy.ndarray) else str(value))
 
             state["inputs"] = None
             state["input_fields"] = None
             state["_pics_to_draw"] = pics_to_draw
         return state
 
-    def _prepare_image(self, value):
+    def _prepare_image(self, value, max_side=0):
         l = len(value.shape)
         if l == 2:
             sy = value.shape[0]
@@ -442,7 +482,7 @@ class ImagePlotter(Plotter):
             value = value.reshape(sy, sx)
 
         # Normalize value and convert to uint8
-        value = value.astype(numpy.float32).copy()
+        value = block_mean(value.astype(numpy.float32), max_side).copy()
         value -= value.min()
         mx = value.max()
         if mx:
@@ -494,9 +534,12 @@ class ImmediatePlotter(Plotter):
         input_fields: list of fields for corresponding input.
         input_styles: pyplot line styles for corresponding input.
         ylim: bounds of the plot y-axis.
+        downsampling: "lttb" or "minmax" - the way the series longer than
+        pixel_budget are reduced before sending.
     """
 
     DEFAULT_STYLES = ["k-", "g-", "b-"]
+    DOWNSAMPLERS = {"lttb": lttb, "minmax": minmax}
 
     def __init__(self, workflow, **kwargs):
         kwargs["name"] = kwargs.get("name")
@@ -505,17 +548,25 @@ class ImmediatePlotter(Plotter):
         self.input_fields = []
         self.input_styles = []
         self.ylim = kwargs.get("ylim")
+        self.downsampling = kwargs.get("downsampling", "lttb")
+        if self.downsampling not in self.DOWNSAMPLERS:
+            raise ValueError("downsampling must be one of %s (got %s)" % (
+                sorted(self.DOWNSAMPLERS), self.downsampling))
+        self._series = None
         self.pp = None
         self.show_figure = nothing
 
-    def redraw(self):
-        figure = self.pp.figure(self.name)
-        figure.clf()
-        ax = figure.add_subplot(111)
-        ax.cla()
-        if self.ylim is not None:
-            ax.set_ylim(self.ylim[0], self.ylim[1])
+    def __getstate__(self):
+        state = super(ImmediatePlotter, self).__getstate__()
+        if self.stripped_pickle:
+            state["_series"] = self._collect_series()
+            state["inputs"] = None
+            state["input_fields"] = None
+        return state
 
+    def _collect_series(self):
+        series = []
+        downsample = self.DOWNSAMPLERS[self.downsampling]
         for i, input_field in enumerate(self.input_fields):
             value = None
             if isinstance(input_field, int):
@@ -523,8 +574,32 @@ class ImmediatePlotter(Plotter):
                     value = self.inputs[i][input_field]
             else:
                 value = self.inputs[i].__dict__[input_field]
+            if value is None:
+                series.append(None)
+                continue
+            value = numpy.ravel(value)
+            x = numpy.arange(len(value))
+            if self.pixel_budget:
+                x, value = downsample(x, value, self.pixel_budget)
+            series.append((x, value))
+        return series
 
-            ax.plot(value, self.input_styles[i] if i < len(self.input_styles)
+    def redraw(self):
+        figure = self.pp.figure(self.name)
+        figure.clf()
+        ax = figure.add_subplot(111)
+        ax.cla()
+        if self.ylim is not None:
+            ax.set_ylim(self.ylim[0], self.ylim[1])
+
+        series = self._series
+        if series is None:
+            series = self._collect_series()
+        for i, points in enumerate(series):
+            if points is None:
+                continue
+            ax.plot(points[0], points[1],
+                    self.input_styles[i] if i < len(self.input_styles)
                     else ImmediatePlotter.DEFAULT_STYLES[i])
 
         self.show_figure(figure)
@@ -541,10 +616,33 @@ class Histogram(Plotter):
         x: bar coordinates on the horizontal axis.
         y: bar heights.
     """
+
+    #: The minimal width of a bar in pixels
+    BAR_PIXELS = 8
+
     def __init__(self, workflow, **kwargs):
         super(Histogram, self).__init__(workflow, **kwargs)
         self.require_input()
 
+    def __getstate__(self):
+        state = super(Histogram, self).__getstate__()
+        if self.stripped_pickle and "x" in state and "y" in state:
+            state["x"], state["y"] = self._rebin(state["x"], state["y"])
+        return state
+
+    @property
+    def max_bars(self):
+        return max(self.pixel_budget // self.BAR_PIXELS, 1) \
+            if self.pixel_budget else 0
+
+    def _rebin(self, x, y):
+        """Merges the adjacent bars if there are too many of them.
+        """
+        if not self.max_bars or len(y) <= self.max_bars:
+            return x, y
+        y, group = group_sum(numpy.asarray(y), self.max_bars)
+        return numpy.asarray(x)[::group], y
+
     def require_input(self):
         self.demand("x", "y")
 
@@ -633,10 +731,36 @@ class AutoHistogramPlotter(Histogram):
     """
     def __init__(self, workflow, **kwargs):
         super(AutoHistogramPlotter, self).__init__(workflow, **kwargs)
+        self._histogram = None
+
+    def __getstate__(self):
+        state = super(AutoHistogramPlotter, self).__getstate__()
+        if self.stripped_pickle:
+            # Send the bins instead of the raw series
+            state["_histogram"] = self.histogram
+            state["input"] = None
+        return state
 
     def require_input(self):
         self.demand("input")
 
+    @property
+    def histogram(self):
+        """
+        :return: tuple (x, y, min, max) binned with numpy or None if there
+        is too little data.
+        """
+        if self.input is None:
+            # This is the replica in the graphics client
+            return self._histogram
+        if len(self.input) < 2:
+            return None
+        nbins = self.nbins
+        if self.max_bars:
+            nbins = min(nbins, self.max_bars)
+        y, edges = numpy.histogram(self.input, int(nbins))
+        return edges[:-1], y, edges[0], edges[-1]
+
     @property
     def bin_size(self):
         """
@@ -657,22 +781,22 @@ class AutoHistogramPlotter(Histogram):
 
     @property
     def x(self):
-        return numpy.arange(self.gl_min, self.gl_max, self.bin_size)
+        return self.histogram[0]
 
     @property
     def y(self):
-        return numpy.histogram(self.input, self.nbins)[0]
+        return self.histogram[1]
 
     @property
     def gl_min(self):
-        return numpy.min(self.input)
+        return self.histogram[2]
 
     @property
     def gl_max(self):
-        return numpy.max(self.input)
+        return self.histogram[3]
 
     def redraw(self):
-        if len(self.input) < 2:
+        if self.histogram is None:
             return
         super(AutoHistogramPlotter, self).redraw()
 
@@ -691,14 +815,24 @@ class MultiHistogram(Plotter):
         self.value = Array()
         self.n_bars = kwargs.get("n_bars", 25)
         self.hist_number = kwargs.get("hist_number", 16)
+        self.ranges = None
         self.demand("input")
 
+    def __getstate__(self):
+        state = super(MultiHistogram, self).__getstate__()
+        if self.stripped_pickle:
+            # The histograms are binned in fill(), only their ranges are
+            # needed from the input
+            state["input"] = None
+        return state
+
     def initialize(self, **kwargs):
         super(MultiHistogram, self).initialize(**kwargs)
         if self.hist_number > self.limit:
             self.hist_number = self.limit
         self.value.mem = numpy.zeros(
             [self.hist_number, self.n_bars], dtype=numpy.int64)
+        self.ranges = numpy.zeros([self.hist_number, 2])
 
     def redraw(self):
         fig = self.pp.figure(self.name)
@@ -719,8 +853,7 @@ class MultiHistogram(Plotter):
                 # ax.set_ylabel("Number", fontsize=10)
                 ymin = self.value[i].min()
                 ymax = self.value[i].max()
-                xmin = self.input[i].min()
-                xmax = self.input[i].max()
+                xmin, xmax = self.ranges[i]
                 ax.axis([xmin, xmax + ((xmax - xmin) / self.n_bars), ymin,
                          ymax])
                 ax.grid(True)
@@ -750,19 +883,20 @@ class MultiHistogram(Plotter):
         return fig
 
     def fill(self):
+        self.value.map_write()
+        self.input.map_read()
         for i in range(self.hist_number):
-            self.value.map_write()
-            self.input.map_read()
-            mx = self.input.mem[i].max()
-            mi = self.input.mem[i].min()
+            row = self.input.mem[i].ravel()
+            mx = row.max()
+            mi = row.min()
+            self.ranges[i] = mi, mx
             d = mx - mi
             if not d:
                 return
             d = (self.n_bars - 1) / d
-            self.value[i] = 0
-            for x in self.input.mem[i]:
-                i_bar = int(numpy.floor((x - mi) * d))
-                self.value[i, i_bar] += 1
+            self.value.mem[i] = numpy.bincount(
+                numpy.floor((row - mi) * d).astype(numpy.int64),
+                minlength=self.n_bars)
 
 
 @implementer(IPlotter)
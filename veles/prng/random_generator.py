@@ -37,7 +37,6 @@ under the License.
 
 import numpy
 import os
-import threading
 from veles.compat import PYPY
 
 from veles.config import root
@@ -62,28 +61,33 @@ numpy.random = WrappedRandom()
 
 
 class RandomGenerator(Pickleable):
-    """Random generator with exact reproducibility property.
+    """Random generator with exact reproducibility property. Each instance
+    owns an independent Mersenne Twister (numpy.random.RandomState), so the
+    generators do not share any global state or lock.
 
     Attributes:
         state: the random generator state.
     """
 
-    _lock = threading.Lock()
-
-    def threadsafe(fn):
-        def wrapped(*args, **kwargs):
-            with RandomGenerator._lock:
-                res = fn(*args, **kwargs)
-            return res
-        name = getattr(fn, '__name__', getattr(fn, 'func', wrapped).__name__)
-        wrapped.__name__ = name + '_threadsafe'
-        return wrapped
-
     def __init__(self, key):
         super(RandomGenerator, self).__init__()
         self._key = key
-        self._saved_state = None
-        self.restore_state()
+
+    def init_unpickled(self):
+        super(RandomGenerator, self).init_unpickled()
+        self._generator_ = my_random.RandomState()
+        state = getattr(self, "_state", None)
+        if state is None and my_random.get_state is not None:
+            # A new generator continues the global one
+            state = my_random.get_state()
+        if state is not None:
+            self._generator_.set_state(state)
+        self._state = None
+
+    def __getstate__(self):
+        state = super(RandomGenerator, self).__getstate__()
+        state["_state"] = self.state
+        return state
 
     @property
     def key(self):
@@ -91,21 +95,18 @@ class RandomGenerator(Pickleable):
 
     @property
     def state(self):
-        return self._state
+        return self._generator_.get_state()
 
     @state.setter
     def state(self, vle):
-        self._state = vle
+        self._generator_.set_state(vle)
 
     @property
     def seed_file_name(self):
         return os.path.join(root.common.dirs.cache,
                             "random_seed_%s.npy" % str(self.key))
 
-    @threadsafe
     def seed(self, seed, dtype=None, count=None):
-        self._state = None
-        self.save_state()
         if seed is None:
             seed = numpy.fromfile(self.seed_file_name)
         elif isinstance(seed, str):
@@ -116,9 +117,9 @@ class RandomGenerator(Pickleable):
                 n = fin.readinto(seed)
             seed = seed[:n // seed[0].nbytes]
         try:
-            my_random.seed(seed)
+            self._generator_.seed(seed)
         except ValueError:
-            my_random.seed(seed.view(numpy.uint32))
+            self._generator_.seed(seed.view(numpy.uint32))
         if not PYPY:
             numpy.save(self.seed_file_name, seed)
         else:
@@ -127,47 +128,24 @@ class RandomGenerator(Pickleable):
                     fout.write(bytes(seed.data))
                 else:
                     fout.write(bytes(numpy.asarray((seed,)).data))
-        self.restore_state()
 
-    def preserve_state(fn):
-        def wrapped_preserve_state(self, *args, **kwargs):
-            self.save_state()
-            retval = fn(self, *args, **kwargs)
-            self.restore_state()
-            return retval
-
-        wrapped_preserve_state.__name__ = "wrapped_" + fn.__name__
-        return wrapped_preserve_state
-
-    @threadsafe
-    @preserve_state
     def normal(self, loc=0.0, scale=1.0, size=None):
         """numpy.normal() with saving the random state.
         """
-        return my_random.normal(loc=loc, scale=scale, size=size)
+        return self._generator_.normal(loc=loc, scale=scale, size=size)
 
-    @threadsafe
-    @preserve_state
     def uniform(self, low=0.0, high=1.0, size=None):
-        return my_random.uniform(low=low, high=high, size=size)
+        return self._generator_.uniform(low=low, high=high, size=size)
 
-    @threadsafe
-    @preserve_state
     def random(self, size=None):
-        return my_random.random(size=size)
+        return self._generator_.random_sample(size=size)
 
-    @threadsafe
-    @preserve_state
     def choice(self, a, size=None, replace=True, p=None):
-        return my_random.choice(a, size=size, replace=replace, p=p)
+        return self._generator_.choice(a, size=size, replace=replace, p=p)
 
-    @threadsafe
-    @preserve_state
     def bytes(self, length):
-        return my_random.bytes(length)
+        return self._generator_.bytes(length)
 
-    @threadsafe
-    @preserve_state
     def fill(self, arr, vle_min=-1.0, vle_max=1.0):
         """Fills numpy array with random numbers.
 
@@ -177,11 +155,9 @@ class RandomGenerator(Pickleable):
             vle_max: maximum value in random distribution.
         """
         arr = ravel(arr)
-        arr[:] = (my_random.rand(arr.size) * (vle_max - vle_min) +
+        arr[:] = (self._generator_.rand(arr.size) * (vle_max - vle_min) +
                   vle_min)[:]
 
-    @threadsafe
-    @preserve_state
     def fill_normal_real(self, arr, mean, stddev, clip_to_sigma=5.0):
         """
         #Fills real-valued numpy array with random normal distribution.
@@ -193,18 +169,17 @@ class RandomGenerator(Pickleable):
         #    min_val, max_val (optional): clipping values of output data.
         """
         arr = ravel(arr)
-        arr[:] = my_random.normal(loc=mean, scale=stddev, size=arr.size)[:]
+        arr[:] = self._generator_.normal(
+            loc=mean, scale=stddev, size=arr.size)[:]
 
         numpy.clip(arr, mean - clip_to_sigma * stddev,
                    mean + clip_to_sigma * stddev, out=arr)
 
-    @threadsafe
-    @preserve_state
     def shuffle(self, arr):
         """numpy.shuffle() with saving the random state.
         """
-        if my_random.shuffle is not None:
-            my_random.shuffle(arr)
+        if getattr(self._generator_, "shuffle", None) is not None:
+            self._generator_.shuffle(arr)
         else:
             import logging
             logging.getLogger(self.__class__.__name__).warning(
@@ -213,61 +188,34 @@ class RandomGenerator(Pickleable):
             for i in range(n):
                 j = n + 1
                 while j >= n + 1:  # pypy workaround
-                    j = my_random.randint(i, n + 1)
+                    j = self._generator_.randint(i, n + 1)
                 t = arr[i]
                 arr[i] = arr[j]
                 arr[j] = t
 
-    @threadsafe
-    @preserve_state
     def permutation(self, x):
         """numpy.permutation() with saving the random state.
         """
-        return my_random.permutation(x)
+        return self._generator_.permutation(x)
 
-    @threadsafe
-    @preserve_state
     def randint(self, low, high=None, size=None):
         """Returns random integer(s) from [low, high).
         """
-        return my_random.randint(low, high, size)
+        return self._generator_.randint(low, high, size)
 
-    @threadsafe
-    @preserve_state
     def random_sample(self, size=None):
         """Returns random integer(s) from [low, high).
         """
-        return my_random.random_sample(size)
+        return self._generator_.random_sample(size)
 
-    @threadsafe
-    @preserve_state
     def rand(self, *args):
-        return my_random.rand(*args)
+        return self._generator_.rand(*args)
 
     def __call__(self, *args):
         return self.rand(*args)
 
-    def save_state(self):
-        if my_random.get_state is None:
-            return
-        self._saved_state = my_random.get_state()
-        if self._state is not None:
-            my_random.set_state(self._state)
-
-    def restore_state(self):
-        if my_random.get_state is None:
-            return
-        self._state = my_random.get_state()
-        if self._saved_state is not None:
-            my_random.set_state(self._saved_state)
-
     def _get_state(self):
-        if my_random.get_state is None:
-            return None
-        return my_random.get_state()
-
-    threadsafe = staticmethod(threadsafe)
-    preserve_state = staticmethod(preserve_state)
+        return self.state
 
 
 def xorshift128plus(states, index):
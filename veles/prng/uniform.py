@@ -57,6 +57,11 @@ class Uniform(AcceleratedUnit):
     """
 
     backend_methods = AcceleratedUnit.backend_methods + ("fill",)
+    # xorshift1024* constants
+    SHIFT_A = numpy.uint64(31)
+    SHIFT_B = numpy.uint64(11)
+    SHIFT_C = numpy.uint64(30)
+    MULTIPLIER = numpy.uint64(1181783497276652981)
 
     def __init__(self, workflow, **kwargs):
         super(Uniform, self).__init__(workflow, **kwargs)
@@ -135,32 +140,29 @@ class Uniform(AcceleratedUnit):
         self.output.map_invalidate()
         n_rounds = nbytes // bytes_per_round
 
-        u64 = numpy.array([1181783497276652981], dtype=numpy.uint64)
-        s0 = numpy.zeros(1, dtype=numpy.uint64)
-        s1 = numpy.zeros(1, dtype=numpy.uint64)
-
-        states = self.states.mem.view(dtype=numpy.uint64)
-        states = states.reshape(states.size // 16, 16)
-        output = self.output.mem.view(dtype=numpy.uint64)
-        for i in range(self.num_states):
-            offs = i
-            s = states[i]
-            self.p = 0
-            for _round in range(n_rounds):
-                for _iter in range(16):
-                    output[offs] = self._next_rand(s, s0, s1, u64)
-                    offs += self.num_states
-
-    def _next_rand(self, s, s0, s1, u64):
-        s0[0] = s[self.p]
-        self.p = (self.p + 1) & 15
-        s1[0] = s[self.p]
-        s1 ^= s1 << 31
-        s1 ^= s1 >> 11
-        s0 ^= s0 >> 30
-        s0 ^= s1
-        s[self.p] = s0[0]
-        return (s0 * u64)[0]
+        # All the states are advanced at once, exactly like the kernel
+        # threads do; s[p] is the p-th word of every state
+        states = self.states.mem.view(dtype=numpy.uint64).reshape(
+            self.num_states, 16)
+        s = states.transpose().copy()
+        output = self.output.mem.view(dtype=numpy.uint64)[
+            :n_rounds * 16 * self.num_states].reshape(
+            n_rounds * 16, self.num_states)
+        s0 = numpy.empty(self.num_states, dtype=numpy.uint64)
+        s1 = numpy.empty_like(s0)
+        tmp = numpy.empty_like(s0)
+        for offs in range(n_rounds * 16):
+            p = offs & 15
+            q = (p + 1) & 15
+            numpy.right_shift(s[p], self.SHIFT_C, out=s0)
+            s0 ^= s[p]
+            numpy.left_shift(s[q], self.SHIFT_A, out=s1)
+            s1 ^= s[q]
+            numpy.right_shift(s1, self.SHIFT_B, out=tmp)
+            s1 ^= tmp
+            numpy.bitwise_xor(s0, s1, out=s[q])
+            numpy.multiply(s[q], self.MULTIPLIER, out=output[offs])
+        states[:] = s.transpose()
 
     def fill(self, nbytes):
         self._backend_fill_(nbytes)
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 19, 2015
+
+Pool of local worker subprocesses pinned to CPU sets.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+from collections import deque
+from glob import glob
+import multiprocessing
+import os
+import subprocess
+import time
+
+from veles.logger import Logger
+
+
+NUMA_NODES_PATH = "/sys/devices/system/node"
+
+
+def parse_cpu_list(text):
+    """Parses Linux CPU list format, e.g. "0-3,8,10-11".
+    """
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def get_numa_nodes():
+    """Returns the list of CPU lists, one per NUMA node. If the topology is
+    unknown, all CPUs are considered to belong to the same node.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        allowed = os.sched_getaffinity(0)
+    else:
+        allowed = set(range(multiprocessing.cpu_count()))
+    nodes = []
+    for path in sorted(glob(os.path.join(NUMA_NODES_PATH, "node*",
+                                         "cpulist"))):
+        try:
+            with open(path, "r") as fin:
+                cpus = [c for c in parse_cpu_list(fin.read()) if c in allowed]
+        except (IOError, OSError, ValueError):
+            continue
+        if len(cpus) > 0:
+            nodes.append(cpus)
+    if len(nodes) == 0:
+        nodes.append(sorted(allowed))
+    return nodes
+
+
+def allocate_cpus(slots, nodes=None):
+    """Splits the available CPUs into "slots" disjoint affinity sets so that
+    each set stays within the same NUMA node whenever possible.
+
+    Parameters:
+        slots: the number of sets to produce.
+        nodes: the list of CPU lists, one per NUMA node (see
+               get_numa_nodes()).
+
+    Returns:
+        The list of CPU lists of length "slots".
+    """
+    if slots < 1:
+        raise ValueError("slots must be positive (got %d)" % slots)
+    if nodes is None:
+        nodes = get_numa_nodes()
+    cpus = [c for node in nodes for c in node]
+    if slots >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(slots)]
+    # Distribute the slots between the nodes proportionally to their sizes
+    shares = [len(node) * slots // len(cpus) for node in nodes]
+    for i in sorted(range(len(nodes)), key=lambda n: -len(nodes[n])):
+        if sum(shares) >= slots:
+            break
+        shares[i] += 1
+    result = []
+    for node, share in zip(nodes, shares):
+        if share == 0:
+            continue
+        step, extra = divmod(len(node), share)
+        offset = 0
+        for i in range(share):
+            size = step + (1 if i < extra else 0)
+            result.append(node[offset:offset + size])
+            offset += size
+    return result
+
+
+class ProcessPool(Logger):
+    """Runs up to "size" subprocesses simultaneously. Each subprocess is
+    assigned to a slot and is pinned to the slot's CPU set.
+
+    Attributes:
+        size: the maximal number of simultaneously running subprocesses.
+        affinity: the list of CPU lists for each slot (or None-s if pinning
+                  is disabled).
+    """
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, size=0, pin=True):
+        super(ProcessPool, self).__init__()
+        if size <= 0:
+            size = multiprocessing.cpu_count()
+        self.size = size
+        if pin and hasattr(os, "sched_setaffinity"):
+            self.affinity = allocate_cpus(size)
+        else:
+            self.affinity = [None] * size
+        self._queue = deque()
+        self._running = {}
+        self._free_slots = list(range(size - 1, -1, -1))
+
+    def __len__(self):
+        """Returns the number of subprocesses which are either running or
+        waiting for a free slot.
+        """
+        return len(self._queue) + len(self._running)
+
+    def submit(self, argv, callback, env=None):
+        """Schedules the execution of the specified command line.
+
+        Parameters:
+            argv: the command line to execute.
+            callback: function which is called with the exit code once
+                      the subprocess finishes.
+            env: the environment of the subprocess.
+        """
+        self._queue.append((argv, callback, env))
+        self._launch()
+
+    def poll(self):
+        """Reaps finished subprocesses, invokes their callbacks and fills
+        the released slots from the queue.
+
+        Returns:
+            The number of subprocesses which are running or pending.
+        """
+        for slot, (process, callback) in list(self._running.items()):
+            code = process.poll()
+            if code is None:
+                continue
+            del self._running[slot]
+            self._free_slots.append(slot)
+            self.debug("Process %d in slot %d exited with code %d",
+                       process.pid, slot, code)
+            callback(code)
+        self._launch()
+        return len(self)
+
+    def join(self):
+        """Blocks until all the submitted subprocesses finish.
+        """
+        while self.poll() > 0:
+            time.sleep(self.POLL_INTERVAL)
+
+    def terminate(self):
+        """Kills the running subprocesses and discards the pending ones.
+        """
+        self._queue.clear()
+        for slot, (process, _) in self._running.items():
+            if process.poll() is None:
+                self.warning("Killing process %d in slot %d", process.pid,
+                             slot)
+                process.kill()
+                process.wait()
+            self._free_slots.append(slot)
+        self._running.clear()
+
+    def call(self, argv, env=None):
+        """Executes the command line in the pool and waits for it to finish.
+
+        Returns:
+            The exit code.
+        """
+        codes = []
+        self.submit(argv, codes.append, env)
+        self.join()
+        return codes[0]
+
+    def shutdown(self):
+        """Releases all the resources held by the pool.
+        """
+        self.terminate()
+
+    def _launch(self):
+        while len(self._queue) > 0 and len(self._free_slots) > 0:
+            argv, callback, env = self._queue.popleft()
+            slot = self._free_slots.pop()
+            self._running[slot] = self._start(slot, argv, env), callback
+
+    def _start(self, slot, argv, env):
+        cpus = self.affinity[slot]
+        env = dict(os.environ if env is None else env)
+        if cpus is not None:
+            env.setdefault("OMP_NUM_THREADS", str(len(cpus)))
+        process = subprocess.Popen(argv, env=env, preexec_fn=self._pin(cpus))
+        self.debug("Launched process %d in slot %d (CPUs %s): %s",
+                   process.pid, slot, cpus, " ".join(argv))
+        return process
+
+    @staticmethod
+    def _pin(cpus):
+        if cpus is None:
+            return None
+
+        def pin():
+            os.sched_setaffinity(0, cpus)
+
+        return pin
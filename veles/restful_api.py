@@ -36,10 +36,17 @@ under the License.
 
 
 import base64
+from collections import deque, OrderedDict
+from copy import deepcopy
+import hashlib
 import json
 from itertools import islice
-from time import strftime, localtime
+import struct
+import sys
+import threading
+from time import strftime, localtime, time
 import numpy
+from six import BytesIO
 from twisted.internet import reactor
 from twisted.web.server import Site, NOT_DONE_YET
 from twisted.web.resource import Resource, NoResource
@@ -48,44 +55,286 @@ from zope.interface import implementer
 from veles.config import root
 from veles.distributable import TriviallyDistributable, IDistributable
 from veles.json_encoders import NumpyJSONEncoder
+from veles.logger import Logger
+from veles.memory import Array
 from veles.units import IUnit, Unit
 
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+JSON_TYPE = "application/json"
+RAW_TYPE = "application/octet-stream"
+NPY_TYPE = "application/x-npy"
+MSGPACK_TYPE = "application/x-msgpack"
+
+
+def supported_content_types():
+    types = [JSON_TYPE, RAW_TYPE, NPY_TYPE]
+    if msgpack is not None:
+        types.append(MSGPACK_TYPE)
+    return types
+
+
+def get_content_type(request, header=b"Content-Type"):
+    """Extracts the MIME type without the parameters from the request header.
+    """
+    value = request.getHeader(header)
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("charmap")
+    return value.split(";")[0].strip().lower()
+
+
+def parse_dtype(name):
+    """Converts the type name, e.g. "float32", "uint8" or "int16<", to
+    numpy.dtype. The trailing character may specify the byte order.
+    """
+    if name is None:
+        # this would result in numpy.float64
+        raise ValueError("\"type\" must not be null")
+    if name[-1] in "<=>":
+        byte_order = name[-1]
+        name = name[:-1]
+    else:
+        byte_order = None
+    try:
+        dtype = numpy.dtype(name)
+    except TypeError:
+        raise ValueError("Invalid \"type\" value. For the list of supported "
+                         "values, see numpy.dtype.")
+    if byte_order is not None:
+        dtype = dtype.newbyteorder(byte_order)
+    return dtype
+
+
+def decode_array(buffer, dtype, shape, offset=0):
+    """Creates numpy array over the buffer without copying it.
+    """
+    if not isinstance(shape, (list, tuple)) or len(shape) < 1:
+        raise ValueError("\"shape\" must be a non-trivial array")
+    try:
+        return numpy.frombuffer(buffer, dtype, offset=offset).reshape(shape)
+    except Exception as e:
+        raise ValueError("Failed to create the numpy array: %s." % e)
+
+
+def decode_npy(buffer):
+    """Parses .npy format without copying the array data.
+    """
+    view = memoryview(buffer)
+    try:
+        version = numpy.lib.format.read_magic(BytesIO(view[:8].tobytes()))
+        # The header is the magic string, its length and the dict
+        if version == (1, 0):
+            size = 10 + struct.unpack("<H", view[8:10].tobytes())[0]
+            read_header = numpy.lib.format.read_array_header_1_0
+        elif version == (2, 0):
+            size = 12 + struct.unpack("<I", view[8:12].tobytes())[0]
+            read_header = numpy.lib.format.read_array_header_2_0
+        else:
+            raise ValueError("unsupported version %d.%d" % version)
+        header = BytesIO(view[:size].tobytes())
+        numpy.lib.format.read_magic(header)
+        shape, fortran_order, dtype = read_header(header)
+    except Exception as e:
+        raise ValueError("Failed to parse .npy header: %s" % e)
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not supported")
+    if fortran_order:
+        return decode_array(buffer, dtype, shape[::-1], size).T
+    return decode_array(buffer, dtype, shape, size)
+
+
+def unpack_msgpack(data):
+    try:
+        return msgpack.unpackb(data, raw=False)
+    except TypeError:
+        # msgpack < 0.5.2
+        return msgpack.unpackb(data, encoding="utf-8")
+
+
+def encode_array(value, content_type):
+    """Encodes the result in the specified MIME type.
+
+    Returns:
+        tuple (list of (header, value), body).
+    """
+    if content_type != JSON_TYPE:
+        if isinstance(value, Array):
+            value.map_read()
+            value = value.mem
+        array = numpy.ascontiguousarray(value)
+        if array.dtype.hasobject:
+            content_type = JSON_TYPE
+    if content_type == JSON_TYPE:
+        return [(b"Content-Type", JSON_TYPE.encode("charmap"))], json.dumps(
+            {"result": value}, cls=NumpyJSONEncoder).encode("utf-8")
+    headers = [(b"Content-Type", content_type.encode("charmap"))]
+    if content_type == NPY_TYPE:
+        fout = BytesIO()
+        numpy.save(fout, array)
+        return headers, fout.getvalue()
+    if content_type == MSGPACK_TYPE:
+        return headers, msgpack.packb({"result": {
+            "shape": list(array.shape), "type": array.dtype.str,
+            "data": array.tobytes()}}, use_bin_type=True)
+    headers.append((b"X-Shape", ",".join(
+        str(d) for d in array.shape).encode("charmap")))
+    headers.append((b"X-Type", array.dtype.str.encode("charmap")))
+    return headers, array.tobytes()
+
+
+class ResultCache(Logger):
+    """LRU cache of the results of the identical inputs. The entries expire
+    after ttl seconds, and the cache holds at most max_entries results which
+    take at most max_bytes.
+    """
+
+    def __init__(self, max_entries, max_bytes, ttl):
+        super(ResultCache, self).__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.salt = b""
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": float(self.hits) / lookups if lookups > 0 else 0,
+                "entries": len(self), "bytes": self.size}
+
+    def clear(self, salt=None):
+        """Drops all the entries. salt distinguishes the keys of the
+        different models.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = self.misses = 0
+            if salt is not None:
+                self.salt = salt
+
+    def key(self, data):
+        sha1 = hashlib.sha1(self.salt)
+        sha1.update(("%s%s" % (data.dtype.str, data.shape)).encode("charmap"))
+        sha1.update(numpy.ascontiguousarray(data).view(numpy.uint8))
+        return sha1.digest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time() - entry[0] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Mark as recently used
+            self._entries[key] = self._entries.pop(key)
+            return entry[1]
+
+    def put(self, key, value):
+        if isinstance(value, Array):
+            value.map_read()
+            value = value.mem
+        if isinstance(value, numpy.ndarray):
+            value = value.copy()
+            size = value.nbytes
+        else:
+            value = deepcopy(value)
+            size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = time(), value, size
+            self.size += size
+            while len(self._entries) > self.max_entries or \
+                    self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        self.size -= self._entries.pop(key)[2]
+
 
 class APIResource(Resource):
     isLeaf = True
 
-    def __init__(self, path, callback):
+    def __init__(self, path, callback, metrics=None):
         Resource.__init__(self)
         self._path = path.encode('charmap')
         self._callback = callback
+        self._metrics = metrics
+
+    def render_GET(self, request):
+        if self._metrics is None or request.path != self._path + b"/metrics":
+            page = NoResource(
+                message="API path %s is not supported" % request.URLPath())
+            return page.render(request)
+        request.setHeader(b"Content-Type", b"application/json")
+        return json.dumps(self._metrics()).encode("utf-8")
 
     def render_POST(self, request):
         if request.path != self._path:
             page = NoResource(
                 message="API path %s is not supported" % request.URLPath())
             return page.render(request)
-        if request.getHeader(b"Content-Type") != b"application/json":
+        types = supported_content_types()
+        if get_content_type(request) not in types:
             page = NoResource(
-                message="Unsupported Content-Type (must be \"application/json"
-                        "\")" % request.URLPath())
+                message="Unsupported Content-Type (must be one of %s)" %
+                        ", ".join("\"%s\"" % t for t in types))
             return page.render(request)
-        request.setHeader(b"Content-Type", b"application/json")
         self._callback(request)
         return NOT_DONE_YET
 
 
 @implementer(IUnit, IDistributable)
 class RESTfulAPI(Unit, TriviallyDistributable):
+    """Serves the workflow results via HTTP. The responses are encoded in the
+    workflow's thread, so that the next minibatch is collected meanwhile.
+    The latency percentiles and the throughput over the last
+    root.common.api.metrics_window requests are available at <path>/metrics.
+    If cache_size is greater than 0, the results of the identical inputs are
+    cached (see ResultCache) and returned without running the workflow.
+    """
+
     def __init__(self, workflow, **kwargs):
         kwargs["view_group"] = "SERVICE"
         super(RESTfulAPI, self).__init__(workflow, **kwargs)
         self.port = kwargs.get("port", root.common.api.port)
         self.path = kwargs.get("path", root.common.api.path)
+        self.metrics_window = kwargs.get(
+            "metrics_window", root.common.api.metrics_window)
+        cache = root.common.api.cache
+        self.cache_size = kwargs.get("cache_size", cache.max_entries)
+        self.cache_bytes = kwargs.get("cache_bytes", cache.max_bytes)
+        self.cache_ttl = kwargs.get("cache_ttl", cache.ttl)
         self.demand("feed", "requests", "results", "minibatch_size")
 
     def init_unpickled(self):
         super(RESTfulAPI, self).init_unpickled()
         self._listener_ = None
+        self._received_ = {}
+        self._response_types_ = {}
+        self._cache_keys_ = {}
+        self._cache_ = None
+        self._latencies_ = deque()
+        self._finished_ = deque()
+        self._served_ = 0
 
     @property
     def port(self):
@@ -109,32 +358,101 @@ class RESTfulAPI(Unit, TriviallyDistributable):
             raise ValueError("Invalid path: %s", value)
         self._path = value
 
+    @property
+    def metrics_window(self):
+        return self._metrics_window
+
+    @metrics_window.setter
+    def metrics_window(self, value):
+        if not isinstance(value, int):
+            raise TypeError(
+                "metrics_window must be an integer (got %s)" % type(value))
+        if value < 1:
+            raise ValueError("metrics_window must be > 0 (got %d)" % value)
+        self._metrics_window = value
+
+    @property
+    def metrics(self):
+        """Latency percentiles (in milliseconds) and throughput (requests per
+        second) over the last metrics_window requests.
+        """
+        metrics = {"served": self._served_, "p50": 0, "p99": 0,
+                   "throughput": 0}
+        if self._cache_ is not None:
+            metrics["cache"] = self._cache_.metrics
+        if len(self._latencies_) == 0:
+            return metrics
+        metrics["p50"], metrics["p99"] = (numpy.percentile(
+            self._latencies_, (50, 99)) * 1000).tolist()
+        span = self._finished_[-1] - self._finished_[0]
+        if span > 0:
+            metrics["throughput"] = (len(self._finished_) - 1) / span
+        return metrics
+
+    @property
+    def cache(self):
+        return self._cache_
+
     def initialize(self, **kwargs):
+        self._latencies_ = deque(maxlen=self.metrics_window)
+        self._finished_ = deque(maxlen=self.metrics_window)
+        if self.cache_size > 0:
+            if self._cache_ is None:
+                self._cache_ = ResultCache(
+                    self.cache_size, self.cache_bytes, self.cache_ttl)
+            # The model could have been changed, e.g. loaded from a snapshot
+            self._cache_.clear(self.workflow.checksum.encode("charmap"))
         self._listener_ = reactor.listenTCP(
-            self.port, Site(APIResource(self.path, self.serve)))
+            self.port, Site(APIResource(
+                self.path, self.serve, lambda: self.metrics)))
         self.info("Listening on 0.0.0.0:%d%s", self.port, self.path)
 
     def run(self):
-        reactor.callFromThread(self.respond)
+        responses = []
+        for request, result in islice(zip(self.requests, self.results),
+                                      0, self.minibatch_size):
+            if request is None:
+                continue
+            key = self._cache_keys_.pop(request, None)
+            if key is not None:
+                self._cache_.put(key, result)
+            responses.append((request,) + encode_array(
+                result, self._response_types_.pop(request, JSON_TYPE)))
+        reactor.callFromThread(self.respond, responses)
 
     def stop(self):
         if self._listener_ is not None:
             self._listener_.stopListening()
+        if self._served_ > 0:
+            self.info("Served %(served)d requests, latency p50 %(p50).1f ms, "
+                      "p99 %(p99).1f ms, %(throughput).1f requests/s",
+                      self.metrics)
 
-    def respond(self):
-        for request, result in islice(zip(self.requests, self.results),
-                                      0, self.minibatch_size):
-            if request is None:
-                continue
-            request.write(json.dumps({"result": result},
-                                     cls=NumpyJSONEncoder).encode("utf-8"))
+    def respond(self, responses):
+        for request, headers, body in responses:
+            for name, value in headers:
+                request.setHeader(name, value)
+            request.write(body)
             request.finish()
+            self._on_finished(request)
 
     def fail(self, request, message):
         self.warning(message)
         request.setResponseCode(400)
+        request.setHeader(b"Content-Type", JSON_TYPE.encode("charmap"))
         request.write(json.dumps({"error": message}).encode('utf-8'))
         request.finish()
+        self._received_.pop(request, None)
+        self._response_types_.pop(request, None)
+        self._cache_keys_.pop(request, None)
+
+    def _on_finished(self, request):
+        now = time()
+        received = self._received_.pop(request, None)
+        if received is not None:
+            self._latencies_.append(now - received)
+        self._finished_.append(now)
+        self._served_ += 1
 
     def _decode_base64(self, request, response, input_obj):
         # base64 codec
@@ -142,76 +460,120 @@ class RESTfulAPI(Unit, TriviallyDistributable):
             self.fail(request, "There is no \"shape\" attribute which "
                                "defines the input array shape")
             return None
-        shape = response["shape"]
-        if not isinstance(shape, list) or len(shape) < 1:
-            self.fail(request, "\"shape\" must be a non-trivial array")
-            return None
         if "type" not in response:
             self.fail(request, "There is no \"type\" attribute which "
                                "defines the array data type (e.g., "
                                "\"float32\" or \"uint8\", see numpy.dtype)"
                                ".")
             return None
-        dtype_name = response["type"]
-        if dtype_name is None:
-            # this will result in numpy.float64
-            self.fail(request, "\"type\" must not be null")
-            return None
-        if dtype_name[-1] in "<=>":
-            byte_order = dtype_name[-1]
-            dtype_name = dtype_name[:-1]
-        else:
-            byte_order = None
         try:
-            dtype = numpy.dtype(dtype_name)
-        except TypeError:
-            self.fail(request, "Invalid \"type\" value. For the list of "
-                               "supported values, see numpy.dtype.")
+            dtype = parse_dtype(response["type"])
+        except ValueError as e:
+            self.fail(request, str(e))
             return None
-        if byte_order is not None:
-            dtype = dtype.newbyteorder(byte_order)
         try:
             buffer = base64.b64decode(input_obj)
         except base64.binascii.Error as e:
             self.fail(request, "Failed to decode base64: %s." % e)
             return None
         try:
-            return numpy.frombuffer(buffer, dtype).reshape(shape)
-        except Exception as e:
-            self.fail(request, "Failed to create the numpy array: %s." % e)
+            return decode_array(buffer, dtype, response["shape"])
+        except ValueError as e:
+            self.fail(request, str(e))
             return None
 
-    def serve(self, request):
-        raw_response = request.content.read()
-        try:
-            response = json.loads(raw_response.decode('utf-8'))
-        except ValueError:
-            self.fail(request, "Failed to parse JSON")
-            return
+    def _decode_message(self, request, body, content_type):
+        """Decodes JSON or msgpack request: {"input": ..., "codec": ...}.
+        """
+        if content_type == MSGPACK_TYPE:
+            try:
+                response = unpack_msgpack(body)
+            except Exception:
+                raise ValueError("Failed to parse msgpack")
+        else:
+            try:
+                response = json.loads(bytes(body).decode('utf-8'))
+            except ValueError:
+                raise ValueError("Failed to parse JSON")
         if not isinstance(response, dict) or "input" not in response \
                 or "codec" not in response:
-            self.fail(request, "Invalid input format: there must be \"input\" "
-                               "and \"codec\" attributes")
-            return
+            raise ValueError("Invalid input format: there must be \"input\" "
+                             "and \"codec\" attributes")
         input_obj = response["input"]
         codec = response["codec"]
+        if codec == "raw" and content_type == MSGPACK_TYPE:
+            # the bytes are transferred as is
+            return decode_array(input_obj, parse_dtype(response.get("type")),
+                                response.get("shape"))
         if codec not in ("list", "base64"):
-            self.fail(request, "Invalid codec value: must be either \"list\" "
-                               "or \"base64\"")
-            return
+            raise ValueError("Invalid codec value: must be either \"list\" "
+                             "or \"base64\"")
         if codec == "list":
             try:
-                data = numpy.array(input_obj, numpy.float32)
+                return numpy.array(input_obj, numpy.float32)
             except ValueError:
-                self.fail(request, "Invalid input array format")
-                return
+                raise ValueError("Invalid input array format")
+        return self._decode_base64(request, response, input_obj)
+
+    @staticmethod
+    def _decode_raw(request, body):
+        """Decodes application/octet-stream request, the array's shape and
+        type are in X-Shape (comma separated) and X-Type headers.
+        """
+        shape = request.getHeader(b"X-Shape")
+        dtype = request.getHeader(b"X-Type")
+        if shape is None or dtype is None:
+            raise ValueError("X-Shape and X-Type headers must define the "
+                             "input array shape and data type")
+        if isinstance(shape, bytes):
+            shape = shape.decode("charmap")
+            dtype = dtype.decode("charmap")
+        try:
+            shape = [int(d) for d in shape.split(",")]
+        except ValueError:
+            raise ValueError("X-Shape must be comma separated integers")
+        return decode_array(body, parse_dtype(dtype), shape)
+
+    def serve(self, request):
+        self._received_[request] = time()
+        content_type = get_content_type(request)
+        accept = get_content_type(request, b"Accept")
+        self._response_types_[request] = \
+            accept if accept in supported_content_types() else content_type
+        if hasattr(request.content, "getbuffer"):
+            # Avoid copying the request body
+            body = request.content.getbuffer()
         else:
-            data = self._decode_base64(request, response, input_obj)
-            if data is None:
+            body = request.content.read()
+        size = len(body)
+        try:
+            if content_type == RAW_TYPE:
+                data = self._decode_raw(request, body)
+            elif content_type == NPY_TYPE:
+                data = decode_npy(body)
+            else:
+                data = self._decode_message(request, body, content_type)
+        except ValueError as e:
+            self.fail(request, str(e))
+            return
+        if data is None:
+            return
+        if self._cache_ is not None:
+            key = self._cache_.key(data)
+            result = self._cache_.get(key)
+            if result is not None:
+                self.respond([(request,) + encode_array(
+                    result, self._response_types_.pop(request, JSON_TYPE))])
                 return
+            self._cache_keys_[request] = key
         try:
-            self.feed(data, request)
+            fed = self.feed(data, request)
         except Exception as e:
             self.fail(request, "Invalid input value: %s" % e)
+        else:
+            if fed is not None:
+                # The input is preprocessed in parallel
+                fed.addErrback(lambda failure: self.fail(
+                    request, "Invalid input value: %s" % failure.value))
         self.debug("%s: received %d bytes", strftime("%X", localtime()),
-                   len(raw_response))
+                   size)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 27, 2015
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import numpy
+import unittest
+
+from veles.avatar import Avatar
+from veles.backends import NumpyDevice
+from veles.dummy import DummyUnit, DummyWorkflow
+from veles.memory import Array
+
+
+class TestAvatar(unittest.TestCase):
+    def setUp(self):
+        self.workflow = DummyWorkflow()
+        self.real = DummyUnit(data=Array(numpy.zeros(4)),
+                              labels=[0, 1], minibatch_class=0)
+
+    def _avatar(self, **kwargs):
+        avatar = Avatar(self.workflow, **kwargs)
+        avatar.reals[self.real] = ("data", "labels", "minibatch_class")
+        avatar.initialize(device=NumpyDevice())
+        return avatar
+
+    def test_copy_on_change(self):
+        avatar = self._avatar()
+        labels = avatar.labels
+        avatar.run()
+        self.assertIsNot(avatar.data, self.real.data)
+        self.assertIs(avatar.labels, labels)
+        self.assertEqual(avatar.labels, [0, 1])
+
+        data = self.real.data
+        data.map_invalidate()
+        data.mem[:] = 1
+        self.real.labels.append(2)
+        self.real.minibatch_class = 2
+        avatar.run()
+        self.assertEqual(avatar.data.mem.tolist(), [1] * 4)
+        self.assertEqual(avatar.labels, [0, 1, 2])
+        self.assertEqual(avatar.minibatch_class, 2)
+
+        # Not mapped for writing, so not copied
+        data.mem[:] = 2
+        avatar.run()
+        self.assertEqual(avatar.data.mem.tolist(), [1] * 4)
+        # The copy was overwritten
+        avatar.data.map_write()
+        avatar.data.mem[:] = 3
+        avatar.run()
+        self.assertEqual(avatar.data.mem.tolist(), [2] * 4)
+
+    def test_double_buffered(self):
+        avatar = self._avatar(double_buffered=("data",))
+        data = self.real.data
+        data.map_invalidate()
+        data.mem[:] = 1
+        mem = data.mem
+        avatar.run()
+        self.assertIs(avatar.data.mem, mem)
+        self.assertIsNot(data.mem, mem)
+        avatar.run()
+        self.assertIs(avatar.data.mem, mem)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -36,8 +36,11 @@ under the License.
 """
 
 
+import json
 import logging
 import os
+import shutil
+import tempfile
 import unittest
 import numpy
 from zope.interface import implementer
@@ -84,6 +87,37 @@ class TestEnsembleLoader(unittest.TestCase):
         self.assertFalse(any(loader.original_labels))
         loader.run()
 
+    def test_load_data_npy(self):
+        file_name = os.path.join(os.path.dirname(__file__),
+                                 "res", "wine_ensemble.json")
+        with open(file_name, "r") as fin:
+            data = json.load(fin)
+        tmpdir = tempfile.mkdtemp(prefix="veles-test-ensemble-")
+        try:
+            for index, model in enumerate(data["models"]):
+                npy = "output_%d.npy" % index
+                numpy.save(os.path.join(tmpdir, npy),
+                           numpy.array(model["Output"]))
+                model["Output"] = {"npy": npy}
+            # Shuffled labels mapping must be restored
+            data["models"][1]["Labels"] = \
+                data["models"][1]["Labels"][::-1]
+            with open(os.path.join(tmpdir, "ensemble.json"), "w") as fout:
+                json.dump(data, fout)
+            wf = DummyWorkflow()
+            loader = MyEnsembleLoader(
+                wf, file=os.path.join(tmpdir, "ensemble.json"))
+            loader.initialize(device=NumpyDevice())
+            reference = MyEnsembleLoader(wf, file=file_name)
+            reference.initialize(device=NumpyDevice())
+            self.assertEqual(loader.original_data.shape, (178, 3, 3))
+            self.assertTrue((loader.original_data.mem[:, 0] ==
+                             reference.original_data.mem[:, 0]).all())
+            self.assertTrue((loader.original_data.mem[:, 1] ==
+                             reference.original_data.mem[:, 1, ::-1]).all())
+        finally:
+            shutil.rmtree(tmpdir)
+
     def test_load_data_test(self):
         wf = DummyWorkflow()
         wf.launcher.testing = True
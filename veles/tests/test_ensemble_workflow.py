@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 21, 2015
+
+Unit test for the scheduling of the ensemble models.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+from ast import literal_eval
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from veles.dummy import DummyWorkflow
+from veles.ensemble.base_workflow import EnsembleError
+from veles.ensemble.model_workflow import EnsembleModelManager
+from veles.ensemble.test_workflow import EnsembleTestManager
+
+
+class StubPool(object):
+    """Pretends to execute the submitted command lines: writes the results
+    to --result-file and completes the jobs in the reverse order.
+    """
+
+    def __init__(self, size, fail=lambda model, test: False):
+        self.size = size
+        self.fail = fail
+        self.queue = []
+        self.executed = []
+
+    def submit(self, argv, callback, env=None):
+        self.queue.append((argv, callback))
+
+    def join(self):
+        while len(self.queue) > 0:
+            batch, self.queue = self.queue, []
+            for argv, callback in reversed(batch):
+                callback(self.execute(argv))
+
+    def execute(self, argv):
+        test = "--test" in argv
+        if test:
+            snapshot = argv[argv.index("--snapshot") + 1]
+            model = int(snapshot[len("snapshot"):])
+        else:
+            model = int([a for a in argv if a.startswith(
+                "root.common.ensemble.model_index=")][0].split("=")[1])
+        self.executed.append((model, test))
+        if self.fail(model, test):
+            return 1
+        arrays_dir = [a.split("=", 1)[1] for a in argv if a.startswith(
+            "root.common.results.arrays_dir=")]
+        if test and len(arrays_dir) > 0:
+            result = {"Output": {"npy": os.path.join(
+                literal_eval(arrays_dir[0]), "%d_Output.npy" % model)}}
+        elif test:
+            result = {"Output": model}
+        else:
+            result = {"id": "model%d" % model, "log_id": "log",
+                      "Snapshot": "snapshot%d" % model,
+                      "EvaluationFitness": model / 10.0}
+        with open(argv[argv.index("--result-file") + 1], "w") as fout:
+            json.dump(result, fout)
+        return 0
+
+    def terminate(self):
+        self.queue = []
+
+    def shutdown(self):
+        pass
+
+
+class TestEnsembleScheduling(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="veles-test-ensemble-")
+        self.workflow = DummyWorkflow()
+        self.workflow.result_file = os.path.join(self.dir, "ensemble.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def create_trainer(self, size, pool):
+        manager = EnsembleModelManager(
+            self.workflow, model=unittest, size=size, train_ratio=0.9,
+            binary_outputs=False, max_retries=1)
+        manager.initialize()
+        manager._evaluators_ = pool
+        return manager
+
+    def create_tester(self, size, pool, binary_outputs=False):
+        input_file = os.path.join(self.dir, "input.json")
+        with open(input_file, "w") as fout:
+            json.dump({"models": [
+                {"id": "model%d" % i, "log_id": "log",
+                 "Snapshot": "snapshot%d" % i} for i in range(size)]}, fout)
+        manager = EnsembleTestManager(
+            self.workflow, model=unittest, input_file=input_file,
+            binary_outputs=binary_outputs, max_retries=1)
+        manager.initialize()
+        manager._evaluators_ = pool
+        return manager
+
+    def test_concurrency(self):
+        manager = self.create_trainer(4, StubPool(1))
+        manager.workers = 3
+        self.assertGreaterEqual(manager.concurrency, 1)
+        self.assertLessEqual(manager.concurrency, 3)
+        manager.memory_per_model = 1 << 40
+        self.assertEqual(manager.concurrency, 1)
+        manager.memory_per_model = 0
+        manager.cores_per_model = 0
+        self.assertRaises(ValueError, lambda: manager.concurrency)
+
+    def test_train(self):
+        pool = StubPool(4)
+        manager = self.create_trainer(4, pool)
+        manager.run()
+        self.assertTrue(manager.complete)
+        # Slot i gets model #i even though the jobs finish in reverse
+        for index, result in enumerate(manager.results):
+            self.assertEqual(result["id"], "model%d" % index)
+            self.assertEqual(result["Output"], index)
+        self.assertEqual(sorted(manager.fitnesses), [0, 0.1, 0.2, 0.3])
+        self.assertEqual(len(pool.executed), 8)
+
+    def test_train_retry(self):
+        pool = StubPool(4, lambda model, test: model == 1)
+        manager = self.create_trainer(4, pool)
+        manager.run()
+        self.assertFalse(manager.complete)
+        self.assertIsNone(manager.results[1])
+        # The failed slot is retried with the next model
+        manager.run()
+        self.assertTrue(manager.complete)
+        self.assertEqual([r["id"] for r in manager.results],
+                         ["model0", "model4", "model2", "model3"])
+
+    def test_test(self):
+        pool = StubPool(3)
+        manager = self.create_tester(3, pool)
+        manager.run()
+        self.assertTrue(manager.complete)
+        self.assertEqual([r["Output"] for r in manager.results], [0, 1, 2])
+        self.assertEqual(sorted(pool.executed),
+                         [(0, True), (1, True), (2, True)])
+
+    def test_binary_outputs(self):
+        manager = self.create_tester(2, StubPool(2), True)
+        self.assertEqual(manager.outputs_dir,
+                         os.path.join(self.dir, "ensemble_outputs"))
+        manager.run()
+        self.assertEqual([r["Output"] for r in manager.results],
+                         [{"npy": os.path.join("ensemble_outputs", name)}
+                          for name in ("0_Output.npy", "1_Output.npy")])
+
+    def test_no_result_file(self):
+        self.workflow.result_file = None
+        manager = self.create_tester(2, StubPool(2), True)
+        self.assertIsNone(manager.outputs_dir)
+        manager.run()
+        self.assertEqual([r["Output"] for r in manager.results], [0, 1])
+
+    def test_test_failure(self):
+        pool = StubPool(3, lambda model, test: model == 2)
+        manager = self.create_tester(3, pool)
+        manager.run()
+        self.assertEqual([r is None for r in manager.results],
+                         [False, False, True])
+        del pool.executed[:]
+        self.assertRaises(EnsembleError, manager.run)
+        # Only the failed slot was retried, with the same model
+        self.assertEqual(pool.executed, [(2, True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
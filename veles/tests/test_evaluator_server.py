@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 20, 2015
+
+Unit test for the warm-started evaluator pool.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import os
+import sys
+import unittest
+
+import six
+
+from veles.evaluator_server import EvaluatorPool
+
+
+@unittest.skipIf(six.PY2, "Warm workers require Python 3")
+class TestEvaluatorPool(unittest.TestCase):
+    def setUp(self):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        path = [root] + [p for p in os.getenv("PYTHONPATH", "").split(
+            os.pathsep) if p]
+        self.pool = EvaluatorPool(
+            1, False, env=dict(os.environ, PYTHONPATH=os.pathsep.join(path)))
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_exit_code(self):
+        self.assertEqual(self.pool.call(
+            [sys.executable, "-c", "import sys; sys.exit(3)"]), 3)
+        self.assertEqual(self.pool.call([sys.executable, "-c", "pass"]), 0)
+        self.assertEqual(self.pool.call(
+            [sys.executable, "-c", "raise ValueError()"]), 1)
+
+    def test_env(self):
+        code = "import os, sys; sys.exit(int(os.environ['VELES_TEST_CODE']))"
+        env = dict(os.environ, VELES_TEST_CODE="5")
+        self.assertEqual(self.pool.call([sys.executable, "-c", code], env=env),
+                         5)
+        env["VELES_TEST_CODE"] = "6"
+        self.assertEqual(self.pool.call([sys.executable, "-c", code], env=env),
+                         6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 21, 2015
+
+Unit test for FitnessCache()
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from veles.genetics.cache import FitnessCache, quantize_genome
+
+
+class TestFitnessCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="veles-test-genetics-cache-")
+        self.file_name = os.path.join(self.dir, "fitness.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_quantize_genome(self):
+        defaults = [0.1, 10, 0.5]
+        self.assertEqual(quantize_genome([0.1234, 10.7, 0.5], defaults, 0.01),
+                         quantize_genome([0.1211, 10.2, 0.5], defaults, 0.01))
+        self.assertNotEqual(
+            quantize_genome([0.1234, 10.7, 0.5], defaults, 0.01),
+            quantize_genome([0.1334, 10.7, 0.5], defaults, 0.01))
+
+    def test_get_put(self):
+        cache = FitnessCache()
+        self.assertIsNone(cache.get((1, 2)))
+        cache.put((1, 2), 0.75, "snapshot")
+        self.assertIn((1, 2), cache)
+        self.assertEqual(cache.get([1, 2]), (0.75, "snapshot"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.reset_stats()
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        self.assertIsNone(cache.get((3, 4), count=False))
+        self.assertEqual(cache.get((1, 2), count=False), (0.75, "snapshot"))
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_persistence(self):
+        cache = FitnessCache(self.file_name)
+        cache.put((1, 2), 0.75, None)
+        cache.put((3, 4), 0.5, "snapshot")
+        with open(self.file_name, "a") as fout:
+            fout.write('{"genome": [5, 6], "fitn')
+        cache = FitnessCache(self.file_name)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get((1, 2)), (0.75, None))
+        self.assertEqual(cache.get((3, 4)), (0.5, "snapshot"))
+
+
+if __name__ == "__main__":
+    unittest.main()
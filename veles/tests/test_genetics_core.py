@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 22, 2015
+
+Unit test for ArrayPopulation()
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import numpy
+import pickle
+import unittest
+from zope.interface import implementer
+
+from veles.genetics.core import ArrayChromosome, ArrayPopulation, \
+    IChromosome, schwefel
+import veles.prng as prng
+
+
+@implementer(IChromosome)
+class SchwefelChromosome(ArrayChromosome):
+    def evaluate(self):
+        self.fitness = schwefel(self.numeric)
+
+
+class TestArrayPopulation(unittest.TestCase):
+    def setUp(self):
+        prng.get().seed(1234)
+        self.min_values = [-500.0] * 10 + [1]
+        self.max_values = [500.0] * 10 + [20]
+        self.population = ArrayPopulation(
+            SchwefelChromosome, len(self.min_values), self.min_values,
+            self.max_values, 50)
+
+    def assertInRange(self, genomes):
+        self.assertTrue(numpy.all(genomes >= self.min_values))
+        self.assertTrue(numpy.all(genomes <= self.max_values))
+        self.assertTrue(numpy.all(genomes[:, -1] == numpy.trunc(
+            genomes[:, -1])))
+
+    def test_populate(self):
+        population = self.population
+        self.assertEqual(len(population), 50)
+        self.assertEqual(population.genomes.shape, (50, 11))
+        self.assertEqual(population.pending_size, 50)
+        self.assertInRange(population.genomes)
+        self.assertTrue(numpy.shares_memory(population[7].numeric,
+                                            population.genomes))
+
+    def test_views(self):
+        population = self.population
+        population[3].evaluate()
+        self.assertEqual(population.fitnesses[3],
+                         schwefel(population.genomes[3]))
+        self.assertEqual(population.pending_size, 49)
+        clone = population[3].copy()
+        self.assertIsNone(clone.fitness)
+        self.assertTrue(numpy.all(clone.numeric == population[3].numeric))
+        clone.mutate("uniform", 11, 1.0)
+        self.assertFalse(numpy.all(clone.numeric == population[3].numeric))
+        self.assertInRange(population.genomes)
+
+    def test_select_roulette(self):
+        population = self.population
+        population.fitnesses[:] = 0
+        population.fitnesses[[4, 9]] = [1, 3]
+        parents = population.select_roulette()
+        self.assertEqual(set(parents), {4, 9})
+        self.assertGreater(numpy.count_nonzero(parents == 9),
+                           numpy.count_nonzero(parents == 4))
+
+    def test_evolution(self):
+        population = self.population
+        population.evaluate_all(schwefel)
+        first_best = population.best_fit
+        self.assertEqual(population.generation, 1)
+        self.assertGreater(len(population), population.size)
+        self.assertTrue(numpy.all(numpy.diff(
+            population.fitnesses[:population.size]) <= 0))
+        self.assertInRange(population.genomes)
+        for _ in range(10):
+            population.evaluate_all(schwefel)
+        self.assertGreaterEqual(population.best_fit, first_best)
+        self.assertEqual([c.row for c in population],
+                         list(range(len(population))))
+
+    def test_pickle(self):
+        population = self.population
+        population.evaluate_all(schwefel)
+        clone = pickle.loads(pickle.dumps(population))
+        self.assertIs(clone[0].population, clone)
+        self.assertEqual(clone.pending_size, population.pending_size)
+        self.assertTrue(numpy.all(clone.genomes == population.genomes))
+        clone[-1].mutate("gaussian", 3, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
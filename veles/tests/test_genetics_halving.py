@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 21, 2015
+
+Unit test for the successive halving in GeneticsOptimizer.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import unittest
+
+from veles.config import Config
+from veles.dummy import DummyWorkflow
+from veles.genetics.config import Range
+from veles.genetics.optimization_workflow import GeneticsOptimizer
+import veles.prng as prng
+
+
+class HalvingOptimizer(GeneticsOptimizer):
+    """Evaluates the chromosomes in place: the fitness is the tuned value
+    divided by the budget, so that the partial evaluations overestimate it.
+    """
+
+    def init_unpickled(self):
+        super(HalvingOptimizer, self).init_unpickled()
+        self.evaluated = []
+
+    def _evaluate_indices(self, indices, budget):
+        self.evaluated.append((budget, list(indices)))
+        for index in indices:
+            chromo = self.population[index]
+            chromo.fitness = float(chromo.numeric[0]) / budget
+            chromo.fidelity = budget
+
+
+class TestHalving(unittest.TestCase):
+    def setUp(self):
+        prng.get().seed(1234)
+        self.config = Config("root")
+        self.config.model.value = Range(50.0, 0.0, 100.0)
+        self.config.model.decision.max_epochs = 20
+        self.optimizer = HalvingOptimizer(
+            DummyWorkflow(), model=unittest, config=self.config, size=9,
+            generations=1, fitness_cache=False, min_budget=1.0 / 9,
+            halving_eta=3)
+        self.optimizer.population.update = lambda: None
+
+    def test_budgets(self):
+        optimizer = self.optimizer
+        self.assertEqual(optimizer.budgets, [1.0 / 9, 1.0 / 3, 1.0])
+        optimizer.min_budget = 0.25
+        optimizer.halving_eta = 2
+        self.assertEqual(optimizer.budgets, [0.25, 0.5, 1.0])
+        optimizer.min_budget = 0.3
+        self.assertEqual(optimizer.budgets, [0.3, 0.6, 1.0])
+        optimizer.min_budget = 1
+        self.assertEqual(optimizer.budgets, [1.0])
+
+    def test_promotion(self):
+        optimizer = self.optimizer
+        population = optimizer.population
+        indices = [i for i, c in enumerate(population) if c.fitness is None]
+        self.assertEqual(len(indices), 9)
+        optimizer.evaluate_generation()
+        self.assertEqual([(b, len(i)) for b, i in optimizer.evaluated],
+                         [(1.0 / 9, 9), (1.0 / 3, 3), (1.0, 1)])
+        ranked = sorted(indices, key=lambda i: population[i].numeric[0],
+                        reverse=True)
+        self.assertEqual(optimizer.evaluated[1][1], sorted(ranked[:3]))
+        self.assertEqual(optimizer.evaluated[2][1], ranked[:1])
+
+    def test_partial_fitness_cap(self):
+        optimizer = self.optimizer
+        population = optimizer.population
+        optimizer.evaluate_generation()
+        best = optimizer.evaluated[2][1][0]
+        self.assertEqual(population[best].fidelity, 1.0)
+        worst = population[best].fitness
+        partial = [c for c in population if c.fidelity < 1]
+        self.assertEqual(len(partial), 8)
+        for chromo in partial:
+            self.assertLessEqual(chromo.fitness, worst)
+        # The promoted ones are overestimated by the smaller budgets
+        capped = optimizer.evaluated[1][1]
+        for index in capped:
+            if index != best:
+                self.assertEqual(population[index].fitness, worst)
+
+    def test_train_ratio_argv(self):
+        optimizer = self.optimizer
+        optimizer.train_ratio = 0.5
+        chromo = optimizer.population[0]
+        fcfg, fres, argv = optimizer._prepare_evaluation(chromo, 0.25)
+        fcfg.close()
+        fres.close()
+        self.assertEqual(argv[:2], ["--train-ratio", repr(0.125)])
+        fcfg, fres, argv = optimizer._prepare_evaluation(chromo, 1.0)
+        fcfg.close()
+        fres.close()
+        self.assertEqual(argv[:2], ["--train-ratio", repr(0.5)])
+
+    def test_epochs_argv(self):
+        optimizer = self.optimizer
+        optimizer.epochs_path = "root.model.decision.max_epochs"
+        chromo = optimizer.population[0]
+        fcfg, fres, argv = optimizer._prepare_evaluation(chromo, 0.25)
+        fcfg.close()
+        fres.close()
+        self.assertIn("root.model.decision.max_epochs=5", argv)
+        self.assertNotIn("--train-ratio", argv)
+        fcfg, fres, argv = optimizer._prepare_evaluation(chromo, 1.0 / 50)
+        fcfg.close()
+        fres.close()
+        self.assertIn("root.model.decision.max_epochs=1", argv)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -203,7 +203,31 @@ class CUDATestInputJoiner(TestInputJoiner):
 
 @assign_backend("numpy")
 class NUMPYTestInputJoiner(TestInputJoiner):
-    pass
+    def test_rehome_inputs(self):
+        self.info("Will test InputJoiner(rehome_inputs=True)")
+        a = Array(numpy.arange(250, dtype=numpy.float32).reshape(10, 5, 5))
+        b = Array(numpy.arange(50, dtype=numpy.float64).reshape(10, 5))
+        c = Array(numpy.arange(350, dtype=numpy.float32).reshape(10, 35))
+        obj = input_joiner.InputJoiner(self.parent, inputs=[a, b, c],
+                                       rehome_inputs=True)
+        obj.initialize(device=self.device)
+        # b has a different type and is copied
+        self.assertEqual(sorted(obj._rehomed_), [0, 2])
+        self.assertTrue(numpy.may_share_memory(a.mem, obj.output.mem))
+        self.assertFalse(numpy.may_share_memory(b.mem, obj.output.mem))
+        self.assertEqual(a.shape, (10, 5, 5))
+
+        a.map_write()
+        a.mem[1] = -1
+        b.map_write()
+        b.mem[2] = -2
+        c.reset(numpy.full((10, 35), -3, dtype=numpy.float32))
+        obj.run()
+        obj.output.map_read()
+        self.assertTrue((obj.output.mem[1, :25] == -1).all())
+        self.assertTrue((obj.output.mem[2, 25:30] == -2).all())
+        self.assertTrue((obj.output.mem[:, 30:] == -3).all())
+        self.assertEqual(obj.output.mem[0, 1], 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 29, 2015
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import multiprocessing
+import os
+import shutil
+from tempfile import mkdtemp
+import unittest
+
+from veles.accelerated_units import TrivialAcceleratedUnit
+from veles.backends import NumpyDevice
+from veles.config import root
+from veles.dummy import DummyWorkflow
+from veles.kernel_cache import KernelCache
+
+
+def write_entries(directory, key, value, count):
+    cache = KernelCache(directory, 0)
+    for _ in range(count):
+        assert cache.put(key, value)
+        assert cache.get(key) == value
+
+
+class TestKernelCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = mkdtemp(prefix="veles-kernel-cache-")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, name, contents):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as fout:
+            fout.write(contents)
+        return path
+
+    def test_key(self):
+        dep = self._write("inc.cl", b"#define A 1\n")
+        key = KernelCache.key("kernel", [dep], ("dev", "1.0"))
+        self.assertEqual(key, KernelCache.key(b"kernel", [dep, dep],
+                                              ("dev", "1.0")))
+        self.assertNotEqual(key, KernelCache.key("kernel2", [dep],
+                                                 ("dev", "1.0")))
+        self.assertNotEqual(key, KernelCache.key("kernel", [dep],
+                                                 ("dev", "1.1")))
+        self.assertNotEqual(key, KernelCache.key("kernel", [], ("dev", "1.0")))
+        self._write("inc.cl", b"#define A 2\n")
+        self.assertNotEqual(key, KernelCache.key("kernel", [dep],
+                                                 ("dev", "1.0")))
+
+    def test_put_get(self):
+        cache = KernelCache(self.directory, 0)
+        key = KernelCache.key("kernel", [], "dev")
+        self.assertIsNone(cache.get(key))
+        self.assertTrue(cache.put(key, [b"binary"]))
+        self.assertEqual(cache.get(key), [b"binary"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(len(cache.entries()), 1)
+        self.assertEqual(os.listdir(os.path.dirname(cache.path(key))),
+                         [os.path.basename(cache.path(key))])
+
+    def test_lru(self):
+        cache = KernelCache(self.directory, 0)
+        keys = [KernelCache.key("kernel%d" % i, [], "dev") for i in range(4)]
+        for i, key in enumerate(keys[:3]):
+            cache.put(key, b"x" * 1000)
+            os.utime(cache.path(key), (1000 + i, 1000 + i))
+        size = os.path.getsize(cache.path(keys[0]))
+        cache.max_bytes = size * 3
+        # Refresh the oldest entry, so that the second one is evicted
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.put(keys[3], b"x" * 1000)
+        self.assertEqual(len(cache.entries()), 3)
+        self.assertIsNone(cache.get(keys[1]))
+        for key in keys[0], keys[2], keys[3]:
+            self.assertIsNotNone(cache.get(key))
+
+    def test_concurrent_writers(self):
+        key = KernelCache.key("kernel", [], "dev")
+        value = [b"x" * 100000]
+        workers = [multiprocessing.Process(
+            target=write_entries, args=(self.directory, key, value, 20))
+            for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+        cache = KernelCache(self.directory, 0)
+        self.assertEqual(cache.get(key), value)
+        # No temporary files are left
+        self.assertEqual(len(os.listdir(os.path.dirname(cache.path(key)))), 1)
+
+    def test_accelerated_unit(self):
+        backend_dir = os.path.join(self.directory, "numpy")
+        os.mkdir(backend_dir)
+        self._write("numpy/kernel.cl", b'#include "inc.cl"\n')
+        self._write("numpy/inc.cl", b"#define A 1\n")
+        source_dirs = root.common.engine.source_dirs
+        root.common.engine.source_dirs = [self.directory]
+        cache = KernelCache()
+        key = None
+        try:
+            unit = TrivialAcceleratedUnit(DummyWorkflow())
+            unit.initialize(device=NumpyDevice())
+            unit.sources_["kernel"] = {}
+            # The defines make the source unique to this test run
+            source, _ = unit._generate_source({"B": 2, "DIR": self.directory},
+                                              (backend_dir,),
+                                              "float", "cl", {})
+            key, binaries = unit._load_binary(source, "cl", "dev")
+            self.assertIsNotNone(key)
+            self.assertIsNone(binaries)
+            unit._save_to_cache(key, [b"binary"])
+            self.assertEqual(unit._load_binary(source, "cl", "dev"),
+                             (key, [b"binary"]))
+            # Other defines, devices and headers mean other programs
+            other, _ = unit._generate_source({"B": 3, "DIR": self.directory},
+                                             (backend_dir,),
+                                             "float", "cl", {})
+            self.assertIsNone(unit._load_binary(other, "cl", "dev")[1])
+            self.assertIsNone(unit._load_binary(source, "cl", "dev2")[1])
+            self._write("numpy/inc.cl", b"#define A 2\n")
+            self.assertIsNone(unit._load_binary(source, "cl", "dev")[1])
+            unit.cache = False
+            self.assertEqual(unit._load_binary(source, "cl", "dev"),
+                             (None, None))
+        finally:
+            root.common.engine.source_dirs = source_dirs
+            if key is not None and os.path.exists(cache.path(key)):
+                os.remove(cache.path(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 24, 2015
+
+Unit test for the batched MongoDB logging.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import bson
+import logging
+import threading
+import time
+import unittest
+
+from veles.logger import Logger, MongoLogHandler
+
+
+class FakeCollection(object):
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def insert(self, documents, w=1, continue_on_error=False):
+        for doc in documents:
+            if "bad" in doc:
+                raise bson.errors.InvalidDocument("bad")
+        with self.lock:
+            self.batches.append(list(documents))
+
+    @property
+    def documents(self):
+        with self.lock:
+            return [doc for batch in self.batches for doc in batch]
+
+
+class FakeMongoLogHandler(MongoLogHandler):
+    def _connect(self, addr):
+        self._collections = {name: FakeCollection()
+                             for name in self.COLLECTIONS}
+
+    def documents(self, name):
+        return self._collections[name].documents
+
+
+class EventSource(Logger):
+    pass
+
+
+class TestMongoLogHandler(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("TestMongoLogHandler")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handlers = []
+
+    def tearDown(self):
+        for handler in self.handlers:
+            self.logger.removeHandler(handler)
+            handler.close()
+
+    def create(self, **kwargs):
+        handler = FakeMongoLogHandler("localhost", "session", "node",
+                                      **kwargs)
+        self.logger.addHandler(handler)
+        self.handlers.append(handler)
+        return handler
+
+    def test_batches(self):
+        handler = self.create(batch_size=10, flush_interval=100)
+        for i in range(25):
+            self.logger.info("Message %d", i)
+        handler.flush()
+        batches = handler._collections["logs"].batches
+        self.assertEqual([len(b) for b in batches], [10, 10, 5])
+        doc = batches[0][3]
+        self.assertEqual(doc["message"], "Message 3")
+        self.assertEqual((doc["session"], doc["node"]), ("session", "node"))
+
+    def test_flush_interval(self):
+        handler = self.create(batch_size=1000, flush_interval=0.05)
+        self.logger.warning("Message")
+        for _ in range(100):
+            if handler.documents("logs"):
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(handler.documents("logs")), 1)
+
+    def test_events(self):
+        handler = self.create()
+        source = EventSource()
+        source.event("Work", "begin", height=10)
+        source.event("Work", "end")
+        self.assertRaises(ValueError, source.event, "Work", "middle")
+        self.assertRaises(ValueError, source.event, "Work", "single",
+                          session="x")
+        handler.flush()
+        events = handler.documents("events")
+        self.assertEqual([e["type"] for e in events], ["begin", "end"])
+        self.assertEqual(events[0]["domain"], "EventSource")
+        self.assertEqual(events[0]["height"], 10)
+        handler.close()
+        self.assertNotIn(handler, MongoLogHandler.instances)
+        source.event("Work", "single")
+        self.assertEqual(len(handler.documents("events")), 2)
+
+    def test_backpressure(self):
+        handler = self.create(queue_size=5, batch_size=1000)
+        stall = threading.Event()
+        handler._queue.put((None, stall.wait))
+        handler.flush = lambda: None
+        for i in range(20):
+            self.logger.info("Message %d", i)
+        stall.set()
+        self.assertGreaterEqual(handler.dropped["logs"], 14)
+        handler.close()
+        self.assertEqual(len(handler.documents("logs")) +
+                         handler.dropped["logs"], 20)
+
+    def test_invalid_document(self):
+        handler = self.create(batch_size=3)
+        handler.add_event("Test", "Work", "single", {})
+        handler.add_event("Test", "Work", "single", {"bad": True})
+        handler.add_event("Test", "Work", "single", {})
+        handler.close()
+        self.assertEqual(len(handler.documents("events")), 2)
+        self.assertEqual(handler.failed, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 28, 2015
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import numpy
+import time
+import unittest
+
+from veles.backends import NumpyDevice
+from veles.logger import Logger
+from veles.numpy_blas import NumpyBLAS, OP_N, OP_T
+import veles.prng as prng
+
+
+class TestNumpyBLAS(unittest.TestCase, Logger):
+    def __init__(self, *args, **kwargs):
+        Logger.__init__(self)
+        unittest.TestCase.__init__(self, *args, **kwargs)
+
+    def setUp(self):
+        self.blas = NumpyDevice().blas
+        self.rnd = prng.RandomGenerator(None)
+        self.rnd.seed(123)
+
+    def _random(self, size, dtype):
+        mem = numpy.zeros(size, dtype=dtype)
+        self.rnd.fill(mem)
+        return mem
+
+    @staticmethod
+    def _matrix(mem, offset, rows, cols):
+        return mem[offset:offset + rows * cols].reshape(cols, rows).T
+
+    def _test_gemm(self, dtype, trans_a, trans_b, m, n, k):
+        offsets = 3, 5, 7
+        a = self._random(offsets[0] + m * k, dtype)
+        b = self._random(offsets[1] + k * n, dtype)
+        c = self._random(offsets[2] + m * n, dtype)
+        op_a = self._matrix(a, offsets[0], *((m, k) if trans_a == OP_N
+                                             else (k, m)))
+        op_b = self._matrix(b, offsets[1], *((k, n) if trans_b == OP_N
+                                             else (n, k)))
+        if trans_a == OP_T:
+            op_a = op_a.T
+        if trans_b == OP_T:
+            op_b = op_b.T
+        gold = c.copy()
+        self._matrix(gold, offsets[2], m, n)[:] = \
+            2 * numpy.dot(op_a, op_b) + 0.5 * self._matrix(c, offsets[2], m, n)
+        alpha = numpy.array([2], dtype=dtype)
+        beta = numpy.array([0.5], dtype=dtype)
+        mem = c.ctypes.data
+        NumpyBLAS.gemm(dtype)(self.blas, trans_a, trans_b, m, n, k,
+                              alpha, a, b, beta, c, *offsets)
+        self.assertEqual(c.ctypes.data, mem)
+        max_diff = numpy.fabs(c - gold).max()
+        self.assertLess(max_diff, 1.0e-4)
+
+    def test_gemm(self):
+        for dtype in (numpy.float32, numpy.float64):
+            for trans_a in (OP_N, OP_T):
+                for trans_b in (OP_N, OP_T):
+                    for m, n, k in ((17, 1999, 231), (1, 1, 1), (9, 7, 800)):
+                        self._test_gemm(dtype, trans_a, trans_b, m, n, k)
+        with self.assertRaises(TypeError):
+            NumpyBLAS.sgemm(self.blas, OP_N, OP_N, 1, 1, 1, 1, numpy.ones(1),
+                            numpy.ones(1), 0, numpy.ones(1))
+        with self.assertRaises(ValueError):
+            NumpyBLAS.gemm(numpy.int32)
+
+    def test_benchmark(self):
+        """Fully connected layer forward: output = input * weights^T.
+        """
+        gemm = NumpyBLAS.gemm(numpy.float32)
+        one = numpy.ones(1, numpy.float32)
+        zero = numpy.zeros(1, numpy.float32)
+        for batch, inputs, outputs in ((100, 784, 100), (128, 1024, 1024),
+                                       (256, 4096, 1000)):
+            x = self._random(batch * inputs, numpy.float32)
+            w = self._random(outputs * inputs, numpy.float32)
+            y = numpy.zeros(batch * outputs, numpy.float32)
+            repeats = 10
+
+            start = time.time()
+            for _ in range(repeats):
+                # What the units do now: reshape, transpose, copy
+                y[:] = numpy.dot(
+                    x.reshape(batch, inputs),
+                    w.reshape(outputs, inputs).transpose().copy()).ravel()
+            numpy_time = (time.time() - start) / repeats
+            gold = y.copy()
+
+            start = time.time()
+            for _ in range(repeats):
+                # Row-major Y = X * W^T is column-major Y^T = W * X^T
+                gemm(self.blas, OP_T, OP_N, outputs, batch, inputs,
+                     one, w, x, zero, y)
+            blas_time = (time.time() - start) / repeats
+            self.assertLess(numpy.fabs(y - gold).max(), 1.0e-2)
+            flops = 2.0 * batch * inputs * outputs
+            self.info("%dx%d -> %d: numpy.dot %.2f GFLOPS, BLAS %.2f GFLOPS",
+                      batch, inputs, outputs, flops / numpy_time / 1e9,
+                      flops / blas_time / 1e9)
+
+
+if __name__ == "__main__":
+    unittest.main()
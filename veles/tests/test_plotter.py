@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 23, 2015
+
+Unit test for the incremental plotter updates and the data reduction.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import pickle
+import unittest
+
+import numpy
+
+from veles.config import root
+from veles.dummy import DummyWorkflow
+from veles.iplotter import PlotterUpdate
+from veles.plotter import Plotter, lttb, minmax, block_mean, group_sum
+from veles.plotting_units import AccumulatingPlotter, Histogram, \
+    MatrixPlotter, ImmediatePlotter, AutoHistogramPlotter
+
+
+class RecordingServer(object):
+    def __init__(self):
+        self.messages = []
+
+    def enqueue(self, obj):
+        self.messages.append(pickle.dumps(obj))
+
+
+class TestPlotterUpdate(unittest.TestCase):
+    def setUp(self):
+        self.workflow = DummyWorkflow()
+        self.workflow._plotters_are_enabled = True
+        self.server = RecordingServer()
+        self.interval = root.common.graphics.full_update_interval
+
+    def tearDown(self):
+        root.common.graphics.full_update_interval = self.interval
+
+    def attach(self, plotter):
+        plotter.initialize()
+        plotter._server_ = self.server
+        plotter.redraw_threshold = -1
+
+    def replay(self):
+        replica = None
+        sequence = 0
+        for data in self.server.messages:
+            update = pickle.loads(data)
+            self.assertEqual(update.sequence, sequence + 1)
+            sequence = update.sequence
+            if update.full:
+                replica = update.create()
+            else:
+                update.apply(replica)
+        return replica
+
+    def test_accumulating(self):
+        root.common.graphics.full_update_interval = 4
+        plotter = AccumulatingPlotter(self.workflow, name="Lines")
+        plotter.input = numpy.arange(10, dtype=numpy.float64)
+        self.attach(plotter)
+        for i in range(10):
+            plotter.input_field = i
+            plotter.run()
+        updates = [pickle.loads(m) for m in self.server.messages]
+        self.assertEqual([u.full for u in updates],
+                         [True, False, False, False] * 2 + [True, False])
+        delta = updates[1]
+        self.assertEqual(delta.changes["values"],
+                         (PlotterUpdate.APPEND, [1.0]))
+        self.assertNotIn("input", delta.changes)
+        self.assertEqual(delta.changes["input_field"], (PlotterUpdate.SET, 1))
+        self.assertLess(len(self.server.messages[-1]),
+                        len(self.server.messages[-2]))
+        replica = self.replay()
+        self.assertEqual(replica.values, list(range(10)))
+        self.assertEqual(replica.input_field, 9)
+        self.assertEqual(replica.id, plotter.id)
+
+    def test_list_fingerprint(self):
+        values = [1.0, 2.0]
+        sent = Plotter._fingerprint(values)
+        self.assertIs(sent[1][0], values)
+        values.append(3.0)
+        self.assertEqual(
+            Plotter._diff(sent, Plotter._fingerprint(values), values),
+            (PlotterUpdate.APPEND, [3.0]))
+        # The window was shifted: the last sent item moved
+        sent = Plotter._fingerprint(values)
+        del values[0]
+        values.append(4.0)
+        self.assertEqual(
+            Plotter._diff(sent, Plotter._fingerprint(values), values),
+            (PlotterUpdate.SET, values))
+        # A new list object is always sent in full
+        sent = Plotter._fingerprint(values)
+        rebuilt = list(values)
+        self.assertEqual(
+            Plotter._diff(sent, Plotter._fingerprint(rebuilt), rebuilt),
+            (PlotterUpdate.SET, rebuilt))
+        self.assertIsNone(Plotter._diff(
+            sent, Plotter._fingerprint(values), values))
+
+    def test_changed_arrays(self):
+        plotter = Histogram(self.workflow, name="Histogram")
+        plotter.x = numpy.arange(5.0)
+        plotter.y = numpy.zeros(5)
+        self.attach(plotter)
+        plotter.run()
+        plotter.y[2] = 1
+        plotter.run()
+        plotter.run()
+        delta = pickle.loads(self.server.messages[1])
+        self.assertIn("y", delta.changes)
+        self.assertNotIn("x", delta.changes)
+        self.assertNotIn("y", pickle.loads(self.server.messages[2]).changes)
+        replica = self.replay()
+        self.assertTrue(numpy.array_equal(replica.x, plotter.x))
+        self.assertTrue(numpy.array_equal(replica.y, plotter.y))
+
+    def test_disabled(self):
+        root.common.graphics.full_update_interval = 0
+        plotter = AccumulatingPlotter(self.workflow, name="Lines")
+        plotter.input = 1.0
+        self.attach(plotter)
+        for _ in range(3):
+            plotter.run()
+        self.assertTrue(all(pickle.loads(m).full
+                            for m in self.server.messages))
+        self.assertEqual(self.replay().values, [1.0] * 3)
+
+
+class FineHistogramPlotter(AutoHistogramPlotter):
+    nbins = 1000
+
+
+class TestReduction(unittest.TestCase):
+    def setUp(self):
+        self.workflow = DummyWorkflow()
+
+    def test_lttb(self):
+        x = numpy.arange(1000)
+        y = numpy.sin(x / 50.0)
+        y[500] = 10
+        rx, ry = lttb(x, y, 100)
+        self.assertEqual(len(rx), 100)
+        self.assertEqual((rx[0], rx[-1]), (0, 999))
+        self.assertIn(500, rx)
+        self.assertTrue(numpy.all(numpy.diff(rx) > 0))
+        self.assertIs(lttb(x, y, 2000)[1], y)
+
+    def test_minmax(self):
+        x = numpy.arange(1000)
+        y = numpy.random.RandomState(0).rand(1000)
+        y[123] = -1
+        y[777] = 2
+        rx, ry = minmax(x, y, 100)
+        self.assertLessEqual(len(rx), 100)
+        self.assertIn(123, rx)
+        self.assertIn(777, rx)
+        self.assertTrue(numpy.array_equal(y[rx], ry))
+
+    def test_block_mean(self):
+        image = numpy.arange(30.0).reshape(5, 6)
+        reduced = block_mean(image, 3)
+        self.assertEqual(reduced.shape, (3, 3))
+        self.assertEqual(reduced[0, 0], image[:2, :2].mean())
+        rgb = numpy.ones((100, 50, 3))
+        self.assertEqual(block_mean(rgb, 10).shape, (10, 5, 3))
+        self.assertIs(block_mean(rgb, 100), rgb)
+
+    def test_group_sum(self):
+        values = numpy.ones(10)
+        reduced, group = group_sum(values, 4)
+        self.assertEqual(group, 3)
+        self.assertEqual(list(reduced), [3, 3, 3, 1])
+
+    def strip(self, plotter):
+        plotter.stripped_pickle = True
+        try:
+            return pickle.loads(pickle.dumps(plotter))
+        finally:
+            plotter.stripped_pickle = False
+
+    def test_matrix(self):
+        plotter = MatrixPlotter(self.workflow, pixel_budget=240)
+        plotter.input = [numpy.eye(25, dtype=numpy.int32) * 3]
+        plotter.input_field = 0
+        plotter.reversed_labels_mapping = list(range(25))
+        replica = self.strip(plotter)
+        value = replica.input[0]
+        self.assertEqual(value.shape, (9, 9))
+        self.assertEqual(value.sum(), 75)
+        self.assertEqual(value[0, 0], 9)
+        self.assertEqual(replica.reversed_labels_mapping[8], "24-24")
+
+    def test_series(self):
+        plotter = ImmediatePlotter(self.workflow, pixel_budget=64)
+        plotter.inputs.append([numpy.arange(10000.0)])
+        plotter.input_fields.append(0)
+        replica = self.strip(plotter)
+        self.assertIsNone(replica.inputs)
+        x, y = replica._series[0]
+        self.assertEqual(len(y), 64)
+        self.assertEqual(y[-1], 9999)
+        self.assertRaises(ValueError, ImmediatePlotter, self.workflow,
+                          downsampling="fft")
+
+    def test_histograms(self):
+        plotter = Histogram(self.workflow, pixel_budget=80)
+        plotter.x = numpy.arange(100)
+        plotter.y = numpy.ones(100)
+        replica = self.strip(plotter)
+        self.assertEqual(len(replica.x), 10)
+        self.assertEqual(replica.y.sum(), 100)
+        plotter = FineHistogramPlotter(self.workflow, pixel_budget=80)
+        plotter.input = numpy.random.RandomState(0).randn(100000)
+        replica = self.strip(plotter)
+        self.assertIsNone(replica.input)
+        self.assertEqual(len(replica.y), 10)
+        self.assertEqual(replica.y.sum(), 100000)
+        self.assertEqual(len(replica.x), len(replica.y))
+
+
+if __name__ == "__main__":
+    unittest.main()
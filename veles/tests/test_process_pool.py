@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 19, 2015
+
+Unit test for the CPU allocation of ProcessPool.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import unittest
+
+from veles.process_pool import parse_cpu_list, allocate_cpus, ProcessPool
+
+
+class TestProcessPool(unittest.TestCase):
+    def test_parse_cpu_list(self):
+        self.assertEqual(parse_cpu_list("0-3,8,10-11\n"),
+                         [0, 1, 2, 3, 8, 10, 11])
+        self.assertEqual(parse_cpu_list("5"), [5])
+        self.assertEqual(parse_cpu_list(""), [])
+        self.assertRaises(ValueError, parse_cpu_list, "a-b")
+
+    def test_allocate_cpus(self):
+        nodes = [list(range(4)), list(range(4, 8))]
+        self.assertEqual(allocate_cpus(2, nodes), [[0, 1, 2, 3],
+                                                   [4, 5, 6, 7]])
+        self.assertEqual(allocate_cpus(4, nodes),
+                         [[0, 1], [2, 3], [4, 5], [6, 7]])
+        self.assertEqual(allocate_cpus(3, nodes),
+                         [[0, 1], [2, 3], [4, 5, 6, 7]])
+        # Sets are disjoint and never cross the NUMA nodes
+        for slots in range(1, 8):
+            sets = allocate_cpus(slots, nodes)
+            self.assertEqual(len(sets), slots)
+            cpus = [c for cs in sets for c in cs]
+            self.assertEqual(len(cpus), len(set(cpus)))
+            for cs in sets:
+                self.assertTrue(set(cs) <= set(nodes[0]) or
+                                set(cs) <= set(nodes[1]))
+
+    def test_allocate_oversubscribed(self):
+        self.assertEqual(allocate_cpus(5, [[0, 1]]),
+                         [[0], [1], [0], [1], [0]])
+        self.assertRaises(ValueError, allocate_cpus, 0, [[0]])
+
+    def test_no_pinning(self):
+        self.assertEqual(ProcessPool(2, pin=False).affinity, [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -37,11 +37,17 @@ under the License.
 
 import numpy
 import os
+import threading
+import time
+import unittest
 
 from veles.accelerated_units import TrivialAcceleratedUnit
 from veles.backends import NumpyDevice
 from veles.config import root
+from veles.dummy import DummyWorkflow
+from veles.logger import Logger
 from veles.memory import Array
+from veles.pickle2 import pickle
 import veles.prng as rnd
 from veles.prng.uniform import Uniform
 from veles.tests import AcceleratedTest
@@ -208,5 +214,113 @@ class TestRandom128(AcceleratedTest):
         self.assertEqual(numpy.count_nonzero(v_gpu - v_cpu), 0)
 
 
+class TestUniformNumpy(unittest.TestCase, Logger):
+    def __init__(self, *args, **kwargs):
+        Logger.__init__(self)
+        unittest.TestCase.__init__(self, *args, **kwargs)
+
+    @staticmethod
+    def _reference(states, n_rounds):
+        """The straightforward port of the kernel with Python integers.
+        """
+        mask = (1 << 64) - 1
+        n_states = states.shape[0]
+        output = numpy.zeros(n_states * 16 * n_rounds, dtype=numpy.uint64)
+        for i in range(n_states):
+            s = [int(x) for x in states[i]]
+            offs = i
+            for _ in range(n_rounds):
+                p = 0
+                for _ in range(16):
+                    s0 = s[p]
+                    p = (p + 1) & 15
+                    s1 = s[p]
+                    s1 ^= (s1 << 31) & mask
+                    s1 ^= s1 >> 11
+                    s0 ^= s0 >> 30
+                    s[p] = s0 ^ s1
+                    output[offs] = (s[p] * 1181783497276652981) & mask
+                    offs += n_states
+            states[i] = s
+        return output
+
+    def _uniform(self, n_states, n_rounds):
+        states = rnd.get().randint(
+            0, 0x100000000, n_states * 128 // 4).astype(
+            numpy.uint32).view(numpy.uint64).reshape(n_states, 16)
+        u = Uniform(DummyWorkflow(), num_states=n_states,
+                    output_bytes=n_states * 128 * n_rounds)
+        u.states.mem = states.copy()
+        u.initialize(NumpyDevice())
+        return u, states
+
+    def test_reference(self):
+        n_states, n_rounds = 5, 3
+        u, states = self._uniform(n_states, n_rounds)
+        for _ in range(2):
+            # The second fill must continue from the updated states
+            v_ref = self._reference(states, n_rounds)
+            u.run()
+            u.output.map_read()
+            v = u.output.mem.view(dtype=numpy.uint64)
+            self.assertEqual(numpy.count_nonzero(v - v_ref), 0)
+        self.assertEqual(numpy.count_nonzero(
+            u.states.mem.view(numpy.uint64).ravel() - states.ravel()), 0)
+
+    def test_throughput(self):
+        u, _ = self._uniform(256, 64)
+        start = time.time()
+        u.run()
+        elapsed = time.time() - start
+        self.info("Uniform.numpy_fill(): %.1f MB/s",
+                  u.output.nbytes / elapsed / 1000000)
+
+
+class TestRandomGenerator(unittest.TestCase):
+    def test_seed(self):
+        gen = rnd.RandomGenerator("test")
+        gen.seed(1234)
+        first = gen.rand(10)
+        gen.seed(1234)
+        # The other generators and numpy.random do not interfere
+        rnd.RandomGenerator("other").rand(10)
+        rnd.get().shuffle(numpy.arange(10))
+        numpy.random.seed(4321)
+        numpy.random.rand(10)
+        self.assertTrue((gen.rand(10) == first).all())
+        os.remove(gen.seed_file_name)
+
+    def test_pickle(self):
+        gen = rnd.RandomGenerator("test")
+        gen.rand(10)
+        restored = pickle.loads(pickle.dumps(gen))
+        self.assertTrue((gen.rand(10) == restored.rand(10)).all())
+        state = gen.state
+        values = gen.randint(0, 1000, 10)
+        gen.state = state
+        self.assertTrue((gen.randint(0, 1000, 10) == values).all())
+
+    def test_threads(self):
+        gens = [rnd.RandomGenerator(i) for i in range(4)]
+        for i, gen in enumerate(gens):
+            gen.state = rnd.get().state
+        expected = gens[0].state
+        results = [None] * len(gens)
+
+        def draw(index):
+            results[index] = gens[index].rand(10000)
+
+        threads = [threading.Thread(target=draw, args=(i,))
+                   for i in range(len(gens))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for result in results[1:]:
+            self.assertTrue((result == results[0]).all())
+        gens[0].state = expected
+        self.assertTrue((gens[0].rand(10000) == results[0]).all())
+
+
 if __name__ == "__main__":
     AcceleratedTest.main()
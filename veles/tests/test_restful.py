@@ -38,6 +38,7 @@ import logging
 from random import randint
 import numpy
 from six import BytesIO
+import time
 from twisted.internet import reactor
 from twisted.web.client import Agent, FileBodyProducer
 import unittest
@@ -46,12 +47,16 @@ from zope.interface import implementer
 
 from veles.dummy import DummyWorkflow
 from veles.loader import Loader, ILoader
+from veles.loader import restful
 from veles.loader.restful import RestfulLoader
 from veles.logger import Logger
 from veles.memory import Array
 from veles.pickle2 import pickle
 from veles.plumbing import Repeater
-from veles.restful_api import RESTfulAPI, NumpyJSONEncoder
+from veles import restful_api
+from veles.restful_api import RESTfulAPI, NumpyJSONEncoder, JSON_TYPE, \
+    RAW_TYPE, NPY_TYPE, MSGPACK_TYPE, ResultCache, decode_npy, \
+    encode_array, get_content_type, msgpack, parse_dtype, unpack_msgpack
 from veles.tests import timeout
 
 
@@ -67,6 +72,43 @@ class DummyLoader(Loader):
         pass
 
 
+class FakeRequest(object):
+    def __init__(self, **headers):
+        self.headers = {k.encode("charmap"): v.encode("charmap")
+                        for k, v in headers.items()}
+        self.written = []
+
+    def getHeader(self, name):
+        return self.headers.get(name)
+
+    def setHeader(self, name, value):
+        self.headers[name] = value
+
+    def write(self, data):
+        self.written.append(data)
+
+    def finish(self):
+        pass
+
+
+class ImmediateReactor(object):
+    @staticmethod
+    def callFromThread(fn, *args):
+        fn(*args)
+
+    @staticmethod
+    def callLater(delay, fn, *args):
+        pass
+
+
+class SlowRestfulLoader(RestfulLoader):
+    def _feed(self, obj, request, dest):
+        time.sleep(0.1)
+        if obj[0] < 0:
+            raise ValueError("negative")
+        dest[...] = obj
+
+
 class RESTAPITest(unittest.TestCase):
     @timeout()
     def test_workflow(self):
@@ -158,6 +200,162 @@ class RESTAPITest(unittest.TestCase):
         self.assertEqual(len(new_api.requests), 0)
         api.stop()
 
+    def test_staging(self):
+        workflow = DummyWorkflow()
+        base_loader = DummyLoader(workflow)
+        base_loader.minibatch_data.reset(numpy.zeros((10, 4)))
+        base_loader.normalizer.analyze(base_loader.minibatch_data.mem)
+        loader = RestfulLoader(workflow, minibatch_size=2,
+                               max_response_time=0)
+        loader.derive_from(base_loader)
+        workflow.del_ref(base_loader)
+        loader.initialize()
+        self.assertEqual(loader.minibatch_data.shape, (2, 4))
+        for i in range(3):
+            loader.feed(numpy.full(4, i), "request%d" % i)
+        self.assertEqual(loader.staged_size, 3)
+        # The first minibatch is full, the next one is being collected
+        loader.fill_minibatch()
+        self.assertEqual(loader.requests, ["request0", "request1"])
+        self.assertTrue((loader.minibatch_data.mem[:, 0] == [0, 1]).all())
+        self.assertEqual(loader.staged_size, 1)
+        loader.locked_flush()
+        loader.fill_minibatch()
+        self.assertEqual(loader.requests, ["request2", None])
+        self.assertEqual(loader.minibatch_data.mem[0, 0], 2)
+        self.assertEqual(loader.staged_size, 0)
+        loader._run_time_ = None
+        loader._measure_run_time(1.0)
+        loader._measure_run_time(2.0)
+        self.assertAlmostEqual(loader.run_time, 1.2)
+
+    @timeout()
+    def test_parallel_feed(self):
+        workflow = DummyWorkflow()
+        base_loader = DummyLoader(workflow)
+        base_loader.minibatch_data.reset(numpy.zeros((10, 4)))
+        base_loader.normalizer.analyze(base_loader.minibatch_data.mem)
+        loader = SlowRestfulLoader(workflow, minibatch_size=4,
+                                   preprocessing_threads=4)
+        loader.derive_from(base_loader)
+        workflow.del_ref(base_loader)
+        loader.initialize()
+        reactor = restful.reactor
+        restful.reactor = ImmediateReactor()
+        failures = []
+        try:
+            start = time.time()
+            for i in (1, 2, -1):
+                fed = loader.feed(numpy.full(4, i), "request%d" % i)
+                fed.addErrback(lambda f: failures.append(f.value))
+            # The preprocessing is still running
+            self.assertLess(time.time() - start, 0.1)
+            loader.locked_flush()
+            loader.fill_minibatch()
+            self.assertLess(time.time() - start, 0.25)
+        finally:
+            restful.reactor = reactor
+            loader.stop()
+        self.assertEqual(loader.requests,
+                         ["request1", "request2", None, None])
+        self.assertTrue((loader.minibatch_data.mem[:2, 0] == [1, 2]).all())
+        self.assertEqual(len(failures), 1)
+        self.assertIsInstance(failures[0], ValueError)
+
+    def test_metrics(self):
+        workflow = DummyWorkflow()
+        api = RESTfulAPI(workflow, port=6565 + randint(-1000, 1000),
+                         metrics_window=4)
+        api.feed = lambda data, request: None
+        api.requests = api.results = []
+        api.minibatch_size = 1
+        api.initialize()
+        api.stop()
+        self.assertEqual(api.metrics["served"], 0)
+        requests = [FakeRequest() for _ in range(6)]
+        for i, request in enumerate(requests):
+            api._received_[request] = time.time() - 0.01 * (i + 1)
+        api.respond([(r, [(b"Content-Type", b"application/json")], b"{}")
+                     for r in requests])
+        metrics = api.metrics
+        self.assertEqual(metrics["served"], 6)
+        # Only the last 4 requests are considered
+        self.assertGreaterEqual(metrics["p50"], 40)
+        self.assertLess(metrics["p50"], metrics["p99"])
+        self.assertEqual(len(api._received_), 0)
+        self.assertEqual(requests[0].written, [b"{}"])
+        self.assertEqual(requests[0].headers[b"Content-Type"],
+                         b"application/json")
+
+    def test_cache(self):
+        workflow = DummyWorkflow()
+        api = RESTfulAPI(workflow, port=6565 + randint(-1000, 1000),
+                         cache_size=4)
+        fed = []
+        api.feed = lambda data, request: fed.append(request)
+        api.requests = []
+        api.results = [numpy.ones(3)]
+        api.minibatch_size = 1
+        api.initialize()
+        api.stop()
+
+        def post(values):
+            request = FakeRequest(**{"Content-Type": "application/json"})
+            request.content = BytesIO(json.dumps(
+                {"input": values, "codec": "list"}).encode("utf-8"))
+            api.serve(request)
+            return request
+
+        first = post([1, 2])
+        self.assertEqual(fed, [first])
+        api.requests = [first]
+        reactor = restful_api.reactor
+        restful_api.reactor = ImmediateReactor()
+        try:
+            api.run()
+        finally:
+            restful_api.reactor = reactor
+        api.results[0][:] = 0
+        second = post([1, 2])
+        third = post([1, 3])
+        self.assertEqual(fed, [first, third])
+        self.assertEqual(second.written, first.written)
+        self.assertEqual(api.metrics["cache"]["hits"], 1)
+        self.assertEqual(api.metrics["cache"]["entries"], 1)
+        # A new model invalidates the cache
+        api.port += 1
+        api.initialize()
+        api.stop()
+        self.assertEqual(len(api.cache), 0)
+
+    def test_result_cache(self):
+        cache = ResultCache(2, 100, 60)
+        data = numpy.arange(4, dtype=numpy.float32)
+        self.assertNotEqual(cache.key(data), cache.key(data.reshape(2, 2)))
+        self.assertNotEqual(cache.key(data), cache.key(data.astype(int)))
+        key = cache.key(data)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, data)
+        data[0] = 10
+        self.assertEqual(cache.get(key)[0], 0)
+        cache.put(b"a", numpy.zeros(4))
+        self.assertIsNotNone(cache.get(key))
+        # "a" is the least recently used
+        cache.put(b"b", numpy.zeros(4))
+        self.assertIsNone(cache.get(b"a"))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.metrics["bytes"], 48)
+        cache.put(b"c", numpy.zeros(10))
+        self.assertEqual(len(cache), 1)
+        cache.put(b"d", numpy.zeros(20))
+        self.assertIsNone(cache.get(b"d"))
+        cache.ttl = 0
+        self.assertIsNone(cache.get(b"c"))
+        salted = cache.key(data)
+        cache.clear(b"model")
+        self.assertNotEqual(cache.key(data), salted)
+        self.assertEqual(cache.metrics["hits"], 0)
+
     def test_map_read(self):
         vec = Array(numpy.ones((10, 10)))
         arr = json.loads(json.dumps(vec, cls=NumpyJSONEncoder))
@@ -175,6 +373,61 @@ class RESTAPITest(unittest.TestCase):
         self.assertEqual(arr.shape, data.shape)
         self.assertEqual(arr.dtype, data.dtype)
 
+
+class CodecTest(unittest.TestCase):
+    def setUp(self):
+        self.array = numpy.arange(12, dtype=numpy.float32).reshape(3, 4)
+
+    def test_npy(self):
+        for array in self.array, numpy.asfortranarray(self.array):
+            fout = BytesIO()
+            numpy.save(fout, array)
+            data = decode_npy(fout.getbuffer())
+            self.assertEqual(data.dtype, array.dtype)
+            self.assertTrue((data == array).all())
+        self.assertRaises(ValueError, decode_npy, b"garbage")
+        headers, body = encode_array(self.array, NPY_TYPE)
+        self.assertEqual(headers, [(b"Content-Type", b"application/x-npy")])
+        self.assertTrue((numpy.load(BytesIO(body)) == self.array).all())
+
+    def test_raw(self):
+        headers, body = encode_array(self.array, RAW_TYPE)
+        headers = dict(headers)
+        self.assertEqual(headers[b"X-Shape"], b"3,4")
+        request = FakeRequest(**{"X-Shape": "3,4",
+                                 "X-Type": headers[b"X-Type"].decode()})
+        data = RESTfulAPI._decode_raw(request, memoryview(body))
+        self.assertTrue((data == self.array).all())
+        self.assertRaises(ValueError, RESTfulAPI._decode_raw,
+                          FakeRequest(**{"X-Shape": "5,4",
+                                         "X-Type": "float32"}), body)
+        self.assertRaises(ValueError, RESTfulAPI._decode_raw,
+                          FakeRequest(), body)
+
+    def test_json(self):
+        headers, body = encode_array(Array(self.array), JSON_TYPE)
+        self.assertEqual(headers, [(b"Content-Type", b"application/json")])
+        self.assertEqual(json.loads(body.decode("utf-8"))["result"],
+                         self.array.tolist())
+
+    def test_content_type(self):
+        request = FakeRequest(**{"Content-Type": "application/x-npy; q=1"})
+        self.assertEqual(get_content_type(request), NPY_TYPE)
+        self.assertIsNone(get_content_type(request, b"Accept"))
+        self.assertEqual(parse_dtype("int16>"),
+                         numpy.dtype(numpy.int16).newbyteorder(">"))
+        self.assertRaises(ValueError, parse_dtype, None)
+        self.assertRaises(ValueError, parse_dtype, "float33")
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        headers, body = encode_array(self.array, MSGPACK_TYPE)
+        result = unpack_msgpack(body)["result"]
+        self.assertEqual(result["shape"], [3, 4])
+        data = numpy.frombuffer(result["data"], result["type"])
+        self.assertTrue((data.reshape(3, 4) == self.array).all())
+
+
 if __name__ == "__main__":
     Logger.setup_logging(logging.DEBUG)
     unittest.main()
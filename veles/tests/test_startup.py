@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 30, 2015
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from tempfile import mkdtemp
+import time
+import unittest
+
+from veles.import_profiler import ImportProfiler
+from veles.logger import Logger
+
+
+# Optional subsystems which veles.__main__ must not import by itself
+LAZY_MODULES = ("paramiko", "pymongo", "scipy.stats", "twisted.web.client",
+                "veles.graphics_server", "veles.plotter", "wget")
+
+STARTUP_SCRIPT = """
+import json
+import sys
+import time
+start = time.time()
+import veles.__main__
+print(json.dumps({"time": time.time() - start,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+class TestStartup(unittest.TestCase, Logger):
+    def __init__(self, *args, **kwargs):
+        Logger.__init__(self)
+        unittest.TestCase.__init__(self, *args, **kwargs)
+
+    def _start(self):
+        start = time.time()
+        output = subprocess.check_output(
+            [sys.executable, "-c", STARTUP_SCRIPT])
+        wall = time.time() - start
+        result = json.loads(output.decode("utf-8").strip().split("\n")[-1])
+        return wall, result
+
+    def test_cold_start(self):
+        wall, result = self._start()
+        self.assertEqual(result["loaded"], [])
+        # The first start warms up the file system cache
+        times = [self._start() for _ in range(3)]
+        self.info("veles.__main__ cold start: %.3f s wall, %.3f s imports "
+                  "(the best of 3 after %.3f s)",
+                  min(t[0] for t in times), min(t[1]["time"] for t in times),
+                  wall)
+
+    def test_import_profiler(self):
+        directory = mkdtemp(prefix="veles-import-profiler-")
+        package = os.path.join(directory, "profiled_package")
+        os.mkdir(package)
+        with open(os.path.join(package, "__init__.py"), "w") as fout:
+            fout.write("from . import child\n")
+        with open(os.path.join(package, "child.py"), "w") as fout:
+            fout.write("import time\ntime.sleep(0.05)\n")
+        sys.path.insert(0, directory)
+        profiler = ImportProfiler()
+        profiler.install()
+        try:
+            import profiled_package  # noqa
+        finally:
+            profiler.uninstall()
+            sys.path.remove(directory)
+            for name in "profiled_package", "profiled_package.child":
+                sys.modules.pop(name, None)
+            shutil.rmtree(directory)
+        cumulative, own = profiler.timings["profiled_package"]
+        child, child_own = profiler.timings["profiled_package.child"]
+        self.assertGreaterEqual(child, 0.05)
+        self.assertGreaterEqual(cumulative, child)
+        self.assertLess(own, child)
+        self.assertEqual(child, child_own)
+        self.assertEqual(profiler.total, cumulative)
+        self.assertIn("profiled_package.child", profiler.format())
+
+
+if __name__ == "__main__":
+    unittest.main()
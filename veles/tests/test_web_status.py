@@ -42,15 +42,34 @@ from veles.web_status import WebServer
 from veles.tests import timeout
 
 
+class FakeHandler(object):
+    def __init__(self, headers=None):
+        self.status = 200
+        self.headers = {}
+        self.body = None
+        self.request = type("Request", (object,), {})()
+        self.request.headers = headers or {}
+
+    def set_status(self, status):
+        self.status = status
+
+    def set_header(self, name, value):
+        self.headers[name] = value
+
+    def finish(self, body=None):
+        self.body = body
+
+
 class Test(unittest.TestCase):
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         root.common.web.log_file = "/tmp/veles_web.test.log"
         root.common.web.port = 8071
-        self.ws = WebServer()
+        cls.ws = WebServer()
 
-    def tearDown(self):
-        pass
+    def setUp(self):
+        self.ws.masters.clear()
 
     @timeout(2)
     def testStop(self):
@@ -62,6 +81,53 @@ class Test(unittest.TestCase):
         self.ws.run()
         stopper.join()
 
+    def testIncrementalUpdates(self):
+        handler = FakeHandler()
+        self.ws.receive_update(handler, {
+            "id": "master", "version": 1, "name": "Workflow", "time": "0",
+            "graph": "digraph {}", "graph_checksum": "1",
+            "slaves": {"a": {"state": "Working"}, "b": {"state": "Waiting"}}})
+        self.assertEqual(handler.status, 200)
+        self.ws.receive_update(handler, {
+            "id": "master", "version": 2, "base_version": 1, "time": "1",
+            "graph_checksum": "1", "slaves_diff": {
+                "updated": {"c": {"state": "Working"}}, "removed": ["a"]}})
+        self.assertEqual(handler.status, 200)
+        master = self.ws.masters["master"]
+        self.assertEqual(master["graph"], "digraph {}")
+        self.assertEqual(master["time"], "1")
+        self.assertEqual(sorted(master["slaves"]), ["b", "c"])
+        self.ws.receive_update(handler, {
+            "id": "master", "version": 4, "base_version": 3, "time": "2",
+            "graph_checksum": "1", "slaves_diff": {
+                "updated": {}, "removed": []}})
+        self.assertEqual(handler.status, 409)
+        self.assertEqual(master["time"], "1")
+
+    def testWorkflowsETag(self):
+        self.ws.receive_update(FakeHandler(), {
+            "id": "master", "version": 1, "name": "Workflow", "slaves": {},
+            "graph": "digraph {}"})
+        request = {"request": "workflows", "args": ["name", "slaves"]}
+        handler = FakeHandler()
+        self.ws.receive_request(handler, request)
+        self.assertEqual(handler.body["result"]["master"]["name"], "Workflow")
+        etag = handler.headers["Etag"]
+        self.ws.receive_update(FakeHandler(), {
+            "id": "master", "version": 2, "base_version": 1,
+            "slaves_diff": {"updated": {}, "removed": []}})
+        handler = FakeHandler({"If-None-Match": etag})
+        self.ws.receive_request(handler, request)
+        self.assertEqual(handler.status, 304)
+        self.assertIsNone(handler.body)
+        self.ws.receive_update(FakeHandler(), {
+            "id": "master", "version": 3, "base_version": 2,
+            "name": "Renamed", "slaves_diff": {"updated": {}, "removed": []}})
+        handler = FakeHandler({"If-None-Match": etag})
+        self.ws.receive_request(handler, request)
+        self.assertEqual(handler.status, 200)
+        self.assertNotEqual(handler.headers["Etag"], etag)
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
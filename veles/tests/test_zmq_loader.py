@@ -34,6 +34,7 @@ under the License.
 
 
 import threading
+from time import time
 import unittest
 
 from twisted.internet import reactor
@@ -57,6 +58,14 @@ class ZmqDealer(ZmqConnection):
         self.send(cid, data)
 
 
+class FakeRouter(object):
+    def __init__(self):
+        self.replies = []
+
+    def reply(self, cid, message):
+        self.replies.append((cid, message))
+
+
 class DummyLauncher(dummy.DummyLauncher):
     def __init__(self, mode):
         super(DummyLauncher, self).__init__()
@@ -109,6 +118,32 @@ class Test(unittest.TestCase):
         self.assertTrue("ZmqLoaderEndpoints" in data.keys())
         self.assertIsInstance(data["ZmqLoaderEndpoints"], dict)
 
+    def testBatching(self):
+        launcher = DummyLauncher(mode=2)
+        wf = Workflow(launcher)
+        loader = ZeroMQLoader(wf, batch_size=3, max_wait=0.05)
+        loader.initialize()
+        loader._zmq_socket = router = FakeRouter()
+        wf.generate_data_for_master = \
+            lambda: [data.upper() for data in loader.output]
+        for i in range(4):
+            loader.receive_data(b"c%d" % i, b"p%d" % i)
+        loader.run()
+        self.assertEqual(loader.cids, [b"c0", b"c1", b"c2"])
+        self.assertEqual(loader.output, [b"p0", b"p1", b"p2"])
+        self.assertEqual(router.replies, [])
+        start = time()
+        loader.run()
+        self.assertGreaterEqual(time() - start, 0.05)
+        self.assertEqual(router.replies,
+                         [(b"c0", b"P0"), (b"c1", b"P1"), (b"c2", b"P2")])
+        self.assertEqual(loader.cids, [b"c3"])
+        loader.stop()
+        loader.run()
+        self.assertEqual(router.replies[-1], (b"c3", b"P3"))
+        self.assertEqual(loader.cids, [])
+        self.assertEqual(loader.output, [])
+
 
 if __name__ == "__main__":
     Logger.setup_logging(logging.DEBUG)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+.. invisible:
+     _   _ _____ _     _____ _____
+    | | | |  ___| |   |  ___/  ___|
+    | | | | |__ | |   | |__ \ `--.
+    | | | |  __|| |   |  __| `--. \
+    \ \_/ / |___| |___| |___/\__/ /
+     \___/\____/\_____|____/\____/
+
+Created on Oct 29, 2015
+
+Stress test of ZeroMQLoader: the local clients send requests as fast as
+the answers come back and the latency and the throughput are reported.
+
+███████████████████████████████████████████████████████████████████████████████
+
+Licensed to the Apache Software Foundation (ASF) under one
+or more contributor license agreements.  See the NOTICE file
+distributed with this work for additional information
+regarding copyright ownership.  The ASF licenses this file
+to you under the Apache License, Version 2.0 (the
+"License"); you may not use this file except in compliance
+with the License.  You may obtain a copy of the License at
+
+  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing,
+software distributed under the License is distributed on an
+"AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+KIND, either express or implied.  See the License for the
+specific language governing permissions and limitations
+under the License.
+
+███████████████████████████████████████████████████████████████████████████████
+"""
+
+
+import argparse
+import numpy
+import threading
+from time import sleep, time
+
+from twisted.internet import reactor
+import zmq
+
+import veles.dummy as dummy
+from veles.workflow import Workflow
+from veles.zmq_loader import ZeroMQLoader
+
+
+class SlaveLauncher(dummy.DummyLauncher):
+    @property
+    def is_slave(self):
+        return True
+
+
+def serve(loader, model_time, stopped):
+    """Simulates the workflow: each pass takes model_time seconds.
+    """
+    while not stopped.is_set():
+        loader.run()
+        sleep(model_time)
+
+
+def client(endpoint, index, requests, latencies):
+    context = zmq.Context.instance()
+    socket = context.socket(zmq.DEALER)
+    socket.connect(endpoint)
+    for i in range(requests):
+        start = time()
+        socket.send_multipart([b"%d-%d" % (index, i), b"x" * 64])
+        socket.recv_multipart()
+        latencies.append(time() - start)
+    socket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c", "--clients", type=int, default=16,
+                        help="Number of the concurrent clients.")
+    parser.add_argument("-n", "--requests", type=int, default=100,
+                        help="Number of the requests sent by each client.")
+    parser.add_argument("-b", "--batch-size", type=int, default=1,
+                        help="ZeroMQLoader's batch_size.")
+    parser.add_argument("-w", "--max-wait", type=float, default=0,
+                        help="ZeroMQLoader's max_wait.")
+    parser.add_argument("-t", "--model-time", type=float, default=0.005,
+                        help="Duration of each workflow pass in seconds.")
+    args = parser.parse_args()
+
+    launcher = SlaveLauncher()
+    workflow = Workflow(launcher)
+    loader = ZeroMQLoader(workflow, batch_size=args.batch_size,
+                          max_wait=args.max_wait)
+    loader.initialize()
+    # Echo: the results are the requests themselves
+    workflow.generate_data_for_master = lambda: loader.output
+    endpoint = loader.endpoints["ipc"].address
+    stopped = threading.Event()
+    server = threading.Thread(target=serve,
+                              args=(loader, args.model_time, stopped))
+    latencies = []
+    clients = [threading.Thread(target=client, args=(
+        endpoint, i, args.requests, latencies)) for i in range(args.clients)]
+
+    def run():
+        start = time()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time() - start
+        stopped.set()
+        loader.stop()
+        reactor.callFromThread(reactor.stop)
+        p50, p99 = numpy.percentile(latencies, (50, 99)) * 1000
+        print("batch size %d, max wait %.3f s: %.1f requests/s, latency p50 "
+              "%.1f ms, p99 %.1f ms" % (
+                  args.batch_size, args.max_wait, len(latencies) / elapsed,
+                  p50, p99))
+
+    server.start()
+    reactor.callWhenRunning(threading.Thread(target=run).start)
+    reactor.run()
+    server.join()
+
+
+if __name__ == "__main__":
+    main()
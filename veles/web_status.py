@@ -36,6 +36,7 @@ under the License.
 
 import argparse
 from collections import defaultdict
+import hashlib
 import logging
 import json
 import os
@@ -95,6 +96,9 @@ class UpdateHandler(web.RequestHandler):
             self.server.receive_update(self, data)
         except:
             self.server.exception("update POST")
+            # Make the master resend the full status
+            self.clear()
+            self.set_status(409)
 
 
 class LogsHandler(web.RequestHandler):
@@ -116,6 +120,8 @@ class WebServer(Logger):
     """
 
     GARBAGE_TIMEOUT = 60
+    # The master state keys which do not change what the clients see
+    VOLATILE_KEYS = {"version", "last_update"}
 
     def __init__(self, **kwargs):
         super(WebServer, self).__init__()
@@ -138,6 +144,8 @@ class WebServer(Logger):
         self._port = kwargs.get("port", root.common.web.port)
         self.application.listen(self._port)
         self.masters = {}
+        # Increases on every change of self.masters, used to build ETag-s
+        self.version = 0
         self.motor = motor.MotorClient(
             "mongodb://" + kwargs.get("mongodb",
                                       root.common.mongodb_logging_address))
@@ -203,12 +211,21 @@ class WebServer(Logger):
             for mid, master in self.masters.items():
                 if (now - master["last_update"] > WebServer.GARBAGE_TIMEOUT):
                     garbage.append(mid)
-                    continue
-                for item in data["args"]:
-                    ret[mid][item] = master[item]
             for mid in garbage:
                 self.info("Removing the garbage collected master %s", mid)
                 del self.masters[mid]
+                self.version += 1
+            etag = '"%s"' % hashlib.md5(json.dumps(
+                [self.version, data["args"]]).encode("utf-8")).hexdigest()
+            handler.set_header("Etag", etag)
+            if etag in handler.request.headers.get("If-None-Match", ""):
+                self.debug("Request %s: not modified", rtype)
+                handler.set_status(304)
+                handler.finish()
+                return
+            for mid, master in self.masters.items():
+                for item in data["args"]:
+                    ret[mid][item] = master[item]
             self.debug("Request %s: returning %d workflows", rtype, len(ret))
             handler.finish({"request": rtype, "result": ret})
         elif rtype in ("logs", "events"):
@@ -242,13 +259,47 @@ class WebServer(Logger):
             handler.finish({"request": rtype, "result": None})
 
     def receive_update(self, handler, data):
+        """Merges the status update from a master. The update is either full
+        or relative to the previous one ("base_version"), see
+        veles.launcher.Launcher._make_status_update(). If the base version
+        is unknown, the master is asked to resend the full status.
+        """
         mid = data["id"]
-        graph = data["graph"]
-        data["graph"] = "<cut>"
+        graph = data.pop("graph", None)
         self.debug("Master %s yielded %s", mid, data)
-        data["graph"] = graph
-        self.masters[mid] = data
-        self.masters[mid]["last_update"] = time.time()
+        if "base_version" not in data:
+            master = data
+            master["graph"] = graph
+            previous = self.masters.get(mid)
+            changed = previous is None or any(
+                previous.get(key) != value for key, value in master.items()
+                if key not in WebServer.VOLATILE_KEYS)
+        else:
+            master = self.masters.get(mid)
+            if master is None or \
+                    master.get("version") != data.pop("base_version"):
+                self.info("Master %s is out of sync, requesting the full "
+                          "status", mid)
+                handler.set_status(409)
+                return
+            diff = data.pop("slaves_diff")
+            slaves = master["slaves"]
+            changed = graph is not None and graph != master["graph"]
+            for sid in diff["removed"]:
+                changed |= slaves.pop(sid, None) is not None
+            for sid, node in diff["updated"].items():
+                changed |= slaves.get(sid) != node
+            slaves.update(diff["updated"])
+            changed |= any(master.get(key) != value
+                           for key, value in data.items()
+                           if key not in WebServer.VOLATILE_KEYS)
+            master.update(data)
+            if graph is not None:
+                master["graph"] = graph
+        master["last_update"] = time.time()
+        self.masters[mid] = master
+        if changed:
+            self.version += 1
 
     def run(self):
         IOLoop.instance().add_callback(
@@ -42,6 +42,7 @@ import hashlib
 import inspect
 import json
 import logging
+import re
 import weakref
 import numpy
 import os
@@ -60,6 +61,7 @@ from veles.distributable import IDistributable
 from veles.error import VelesException
 from veles.mutable import LinkableAttribute
 from veles.json_encoders import NumpyJSONEncoder
+from veles.memory import Array
 from veles.result_provider import IResultProvider
 from veles.units import Unit, IUnit, Container
 from veles.plumbing import StartPoint, EndPoint, Repeater
@@ -841,6 +843,8 @@ class Workflow(Container):
             fileobj = file
             need_close = False
         results = self.gather_results()
+        if root.common.results.arrays_dir is not None:
+            self._save_result_arrays(results, file)
         try:
             json.dump(results, fileobj, sort_keys=True, cls=self.json_encoder)
         finally:
@@ -848,6 +852,31 @@ class Workflow(Container):
                 fileobj.close()
         self.info("Successfully wrote %d results to %s", len(results), file)
 
+    def _save_result_arrays(self, results, file):
+        """Saves the big numpy arrays from the results to .npy files in
+        root.common.results.arrays_dir and replaces them with references.
+        """
+        arrays_dir = root.common.results.arrays_dir
+        if isinstance(file, six.string_types):
+            prefix = os.path.splitext(os.path.basename(file))[0]
+        else:
+            prefix = "%s_%s" % (self.launcher.log_id, self.launcher.id)
+        for key, value in sorted(results.items()):
+            if isinstance(value, Array):
+                value.map_read()
+                value = value.mem
+            if not isinstance(value, numpy.ndarray) or \
+                    value.size < root.common.results.arrays_min_size:
+                continue
+            if not os.path.isdir(arrays_dir):
+                os.makedirs(arrays_dir)
+            path = os.path.join(arrays_dir, "%s_%s.npy" % (
+                prefix, re.sub(r"\W", "_", key)))
+            numpy.save(path, value)
+            results[key] = {"npy": path, "shape": value.shape,
+                            "dtype": str(value.dtype)}
+            self.debug("Saved \"%s\" to %s", key, path)
+
     @property
     def checksum(self):
         """Returns the cached checksum of file where this workflow is defined.
@@ -34,6 +34,7 @@ under the License.
 
 
 import six
+from time import time
 import zmq
 from zope.interface import implementer
 
@@ -74,13 +75,22 @@ class ZmqRouter(ZmqConnection):
 class ZeroMQLoader(Unit):
     """
     Listens to incoming ZeroMQ sockets.
+
+    If batch_size is greater than 1, each run takes up to batch_size queued
+    requests, waiting for more at most max_wait seconds after the first one.
+    output and cids are the lists of the payloads and of their ids then, and
+    the workflow must generate the sequence of the results in the same order
+    which are sent back to the corresponding clients.
     """
 
     def __init__(self, workflow, **kwargs):
         super(ZeroMQLoader, self).__init__(workflow, **kwargs)
         self._queue = queue.Queue(kwargs.get("queue_size", 0))
+        self.batch_size = kwargs.get("batch_size", 1)
+        self.max_wait = kwargs.get("max_wait", 0)
         self.output = 0
         self.cid = None
+        self.cids = []
         self._endpoints = {}
         self.negotiates_on_connect = True
 
@@ -88,6 +98,32 @@ class ZeroMQLoader(Unit):
     def endpoints(self):
         return self._endpoints
 
+    @property
+    def batch_size(self):
+        return self._batch_size
+
+    @batch_size.setter
+    def batch_size(self, value):
+        if not isinstance(value, int):
+            raise TypeError(
+                "batch_size must be an integer (got %s)" % type(value))
+        if value < 1:
+            raise ValueError("batch_size must be > 0 (got %d)" % value)
+        self._batch_size = value
+
+    @property
+    def max_wait(self):
+        return self._max_wait
+
+    @max_wait.setter
+    def max_wait(self, value):
+        if not isinstance(value, (int, float)):
+            raise TypeError("max_wait must be either an integer or a floating "
+                            "point value (got %s)" % type(value))
+        if value < 0:
+            raise ValueError("max_wait must be >= 0 (got %s)" % value)
+        self._max_wait = value
+
     def initialize(self, **kwargs):
         if not self.is_slave:
             return
@@ -110,11 +146,41 @@ class ZeroMQLoader(Unit):
             ZmqEndpoint("connect", "tcp://*:%d" % zmq_tcp_port)})
 
     def run(self):
+        if self.batch_size > 1:
+            self._run_batch()
+            return
         if self.cid is not None:
             result = self.workflow.generate_data_for_master()
             self._zmq_socket.reply(self.cid, result)
         self.cid, self.output = self._queue.get()
 
+    def _run_batch(self):
+        if len(self.cids) > 0:
+            results = self.workflow.generate_data_for_master()
+            for cid, result in zip(self.cids, results):
+                if cid is not None:
+                    self._zmq_socket.reply(cid, result)
+        batch = [self._queue.get()]
+        deadline = time() + self.max_wait
+        while len(batch) < self.batch_size and not self._is_stop(batch[-1]):
+            try:
+                timeout = deadline - time()
+                if timeout > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if self._is_stop(batch[-1]):
+            batch.pop()
+        self.cids = [cid for cid, _ in batch]
+        self.output = [data for _, data in batch]
+
+    @staticmethod
+    def _is_stop(item):
+        # stop() puts this
+        return item[0] is None and item[1] is None
+
     def stop(self):
         self.receive_data(None, None)
 
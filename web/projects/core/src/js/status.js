@@ -39,6 +39,8 @@ function updateUI() {
     data: JSON.stringify(msg),
     contentType: "application/json; charset=utf-8",
     async: true,
+    // The server replies 304 Not Modified if nothing has changed
+    ifModified: true,
     success: function(result) {
       console.log("Received response", result);
       if (!result || !result.result) {